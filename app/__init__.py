@@ -42,6 +42,18 @@ def create_app(config_name=None):
     app.register_blueprint(admin_bp)
     app.register_blueprint(api_bp)
     
+    # Data maintenance commands
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # Shared data versions, read once per request by the in-memory caches
+    from app.utils import versioning
+    versioning.init_app(app)
+
+    # Pre-serialized product listings, rebuilt whenever the catalog changes
+    from app.services.catalog_snapshot import catalog_snapshots
+    catalog_snapshots.init_app(app)
+    
     # Security headers
     @app.after_request
     def set_security_headers(response):
@@ -0,0 +1,35 @@
+"""
+CLI commands
+Data maintenance tasks run with `flask <command>`
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models.product import Product
+from app.services.spec_profiles import refresh_spec_profile
+from app.utils.processor_catalog import get_processor_catalog
+from app.utils.versioning import CATALOG, bump_version
+
+
+@click.command('refresh-spec-profiles')
+@with_appcontext
+def refresh_spec_profiles_command():
+    """Re-parse every product's specifications into its spec profile"""
+    products = Product.query.options(
+        selectinload(Product.specifications),
+        selectinload(Product.spec_profile)
+    ).order_by(Product.id).all()
+
+    catalog = get_processor_catalog()
+    for product in products:
+        refresh_spec_profile(product, catalog=catalog)
+
+    bump_version(CATALOG)
+    db.session.commit()
+    click.echo(f'Refreshed spec profiles of {len(products)} products.')
+
+
+def register_commands(app):
+    """Add the maintenance commands to the app's CLI"""
+    app.cli.add_command(refresh_spec_profiles_command)
@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+import time
+
+
+def initial_version() -> int:
+    """
+    First version of a data set: the clock in microseconds
+
+    Counting up from the clock instead of from zero keeps a recreated
+    database from repeating versions that workers already cached data for.
+    """
+    return time.time_ns() // 1000
+
+
+class DataVersion(db.Model):
+    """Change counter of a data set, shared by every worker reading the database"""
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}: {self.version}>'
+
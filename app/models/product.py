@@ -51,7 +51,11 @@ class Product(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     # Relationships
-    specifications = db.relationship('Specification', backref='product', lazy='dynamic', cascade='all, delete-orphan')
+    # Plain list (not dynamic) so listings can eager-load specs with selectinload
+    specifications = db.relationship('Specification', backref='product', lazy='select',
+                                     order_by='Specification.id', cascade='all, delete-orphan')
+    spec_profile = db.relationship('SpecProfile', backref='product', uselist=False,
+                                   cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Product {self.name}>'
@@ -86,3 +90,41 @@ class Specification(db.Model):
     
     def __repr__(self):
         return f'<Specification {self.spec_key}: {self.spec_value}>'
+
+
+class SpecProfile(db.Model):
+    """Typed attributes parsed from a product's specifications at write time"""
+    __tablename__ = 'spec_profiles'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, unique=True)
+    ram_gb = db.Column(db.Float, nullable=True, index=True)
+    storage_gb = db.Column(db.Float, nullable=True, index=True)
+    battery_mah = db.Column(db.Float, nullable=True)
+    battery_hours = db.Column(db.Float, nullable=True)
+    camera_mp = db.Column(db.Float, nullable=True)
+    refresh_rate_hz = db.Column(db.Float, nullable=True)
+    has_5g = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    processor_tier = db.Column(db.Integer, nullable=True)
+    
+    # Score features used by ComparisonService.calculate_overall_score
+    spec_points = db.Column(db.Float, nullable=True)
+    gaming_graphics = db.Column(db.Float, default=0.0, nullable=False)
+    high_ram = db.Column(db.Float, default=0.0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<SpecProfile product={self.product_id}>'
+    
+    def to_dict(self):
+        """Convert profile to dictionary"""
+        return {
+            'ram_gb': self.ram_gb,
+            'storage_gb': self.storage_gb,
+            'battery_mah': self.battery_mah,
+            'battery_hours': self.battery_hours,
+            'camera_mp': self.camera_mp,
+            'refresh_rate_hz': self.refresh_rate_hz,
+            'has_5g': self.has_5g,
+            'processor_tier': self.processor_tier
+        }
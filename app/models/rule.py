@@ -16,6 +16,7 @@ class Rule(db.Model):
     
     # Relationships
     conditions = db.relationship('RuleCondition', backref='rule', lazy='dynamic', cascade='all, delete-orphan')
+    actions = db.relationship('RuleAction', backref='rule', lazy='dynamic', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Rule {self.name}>'
@@ -29,7 +30,8 @@ class Rule(db.Model):
             'category': self.category.name if self.category else None,
             'priority': self.priority,
             'is_active': self.is_active,
-            'conditions': [condition.to_dict() for condition in self.conditions]
+            'conditions': [condition.to_dict() for condition in self.conditions],
+            'actions': [action.to_dict() for action in self.actions]
         }
 
 
@@ -56,3 +58,24 @@ class RuleCondition(db.Model):
             'operator': self.operator,
             'condition_value': self.condition_value
         }
+
+
+class RuleAction(db.Model):
+    """Rule action asserting a derived fact into working memory when the rule fires"""
+    __tablename__ = 'rule_actions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    rule_id = db.Column(db.Integer, db.ForeignKey('rules.id'), nullable=False)
+    fact_key = db.Column(db.String(100), nullable=False)
+    fact_value = db.Column(db.String(255), nullable=False)
+    
+    def __repr__(self):
+        return f'<RuleAction {self.fact_key} = {self.fact_value}>'
+    
+    def to_dict(self):
+        """Convert action to dictionary"""
+        return {
+            'id': self.id,
+            'fact_key': self.fact_key,
+            'fact_value': self.fact_value
+        }
@@ -2,7 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.models.user import User, AuditLog
 from app.models.product import Product, Brand, Category, Specification
-from app.models.rule import Rule, RuleCondition
+from app.models.rule import Rule, RuleCondition, RuleAction
 from app.models.role import Role, Permission
 from app.forms.product_forms import ProductForm, BrandForm
 from app.forms.rule_forms import RuleForm
@@ -10,7 +10,13 @@ from app.forms.role_forms import RoleForm
 from app.forms.brand_forms import BrandForm
 from app.forms.user_forms import UserForm
 from app import db
+from app.services.rule_network import compile_condition, InvalidConditionError
+from app.utils.versioning import RULES, CATALOG, bump_version
+from app.utils.processor_catalog import reload_processor_catalog
+from app.services.search_index import search_index, search_product_ids, tokenize
+from app.services.spec_profiles import refresh_spec_profile
 from functools import wraps
+import re
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -51,8 +57,11 @@ def products():
     
     query = Product.query
     
-    # Apply search filter
-    if search:
+    # Apply search filter through the search index instead of a LIKE scan;
+    # a search without word or number tokens (e.g. '+') matches names as typed
+    if search and tokenize(search):
+        query = query.filter(Product.id.in_(search_product_ids(search, active_only=False)))
+    elif search:
         query = query.filter(Product.name.ilike(f'%{search}%'))
     
     # Apply category filter
@@ -96,8 +105,11 @@ def product_add():
             is_active=form.is_active.data
         )
         
+        refresh_spec_profile(product)
         db.session.add(product)
+        version = bump_version(CATALOG)
         db.session.commit()
+        search_index.index_product(product, version)
         
         # Log the action
         audit_log = AuditLog(
@@ -136,6 +148,7 @@ def product_edit(product_id):
         # Handle specifications
         Specification.query.filter_by(product_id=product.id).delete()
         
+        specifications = []
         spec_index = 0
         while True:
             spec_key = request.form.get(f'spec_key_{spec_index}')
@@ -151,10 +164,16 @@ def product_edit(product_id):
                     spec_value=spec_value
                 )
                 db.session.add(spec)
+                specifications.append(spec)
             
             spec_index += 1
         
+        # Keep the typed profile in sync with the text
+        refresh_spec_profile(product, specifications)
+        
+        version = bump_version(CATALOG)
         db.session.commit()
+        search_index.index_product(product, version)
         
         # Log the action
         audit_log = AuditLog(
@@ -195,7 +214,9 @@ def product_delete(product_id):
     db.session.add(audit_log)
     
     db.session.delete(product)
+    version = bump_version(CATALOG)
     db.session.commit()
+    search_index.remove_product(product_id, version)
     
     flash(f'Product "{product_name}" deleted successfully!', 'success')
     return redirect(url_for('admin.products'))
@@ -247,6 +268,7 @@ def rule_add():
         )
         
         db.session.add(rule)
+        bump_version(RULES)
         db.session.commit()
         
         # Log the action
@@ -282,8 +304,7 @@ def rule_edit(rule_id):
         rule.is_active = form.is_active.data
         
         # Handle conditions
-        RuleCondition.query.filter_by(rule_id=rule.id).delete()
-        
+        conditions = []
         cond_index = 0
         while True:
             cond_key = request.form.get(f'cond_key_{cond_index}')
@@ -301,10 +322,42 @@ def rule_edit(rule_id):
                     operator=cond_operator,
                     condition_value=cond_value
                 )
-                db.session.add(condition)
+                
+                # Reject conditions the inference engine could never evaluate
+                try:
+                    compile_condition(condition)
+                except InvalidConditionError as error:
+                    flash(f'Invalid condition "{cond_key} {cond_operator} {cond_value}": {error}', 'error')
+                    return render_template('admin/rule_form.html', form=form, rule=rule)
+                
+                conditions.append(condition)
             
             cond_index += 1
         
+        # Handle actions (derived facts asserted when the rule fires)
+        actions = []
+        act_index = 0
+        while True:
+            act_key = request.form.get(f'act_key_{act_index}')
+            act_value = request.form.get(f'act_value_{act_index}')
+            
+            if act_key is None:
+                break
+            
+            if act_key and act_value:
+                actions.append(RuleAction(
+                    rule_id=rule.id,
+                    fact_key=act_key,
+                    fact_value=act_value
+                ))
+            
+            act_index += 1
+        
+        RuleCondition.query.filter_by(rule_id=rule.id).delete()
+        RuleAction.query.filter_by(rule_id=rule.id).delete()
+        db.session.add_all(conditions)
+        db.session.add_all(actions)
+        bump_version(RULES)
         db.session.commit()
         
         # Log the action
@@ -332,8 +385,9 @@ def rule_delete(rule_id):
     rule = Rule.query.get_or_404(rule_id)
     rule_name = rule.name
     
-    # Delete related conditions
+    # Delete related conditions and actions
     RuleCondition.query.filter_by(rule_id=rule.id).delete()
+    RuleAction.query.filter_by(rule_id=rule.id).delete()
     
     # Log the action before deleting
     audit_log = AuditLog(
@@ -346,6 +400,7 @@ def rule_delete(rule_id):
     db.session.add(audit_log)
     
     db.session.delete(rule)
+    bump_version(RULES)
     db.session.commit()
     
     flash(f'Rule "{rule_name}" deleted successfully!', 'success')
@@ -639,7 +694,9 @@ def brand_add():
             logo_url=form.logo_url.data
         )
         db.session.add(brand)
+        version = bump_version(CATALOG)
         db.session.commit()
+        search_index.skip(version)
         
         # Log
         audit_log = AuditLog(
@@ -669,7 +726,9 @@ def brand_edit(brand_id):
     if form.validate_on_submit():
         brand.name = form.name.data
         brand.logo_url = form.logo_url.data
+        version = bump_version(CATALOG)
         db.session.commit()
+        search_index.index_brand(brand, version)
         
         # Log
         audit_log = AuditLog(
@@ -702,7 +761,9 @@ def brand_delete(brand_id):
         
     brand_name = brand.name
     db.session.delete(brand)
+    version = bump_version(CATALOG)
     db.session.commit()
+    search_index.skip(version)
     
     # Log
     audit_log = AuditLog(
@@ -719,6 +780,21 @@ def brand_delete(brand_id):
     return redirect(url_for('admin.brands'))
 
 
+@admin_bp.route('/processors/reload', methods=['POST'])
+@login_required
+@permission_required('product.edit')
+def processor_catalog_reload():
+    """Re-read the processor catalog data file without a restart"""
+    try:
+        catalog = reload_processor_catalog()
+    except (OSError, ValueError, KeyError, re.error) as e:
+        flash(f'Processor catalog could not be reloaded: {e}', 'error')
+        return redirect(url_for('admin.dashboard'))
+    
+    flash(f'Processor catalog reloaded: {len(catalog.models)} models, {len(catalog.families)} families.', 'success')
+    return redirect(url_for('admin.dashboard'))
+
+
 # ============================================================================
 # STATUS MANAGEMENT ROUTES - Enable/Disable Products, Users, and Rules
 # ============================================================================
@@ -732,7 +808,9 @@ def product_toggle_status(product_id):
     
     # Toggle the status
     product.is_active = not product.is_active
+    version = bump_version(CATALOG)
     db.session.commit()
+    search_index.index_product(product, version)
     
     # Log the action
     status_text = 'activated' if product.is_active else 'deactivated'
@@ -797,6 +875,7 @@ def rule_toggle_status(rule_id):
     
     # Toggle the status
     rule.is_active = not rule.is_active
+    bump_version(RULES)
     db.session.commit()
     
     # Log the action
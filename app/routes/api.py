@@ -1,50 +1,254 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
 from flask_login import login_required
 from app.models.product import Product, Brand, Category
 from app.models.rule import Rule
+from app.services.comparison_service import ComparisonService, MAX_COMPARE_PRODUCTS, comparison_cache
+from app.services.product_loader import load_product_bundle
+from app.services.catalog_snapshot import ENCODINGS, catalog_snapshots
+from app.services.search_index import search_index
+from app.services.facet_index import FACETS, get_facet_index
+from app.services.typeahead import KINDS as SUGGESTION_KINDS, TOP_K, get_typeahead
+from app.services.product_listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, listing_query, fetch_page, iter_ndjson
+from app.utils.http_cache import catalog_cached
 from app import db
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+DEFAULT_SEARCH_LIMIT = 20
+
 
 @api_bp.route('/products')
+@catalog_cached
 def get_products():
-    """Get all active products"""
-    category = request.args.get('category')
-    brand = request.args.get('brand')
+    """
+    Get active products, one keyset page at a time
     
-    query = Product.query.filter_by(is_active=True)
+    Pages are ordered by id; ?cursor=<id> continues after that product and
+    ?limit= sets the page size (capped at MAX_PAGE_SIZE). The next page is
+    advertised in a Link header. With ?format=ndjson (or an Accept of
+    application/x-ndjson) every remaining product is streamed instead, one
+    JSON object per line.
+    """
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
     
-    if category:
-        cat = Category.query.filter_by(name=category).first()
-        if cat:
-            query = query.filter_by(category_id=cat.id)
+    cursor = request.args.get('cursor')
+    try:
+        after = int(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     
-    if brand:
-        br = Brand.query.filter_by(name=brand).first()
-        if br:
-            query = query.filter_by(brand_id=br.id)
+    category = request.args.get('category')
+    brand = request.args.get('brand')
+    min_ram = request.args.get('min_ram', type=float)
+    min_storage = request.args.get('min_storage', type=float)
+    wants_ndjson = request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+    
+    # Listings without spec filters are cut from the pre-serialized catalog when it is ready
+    snapshot = catalog_snapshots.get() if min_ram is None and min_storage is None else None
+    if snapshot is not None:
+        listing = snapshot.listing(category, brand)
+        if wants_ndjson:
+            accepted = [encoding for encoding in ENCODINGS if request.accept_encodings[encoding]]
+            body, encoding = listing.stream(after, accepted)
+            response = Response(body, mimetype=NDJSON_MIMETYPE)
+            response.content_encoding = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+        body, next_cursor = listing.page(after, limit)
+        response = Response(body, mimetype='application/json')
+    else:
+        query = listing_query(category=category, brand=brand, min_ram=min_ram, min_storage=min_storage)
+        if wants_ndjson:
+            return Response(stream_with_context(iter_ndjson(query, after)), mimetype=NDJSON_MIMETYPE)
+        
+        # One extra row tells whether another page follows
+        products = fetch_page(query, after, limit + 1)
+        response = jsonify([product.to_dict() for product in products[:limit]])
+        next_cursor = products[limit - 1].id if len(products) > limit else None
     
-    products = query.all()
-    return jsonify([product.to_dict() for product in products])
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("api.get_products", **args)}>; rel="next"'
+    return response
 
 
 @api_bp.route('/products/<int:product_id>')
+@catalog_cached
 def get_product(product_id):
     """Get single product by ID"""
     product = Product.query.get_or_404(product_id)
     return jsonify(product.to_dict())
 
 
+@api_bp.route('/search')
+@catalog_cached
+def search_products():
+    """
+    Full-text search over active products, e.g. /api/search?q=galaxy+s23
+    
+    Results are ranked by relevance and paged with ?limit= and ?offset=;
+    ?category= and ?brand= narrow them by name, ignoring case. Facet counts give the
+    number of matches per category and per brand.
+    """
+    query_text = request.args.get('q', '').strip()
+    if not query_text:
+        return jsonify({'error': 'Missing search query'}), 400
+    
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset not negative'}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+    
+    categories = {c.id: c.name for c in Category.query.all()}
+    brands = {b.id: b.name for b in Brand.query.all()}
+    category_ids = {name.casefold(): id for id, name in categories.items()}
+    brand_ids = {name.casefold(): id for id, name in brands.items()}
+    
+    category_name = request.args.get('category')
+    brand_name = request.args.get('brand')
+    category_id = category_ids.get(category_name.casefold()) if category_name else None
+    brand_id = brand_ids.get(brand_name.casefold()) if brand_name else None
+    if category_name and category_id is None:
+        return jsonify({'error': f'Unknown category: {category_name}'}), 400
+    if brand_name and brand_id is None:
+        return jsonify({'error': f'Unknown brand: {brand_name}'}), 400
+    
+    search_index.ensure_current()
+    result = search_index.search(query_text, category_id=category_id, brand_id=brand_id)
+    
+    page = result.hits[offset:offset + limit]
+    products = load_product_bundle([product_id for product_id, _ in page])
+    scores = dict(page)
+    
+    def facet(counts, names):
+        return [{'id': id, 'name': names.get(id), 'count': count}
+                for id, count in sorted(counts.items(), key=lambda item: (-item[1], names.get(item[0], '')))]
+    
+    return jsonify({
+        'query': query_text,
+        'total': result.total,
+        'offset': offset,
+        'limit': limit,
+        'results': [dict(product.to_dict(), score=round(scores[product.id], 4)) for product in products],
+        'facets': {
+            'category': facet(result.facets['category'], categories),
+            'brand': facet(result.facets['brand'], brands)
+        }
+    })
+
+
+@api_bp.route('/suggest')
+@catalog_cached
+def suggest():
+    """
+    Autocomplete brands, product names and spec terms, e.g. /api/suggest?q=gal
+    
+    ?kind= limits suggestions to brand, product or spec; ?limit= caps how
+    many are returned (at most TOP_K).
+    """
+    kind = request.args.get('kind') or None
+    if kind is not None and kind not in SUGGESTION_KINDS:
+        return jsonify({'error': f'kind must be one of {", ".join(SUGGESTION_KINDS)}'}), 400
+    limit = max(1, min(request.args.get('limit', TOP_K, type=int), TOP_K))
+    
+    query_text = request.args.get('q', '')
+    suggestions = get_typeahead().complete(query_text, kind=kind, limit=limit)
+    return jsonify({
+        'query': query_text,
+        'suggestions': [suggestion.to_dict() for suggestion in suggestions]
+    })
+
+
+@api_bp.route('/facets')
+@catalog_cached
+def facet_search():
+    """
+    Filter active products by facets with live counts
+    
+    Facets are category, brand, price (band), ram and storage (GB) and 5g
+    (yes/no), e.g. /api/facets?brand=Samsung,Dell&ram=8&5g=yes. Values of a
+    facet are alternatives; different facets must all match. Every facet
+    value is returned with the number of products choosing it would give.
+    Matching products come in id order, paged like /api/products.
+    """
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    after = request.args.get('cursor', type=int)
+    
+    facets = get_facet_index()
+    filters = facets.parse_filters({
+        facet: [value.strip() for arg in request.args.getlist(facet) for value in arg.split(',')]
+        for facet in FACETS
+    })
+    
+    ids = facets.ids_of(facets.select(filters))
+    page = ids[ids > after] if after is not None else ids
+    products = load_product_bundle(page[:limit].tolist())
+    
+    def entry(facet, value, count):
+        entry = {'value': facets.label(facet, value), 'count': count}
+        if facet in facets.names:
+            entry['id'] = value
+        return entry
+    
+    return jsonify({
+        'total': len(ids),
+        'products': [product.to_dict() for product in products],
+        'next_cursor': int(page[limit - 1]) if len(page) > limit else None,
+        'facets': {
+            facet: [entry(facet, value, count)
+                    for value, count in sorted(values.items(), key=lambda item: facets.sort_key(facet, item[0]))]
+            for facet, values in facets.counts(filters).items()
+        }
+    })
+
+
+@api_bp.route('/compare')
+def compare_products():
+    """Compare 2 to 4 active products, e.g. /api/compare?ids=1,2,3"""
+    try:
+        ids = [int(id.strip()) for id in request.args.get('ids', '').split(',') if id.strip()]
+    except ValueError:
+        return jsonify({'error': 'Invalid product IDs'}), 400
+    
+    ids = list(dict.fromkeys(ids))
+    if not 2 <= len(ids) <= MAX_COMPARE_PRODUCTS:
+        return jsonify({'error': f'Select between 2 and {MAX_COMPARE_PRODUCTS} products'}), 400
+    
+    products = load_product_bundle(ids, active_only=True)
+    if len(products) != len(ids):
+        found = {product.id for product in products}
+        return jsonify({'error': 'Products not found', 'ids': [i for i in ids if i not in found]}), 404
+    
+    analysis = ComparisonService(cache=comparison_cache).compare_products(products)
+    return jsonify(analysis)
+
+
+@api_bp.route('/compare/cache-stats')
+@login_required
+def compare_cache_stats():
+    """Hit/miss counters of the comparison cache"""
+    return jsonify(comparison_cache.stats())
+
+
 @api_bp.route('/brands')
+@catalog_cached
 def get_brands():
     """Get all brands"""
-    brands = Brand.query.all()
+    brands = Brand.query.order_by(Brand.id).all()
     return jsonify([{'id': b.id, 'name': b.name, 'logo_url': b.logo_url} for b in brands])
 
 
 @api_bp.route('/categories')
+@catalog_cached
 def get_categories():
     """Get all categories"""
-    categories = Category.query.all()
+    categories = Category.query.order_by(Category.id).all()
     return jsonify([{'id': c.id, 'name': c.name, 'description': c.description} for c in categories])
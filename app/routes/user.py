@@ -1,8 +1,11 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session
-from app.models.product import Product, Brand, Category
-from app.services.recommendation_service import RecommendationService
-from app.services.comparison_service import ComparisonService
+from flask import Blueprint, render_template, request, redirect, url_for, session, abort
+from app.models.product import Brand, Category
+from app.services.recommendation_service import RecommendationService, recommendation_cache
+from app.services.comparison_service import ComparisonService, MAX_COMPARE_PRODUCTS, comparison_cache
+from app.services.product_loader import load_product_bundle
+from app.services.spec_schema import comparison_table
 from app.forms.recommendation_forms import RecommendationForm
+from app.utils.spec_parser import SPEC_SECTION_MATCHER
 from app import db
 
 user_bp = Blueprint('user', __name__)
@@ -36,7 +39,7 @@ def recommend():
         }
         
         # Get recommendations
-        rec_service = RecommendationService()
+        rec_service = RecommendationService(cache=recommendation_cache)
         recommendations = rec_service.get_recommendations(user_inputs, limit=9)
         
         # Store in session
@@ -79,8 +82,8 @@ def compare():
         flash('You can compare up to 4 products at a time.', 'warning')
         ids = ids[:4]
     
-    # Fetch products with their specifications (only active products)
-    products = Product.query.filter(Product.id.in_(ids), Product.is_active == True).all()
+    # Fetch products with their specifications in request order (only active products)
+    products = load_product_bundle(ids, active_only=True)
     
     if not products:
         flash('No products found.', 'error')
@@ -88,12 +91,8 @@ def compare():
     
     # Build comparison data
     comparison_data = []
-    all_spec_keys = set()
     
     for product in products:
-        specs = {spec.spec_key: spec.spec_value for spec in product.specifications}
-        all_spec_keys.update(specs.keys())
-        
         comparison_data.append({
             'id': product.id,
             'name': product.name,
@@ -101,21 +100,20 @@ def compare():
             'category': product.category.name if product.category else 'N/A',
             'price': float(product.price),
             'image_url': product.image_url or '/static/images/placeholder.png',
-            'description': product.description or '',
-            'specifications': specs
+            'description': product.description or ''
         })
     
-    # Sort specification keys for consistent display
-    sorted_spec_keys = sorted(all_spec_keys)
+    # Specification rows aligned to the category's canonical schema
+    spec_rows = comparison_table(products).rows()
     
     return render_template('user/compare.html',
                          products=comparison_data,
-                         spec_keys=sorted_spec_keys)
+                         spec_rows=spec_rows)
 
 
 @user_bp.route('/compare-analysis')
 def compare_analysis():
-    """Pros & Cons comparison for exactly 2 products"""
+    """Pros & Cons comparison for 2 to 4 products"""
     from flask import flash
     
     # Get product IDs from query string
@@ -132,15 +130,16 @@ def compare_analysis():
         flash('Invalid product IDs.', 'error')
         return redirect(url_for('user.home'))
     
-    # Validate exactly 2 products
-    if len(ids) != 2:
-        flash('Please select exactly 2 products for Pros & Cons analysis.', 'warning')
+    # Validate number of products (2-4)
+    ids = list(dict.fromkeys(ids))
+    if not 2 <= len(ids) <= MAX_COMPARE_PRODUCTS:
+        flash(f'Please select between 2 and {MAX_COMPARE_PRODUCTS} products for Pros & Cons analysis.', 'warning')
         return redirect(url_for('user.home'))
     
-    # Fetch products
-    products = Product.query.filter(Product.id.in_(ids)).all()
+    # Fetch products in the order they were requested
+    products = load_product_bundle(ids)
     
-    if len(products) != 2:
+    if len(products) != len(ids):
         flash('One or more selected products could not be found.', 'error')
         return redirect(url_for('user.home'))
     
@@ -148,12 +147,13 @@ def compare_analysis():
     user_preferences = session.get('last_preferences', {})
     
     # Perform analysis
-    comp_service = ComparisonService()
-    # pass products in the order they were requested if possible, strictly speaking the query result order isn't guaranteed relative to ID list order without explicit ordering
-    # but for comparison it doesn't matter much which is p1 and p2 initially
-    analysis_data = comp_service.compare_two_products(products[0], products[1], user_preferences)
+    comp_service = ComparisonService(cache=comparison_cache)
+    if len(products) == 2:
+        analysis_data = comp_service.compare_two_products(products[0], products[1], user_preferences)
+        return render_template('user/comparison_analysis.html', **analysis_data)
     
-    return render_template('user/comparison_analysis.html', **analysis_data)
+    analysis_data = comp_service.compare_products(products, user_preferences)
+    return render_template('user/comparison_group_analysis.html', **analysis_data)
 
 
 @user_bp.route('/product/<int:product_id>')
@@ -162,35 +162,25 @@ def product_detail(product_id):
     from flask import flash
     
     # Fetch product with all relationships
-    product = Product.query.get_or_404(product_id)
+    products = load_product_bundle([product_id])
+    if not products:
+        abort(404)
+    product = products[0]
     
     # Get specifications as a dictionary
     specs = {spec.spec_key: spec.spec_value for spec in product.specifications}
     
-    # Group specifications by category for better display
-    spec_categories = {
-        'Performance': ['Processor', 'RAM', 'Graphics', 'Storage', 'SSD'],
-        'Display': ['Display', 'Screen', 'Resolution'],
-        'Camera': ['Camera', 'Front Camera', 'Video'],
-        'Battery & Power': ['Battery', 'Charging', 'Power'],
-        'System': ['OS', 'Operating System'],
-        'Physical': ['Weight', 'Dimensions', 'Build']
-    }
-    
-    # Categorize specs
+    # Group specifications by category (SPEC_SECTIONS) for better display
     categorized_specs = {}
     uncategorized_specs = {}
     
     for key, value in specs.items():
-        categorized = False
-        for category, keywords in spec_categories.items():
-            if any(keyword.lower() in key.lower() for keyword in keywords):
-                if category not in categorized_specs:
-                    categorized_specs[category] = {}
-                categorized_specs[category][key] = value
-                categorized = True
-                break
-        if not categorized:
+        category = SPEC_SECTION_MATCHER.first(key)
+        if category:
+            if category not in categorized_specs:
+                categorized_specs[category] = {}
+            categorized_specs[category][key] = value
+        else:
             uncategorized_specs[key] = value
     
     # Add uncategorized to "Other" category if exists
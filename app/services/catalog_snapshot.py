@@ -0,0 +1,188 @@
+"""
+Catalog Snapshot
+Product listings serialized once per catalog version and served as ready bytes
+"""
+import bisect
+import gzip
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app import db
+from app.models.product import Brand, Category
+from app.services.product_listing import listing_query, iter_products, serialize_product
+from app.utils.versioning import CATALOG, current_version, subscribe
+
+try:
+    import brotli
+except ImportError:  # Optional: listings are still served gzip-compressed
+    brotli = None
+
+# Precompressed encodings of full listings, in order of preference
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Body compressed with a content coding from ENCODINGS"""
+    if encoding == 'br':
+        return brotli.compress(body)
+    return gzip.compress(body, mtime=0)
+
+
+class ListingBuffer:
+    """One filtered listing: serialized products in id order and its full NDJSON bodies"""
+    
+    def __init__(self, ids: List[int], lines: List[bytes]):
+        self.ids = ids
+        self.lines = lines
+        ndjson = b''.join(line + b'\n' for line in lines)
+        self.ndjson = {encoding: compress(ndjson, encoding) for encoding in ENCODINGS}
+        self.ndjson[None] = ndjson
+    
+    def _start(self, after: Optional[int]) -> int:
+        return 0 if after is None else bisect.bisect_right(self.ids, after)
+    
+    def page(self, after: Optional[int], limit: int) -> Tuple[bytes, Optional[int]]:
+        """JSON array body of up to limit products after the cursor, and the next cursor"""
+        start = self._start(after)
+        end = start + limit
+        body = b'[' + b','.join(self.lines[start:end]) + b']\n'
+        return body, (self.ids[end - 1] if end < len(self.ids) else None)
+    
+    def stream(self, after: Optional[int], encodings: Iterable[str] = ()) -> Tuple[bytes, Optional[str]]:
+        """
+        NDJSON body of the products after the cursor and its content coding
+        
+        Whole listings are served from the precompressed bodies in the first
+        accepted encoding; continuations after a cursor are sent uncompressed.
+        """
+        if after is None:
+            for encoding in encodings:
+                if encoding in self.ndjson:
+                    return self.ndjson[encoding], encoding
+            return self.ndjson[None], None
+        return b''.join(line + b'\n' for line in self.lines[self._start(after):]), None
+
+
+EMPTY_LISTING = ListingBuffer([], [])
+
+
+class CatalogSnapshot(NamedTuple):
+    """Serialized listings of every category/brand filter at one catalog version"""
+    version: int
+    categories: Dict[str, int]  # case-folded name -> id
+    brands: Dict[str, int]
+    listings: Dict[Tuple[Optional[int], Optional[int]], ListingBuffer]
+    
+    def listing(self, category: str = None, brand: str = None) -> ListingBuffer:
+        """
+        Listing of /api/products for a category and brand name
+        
+        Like listing_query, names that match nothing do not filter. Names
+        match case-insensitively, as they do under MySQL's collation.
+        """
+        category_id = self.categories.get(category.casefold()) if category else None
+        brand_id = self.brands.get(brand.casefold()) if brand else None
+        return self.listings.get((category_id, brand_id), EMPTY_LISTING)
+
+
+def build_snapshot(version: int) -> CatalogSnapshot:
+    """Serialize every active product once and index the lines under each filter they pass"""
+    ids, lines = defaultdict(list), defaultdict(list)
+    for product in iter_products(listing_query()):
+        line = serialize_product(product).encode('utf-8')
+        for key in ((None, None), (product.category_id, None), (None, product.brand_id),
+                    (product.category_id, product.brand_id)):
+            ids[key].append(product.id)
+            lines[key].append(line)
+    
+    return CatalogSnapshot(
+        version,
+        {category.name.casefold(): category.id for category in Category.query.all()},
+        {brand.name.casefold(): brand.id for brand in Brand.query.all()},
+        {key: ListingBuffer(ids[key], lines[key]) for key in ids}
+    )
+
+
+class CatalogSnapshots:
+    """
+    Holder of the current catalog snapshot
+    
+    With background rebuilds (the default), every catalog bump starts a
+    rebuild on a worker thread and requests never wait for it: until the
+    snapshot matches the catalog version, get() returns None and callers
+    query the database as before. Without them (tests), get() rebuilds
+    inline when the snapshot is stale.
+    """
+    
+    def __init__(self):
+        self.app = None
+        self.background = True
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+    
+    def init_app(self, app):
+        """Bind to the application whose database the snapshots are built from"""
+        self.app = app
+        self.background = app.config.get('CATALOG_SNAPSHOT_BACKGROUND', True)
+        subscribe(CATALOG, self.schedule)
+    
+    def get(self) -> Optional[CatalogSnapshot]:
+        """The snapshot of the current catalog version, if one is ready"""
+        version = current_version(CATALOG)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        
+        if self.background:
+            self.schedule(version)
+            return None
+        
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = build_snapshot(version)
+                self._snapshot = snapshot
+        return snapshot
+    
+    def schedule(self, version: int = None) -> None:
+        """Start a background rebuild unless one is already running"""
+        if not self.background or self.app is None:
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name='catalog-snapshot', daemon=True).start()
+    
+    def _rebuild(self) -> None:
+        # Keep going until the snapshot caught up with bumps made while building;
+        # the last check holds the lock so a bump either sees the flag cleared
+        # and schedules its own rebuild, or is seen by this one
+        try:
+            with self.app.app_context():
+                while True:
+                    version = self._latest_version()
+                    if self._snapshot is None or self._snapshot.version != version:
+                        self._snapshot = build_snapshot(version)
+                    with self._lock:
+                        if self._snapshot.version == self._latest_version():
+                            self._rebuilding = False
+                            return
+        except Exception:
+            self.app.logger.exception('Catalog snapshot rebuild failed')
+            with self._lock:
+                self._rebuilding = False
+    
+    @staticmethod
+    def _latest_version() -> int:
+        # End the worker's read transaction so commits made since are visible
+        db.session.rollback()
+        return current_version(CATALOG)
+    
+    def clear(self) -> None:
+        """Drop the snapshot"""
+        self._snapshot = None
+
+
+catalog_snapshots = CatalogSnapshots()
@@ -3,16 +3,118 @@ Comparison Service
 Intelligent product comparison with pros/cons analysis for decision support
 """
 from app.models.product import Product
+from app.utils.spec_parser import (
+    parse_spec_profile, RAM_KEYWORDS, STORAGE_KEYWORDS, BATTERY_KEYWORDS, PROCESSOR_KEYWORDS,
+    SPEC_KEY_MATCHER, SPEC_VALUE_MATCHER
+)
+from app.utils.cache import LRUCache
+from app.utils.versioning import CATALOG, current_version
 from app import db
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, NamedTuple, Optional, FrozenSet
 from decimal import Decimal
+import copy
+import itertools
+
+# Product-only parts of the overall score, stored on each product's spec profile
+SCORE_FEATURES = ('spec_points', 'gaming_graphics', 'high_ram')
+
+# Bonus for products suited to the selected usage type
+USAGE_BONUS = 15.0
+
+# Most products one comparison can hold, matching the /compare page
+MAX_COMPARE_PRODUCTS = 4
+
+# Fields of each compared product returned along with its pros, cons and score
+PRODUCT_FIELDS = ('id', 'name', 'brand', 'category', 'price', 'image_url', 'description', 'specifications')
+
+# Cached analyses of product groups; assessments are per group and preferences
+COMPARISON_CACHE_SIZE = 512
+ASSESSMENT_CACHE_SIZE = 2048
+
+# Dimensions compared by the larger listed value, with the spec profile attributes holding it
+NUMERIC_DIMENSIONS = (
+    ('RAM', RAM_KEYWORDS, ('ram_gb',)),
+    ('Storage', STORAGE_KEYWORDS, ('storage_gb',)),
+    ('Battery', BATTERY_KEYWORDS, ('battery_mah', 'battery_hours'))
+)
+
+# Refresh rates that make a display premium on their own
+PREMIUM_REFRESH_RATE_HZ = 120
+
+
+class ParsedSpec(NamedTuple):
+    """A specification with its lower-cased key and keyword hits"""
+    key: str
+    spec: Any
+    key_hits: FrozenSet[str]  # SPEC_KEY_MATCHER keywords in the key
+    value_hits: FrozenSet[str]  # SPEC_VALUE_MATCHER labels of the value
+
+
+class SpecSheet:
+    """A product's specifications and typed spec profile values, read once for every analysis step"""
+    
+    def __init__(self, product: Product, specs: List[ParsedSpec], values: Dict[str, Any]):
+        self.product = product
+        self.category = product.category.name.lower()
+        self.specs = specs
+        self.values = values  # SpecProfile attributes: ram_gb, storage_gb, ..., processor_tier
+        # Lower-cased key lookup; a repeated key keeps its first position and last value
+        self.by_key = {}
+        for parsed in specs:
+            self.by_key[parsed.key] = parsed
+    
+    def find(self, keywords: List[str]) -> Optional[ParsedSpec]:
+        """First specification whose lower-cased key contains one of the keywords"""
+        for parsed in self.by_key.values():
+            if not parsed.key_hits.isdisjoint(keywords):
+                return parsed
+        return None
+
+
+class ComparisonCache:
+    """
+    Bounded caches for comparisons of popular product groups
+    
+    Both are keyed on the sorted product ids with their update stamps.
+    Analyses hold the preference-independent part; assessments (pros, cons,
+    scores) add the normalized preferences to the key.
+    """
+    
+    def __init__(self, maxsize: int = COMPARISON_CACHE_SIZE, assessment_maxsize: int = ASSESSMENT_CACHE_SIZE):
+        self.analyses = LRUCache(maxsize=maxsize)
+        self.assessments = LRUCache(maxsize=assessment_maxsize)
+    
+    def clear(self):
+        """Drop every cached comparison"""
+        self.analyses.clear()
+        self.assessments.clear()
+    
+    def stats(self) -> dict:
+        """Hit/miss counters of both caches for monitoring"""
+        return {
+            'analyses': self.analyses.stats(),
+            'assessments': self.assessments.stats()
+        }
+
+
+comparison_cache = ComparisonCache()
+
+
+def _join_names(products: List[Product]) -> str:
+    """Product names joined for a sentence"""
+    names = [product.name for product in products]
+    if len(names) == 1:
+        return names[0]
+    return f"{', '.join(names[:-1])} and {names[-1]}"
 
 
 class ComparisonService:
     """Service for intelligent product comparison with pros/cons analysis"""
     
-    def __init__(self):
+    def __init__(self, cache: 'ComparisonCache' = None):
         """Initialize comparison service with category benchmarks"""
+        self.cache = cache
+        
         # Define category-specific benchmarks for evaluation
         self.benchmarks = {
             'smartphone': {
@@ -57,81 +159,233 @@ class ComparisonService:
         Returns:
             Dictionary with comprehensive comparison data including pros, cons, and winner
         """
-        user_preferences = user_preferences or {}
+        analysis = self.compare_products([product1, product2], user_preferences)
+        pair = analysis['pairwise'][0]
+        
+        return {
+            'product1': analysis['products'][0],
+            'product2': analysis['products'][1],
+            'comparative_advantages': pair['advantages'],
+            'winner': pair['winner'],
+            'winner_reason': pair['winner_reason'],
+            'price_difference': pair['price_difference'],
+            'same_category': pair['same_category']
+        }
+    
+    def compare_products(
+        self,
+        products: List[Product],
+        user_preferences: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Compare up to MAX_COMPARE_PRODUCTS products at once
         
-        # Extract pros and cons for each product
-        product1_pros = self.extract_pros(product1, user_preferences)
-        product1_cons = self.extract_cons(product1, user_preferences)
+        The preference-independent analysis of the group (parsed specs,
+        dimension winners, head-to-head advantages) and the preference-dependent
+        assessment (pros, cons, scores) are built separately, so with a cache
+        each is reused on its own. Results are then arranged in display order.
         
-        product2_pros = self.extract_pros(product2, user_preferences)
-        product2_cons = self.extract_cons(product2, user_preferences)
+        Args:
+            products: Products to compare, in display order
+            user_preferences: Optional user preferences from session
         
-        # Get comparative advantages
-        comparative_advantages = self.get_comparative_advantages(product1, product2)
+        Returns:
+            Dictionary with per-product analysis, dimension winners (product
+            ids), pairwise summaries and the overall winner id (None on a tie)
+        """
+        if not 2 <= len(products) <= MAX_COMPARE_PRODUCTS:
+            raise ValueError(f"Can compare between 2 and {MAX_COMPARE_PRODUCTS} products")
+        
+        preferences = self.normalize_preferences(user_preferences or {})
+        group = sorted(products, key=lambda product: product.id)
+        analysis, assessment = self._group_analysis(group, preferences)
+        
+        entries = []
+        for product in products:
+            static = analysis['products'][product.id]
+            entry = {field: static[field] for field in PRODUCT_FIELDS}
+            entry.update(assessment[product.id])
+            entries.append(entry)
+        
+        pairwise = []
+        for entry1, entry2 in itertools.combinations(entries, 2):
+            static1 = analysis['products'][entry1['id']]
+            static2 = analysis['products'][entry2['id']]
+            score1, score2 = entry1['score'], entry2['score']
+            advantages = analysis['advantages'][(entry1['id'], entry2['id'])]
+            pairwise.append({
+                'product_ids': [entry1['id'], entry2['id']],
+                'advantages': advantages,
+                'winner': 1 if score1 > score2 else (2 if score2 > score1 else 0),
+                'winner_reason': self._generate_winner_reason(entry1, entry2, score1, score2, advantages),
+                'price_difference': abs(entry1['price'] - entry2['price']),
+                'same_category': static1['category_id'] == static2['category_id']
+            })
+        
+        # Dimension leaders in display order
+        position = {product.id: index for index, product in enumerate(products)}
+        dimension_winners = {
+            dimension: {'winners': sorted(data['winners'], key=position.get), 'reason': data['reason']}
+            for dimension, data in analysis['dimensions'].items()
+        }
+        scores = [entry['score'] for entry in entries]
+        best = [entry['id'] for entry in entries if entry['score'] == max(scores)]
+        winner = best[0] if len(best) == 1 else None
+        
+        result = {
+            'products': entries,
+            'dimensions': dimension_winners,
+            'pairwise': pairwise,
+            'winner': winner,
+            'winner_reason': self._generate_group_winner_reason(entries, dimension_winners, winner)
+        }
+        # Callers get their own copy of the parts shared with cache entries
+        return copy.deepcopy(result) if self.cache is not None else result
+    
+    def normalize_preferences(self, user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The preferences a comparison depends on, in canonical form
+        
+        Budgets that are missing or not numbers are dropped, as the analysis
+        ignores them anyway, so equivalent questionnaires share cache entries.
+        """
+        budget = user_preferences.get('budget')
+        try:
+            budget = float(budget) if budget else None
+        except (ValueError, TypeError):
+            budget = None
+        return {
+            'budget': budget,
+            'usage_type': (user_preferences.get('usage_type') or '').lower(),
+            'preferred_brand': (user_preferences.get('preferred_brand') or '').lower() or None
+        }
+    
+    def _group_analysis(self, group: List[Product], preferences: Dict[str, Any]) -> Tuple[Dict, Dict]:
+        """Analysis and assessment of products sorted by id, from the cache if one is set"""
+        if self.cache is None:
+            analysis = self._analyze(group)
+            return analysis, self._assess(analysis, preferences)
+        
+        key = self._group_key(group)
+        analysis = self.cache.analyses.get(key)
+        if analysis is None:
+            analysis = self._analyze(group)
+            self.cache.analyses.set(key, analysis)
+        
+        assessment_key = (key, tuple(sorted(preferences.items())))
+        assessment = self.cache.assessments.get(assessment_key)
+        if assessment is None:
+            assessment = self._assess(analysis, preferences)
+            self.cache.assessments.set(assessment_key, assessment)
+        return analysis, assessment
+    
+    def _group_key(self, group: List[Product]) -> Tuple:
+        """Sorted product ids with the stamps of their last product and specification writes"""
+        stamps = []
+        for product in group:
+            profile = getattr(product, 'spec_profile', None)
+            stamps.append((product.id, getattr(product, 'updated_at', None),
+                           getattr(profile, 'updated_at', None)))
+        return current_version(CATALOG), tuple(stamps)
+    
+    def _analyze(self, group: List[Product]) -> Dict[str, Any]:
+        """
+        Preference-independent analysis of a product group
         
-        # Calculate overall scores
-        score1 = self.calculate_overall_score(product1, user_preferences)
-        score2 = self.calculate_overall_score(product2, user_preferences)
+        Returns:
+            Dictionary with static product entries by id, dimension winners and
+            head-to-head advantages for every ordered pair of product ids
+        """
+        sheets = [self.spec_sheet(product) for product in group]
+        dimensions = [self._dimension_specs(sheet) for sheet in sheets]
+        
+        entries = {}
+        for sheet in sheets:
+            product = sheet.product
+            entries[product.id] = {
+                'id': product.id,
+                'name': product.name,
+                'brand': product.brand.name,
+                'category': product.category.name,
+                'category_id': product.category_id,
+                'price': float(product.price),
+                'image_url': product.image_url,
+                'description': product.description,
+                'specifications': {parsed.spec.spec_key: parsed.spec.spec_value for parsed in sheet.specs},
+                'spec_pros': self._spec_pros(sheet),
+                'spec_cons': self._spec_cons(sheet),
+                'gaming_ready': self._gaming_ready(sheet),
+                'features': self.product_score_features(product, sheet)
+            }
         
-        # Determine winner
-        winner = 1 if score1 > score2 else (2 if score2 > score1 else 0)
-        winner_reason = self._generate_winner_reason(product1, product2, score1, score2, comparative_advantages)
+        advantages = {}
+        for first, second in itertools.permutations(range(len(group)), 2):
+            advantages[(group[first].id, group[second].id)] = self._pairwise_advantages(
+                sheets[first], sheets[second], dimensions[first], dimensions[second])
         
         return {
-            'product1': {
-                'id': product1.id,
-                'name': product1.name,
-                'brand': product1.brand.name,
-                'category': product1.category.name,
-                'price': float(product1.price),
-                'image_url': product1.image_url,
-                'description': product1.description,
-                'pros': product1_pros,
-                'cons': product1_cons,
-                'score': score1,
-                'specifications': {spec.spec_key: spec.spec_value for spec in product1.specifications}
-            },
-            'product2': {
-                'id': product2.id,
-                'name': product2.name,
-                'brand': product2.brand.name,
-                'category': product2.category.name,
-                'price': float(product2.price),
-                'image_url': product2.image_url,
-                'description': product2.description,
-                'pros': product2_pros,
-                'cons': product2_cons,
-                'score': score2,
-                'specifications': {spec.spec_key: spec.spec_value for spec in product2.specifications}
-            },
-            'comparative_advantages': comparative_advantages,
-            'winner': winner,
-            'winner_reason': winner_reason,
-            'price_difference': abs(float(product1.price) - float(product2.price)),
-            'same_category': product1.category_id == product2.category_id
+            'products': entries,
+            'dimensions': self._dimension_winners(sheets, dimensions),
+            'advantages': advantages
         }
     
-    def extract_pros(self, product: Product, user_preferences: Dict[str, Any]) -> List[str]:
+    def _assess(self, analysis: Dict[str, Any], preferences: Dict[str, Any]) -> Dict[int, Dict]:
+        """Pros, cons and score of every analysed product for one set of preferences"""
+        assessment = {}
+        for product_id, static in analysis['products'].items():
+            assessment[product_id] = {
+                'pros': self._compose_pros(static['price'], static['brand'], static['spec_pros'],
+                                           static['gaming_ready'], preferences),
+                'cons': self._compose_cons(static['price'], static['spec_cons'], preferences),
+                'score': self._score_from_features(static['price'], static['brand'], static['features'], preferences)
+            }
+        return assessment
+    
+    def spec_sheet(self, product: Product) -> SpecSheet:
+        """Match a product's specifications once for every analysis step"""
+        return SpecSheet(product, [self._parse_spec(spec) for spec in product.specifications],
+                         self.spec_values(product))
+    
+    def spec_values(self, product: Product) -> Dict[str, Any]:
+        """Typed values stored on the product's spec profile, parsed on the fly if it has none"""
+        profile = getattr(product, 'spec_profile', None)
+        if profile is not None:
+            return profile.to_dict()
+        return parse_spec_profile((spec.spec_key, spec.spec_value) for spec in product.specifications)
+    
+    def _parse_spec(self, spec) -> ParsedSpec:
+        """Match a specification's key and value keywords in one pass each"""
+        return ParsedSpec(spec.spec_key.lower(), spec,
+                          SPEC_KEY_MATCHER.match(spec.spec_key), SPEC_VALUE_MATCHER.match(spec.spec_value))
+    
+    def extract_pros(self, product: Product, user_preferences: Dict[str, Any],
+                     sheet: SpecSheet = None) -> List[str]:
         """
         Extract product strengths based on specifications and user needs
         
         Args:
             product: Product to analyze
             user_preferences: User preferences for context-aware analysis
+            sheet: Already parsed specifications of the product
         
         Returns:
             List of product strengths/advantages
         """
+        sheet = sheet or self.spec_sheet(product)
+        return self._compose_pros(float(product.price), product.brand.name, self._spec_pros(sheet),
+                                  self._gaming_ready(sheet), user_preferences)
+    
+    def _compose_pros(self, price: float, brand_name: str, spec_pros: List[str], gaming_ready: bool,
+                      user_preferences: Dict[str, Any]) -> List[str]:
+        """Preference-based pros around the specification pros"""
         pros = []
-        category_name = product.category.name.lower()
-        specs = {spec.spec_key: spec.spec_value for spec in product.specifications}
         
         # Price-based pros
         budget = user_preferences.get('budget')
         if budget:
             try:
                 budget_float = float(budget)
-                price_float = float(product.price)
+                price_float = float(price)
                 
                 if price_float <= budget_float * 0.7:
                     pros.append(f"Excellent value - priced at ${price_float:.2f}, well under your ${budget_float:.2f} budget")
@@ -142,106 +396,123 @@ class ComparisonService:
         
         # Brand preference match
         preferred_brand = user_preferences.get('preferred_brand')
-        if preferred_brand and product.brand.name.lower() == preferred_brand.lower():
-            pros.append(f"Your preferred brand: {product.brand.name}")
+        if preferred_brand and brand_name.lower() == preferred_brand.lower():
+            pros.append(f"Your preferred brand: {brand_name}")
         
         # Specification-based pros
-        for spec in product.specifications:
-            key_lower = spec.spec_key.lower()
-            value_lower = spec.spec_value.lower()
+        pros.extend(spec_pros)
+        
+        # Usage type specific pros
+        usage_type = (user_preferences.get('usage_type') or '').lower()
+        if usage_type == 'gaming' and gaming_ready:
+            pros.append("Optimized for gaming performance")
+        
+        # If no pros found, add generic one
+        if not pros:
+            pros.append("Solid specifications for everyday use")
+        
+        return pros[:6]  # Limit to top 6 pros
+    
+    def _spec_pros(self, sheet: SpecSheet) -> List[str]:
+        """Strengths found in the specifications alone"""
+        pros = []
+        category_name = sheet.category
+        ram, storage, battery = (sheet.find(keywords) for keywords in (RAM_KEYWORDS, STORAGE_KEYWORDS, BATTERY_KEYWORDS))
+        
+        for parsed in sheet.specs:
+            keys = parsed.key_hits
+            values = parsed.value_hits
+            spec_value = parsed.spec.spec_value
             
             # RAM analysis
-            if 'ram' in key_lower or 'memory' in key_lower:
-                ram_value = self._extract_number(spec.spec_value)
+            if parsed is ram:
+                ram_value = sheet.values['ram_gb']
                 if ram_value:
                     benchmark = self.benchmarks.get(category_name, {}).get('ram', {})
                     if ram_value >= benchmark.get('excellent', 16):
-                        pros.append(f"Excellent RAM capacity: {spec.spec_value}")
+                        pros.append(f"Excellent RAM capacity: {spec_value}")
                     elif ram_value >= benchmark.get('good', 8):
-                        pros.append(f"Good RAM for multitasking: {spec.spec_value}")
+                        pros.append(f"Good RAM for multitasking: {spec_value}")
             
             # Storage analysis
-            if 'storage' in key_lower or 'ssd' in key_lower:
-                storage_value = self._extract_number(spec.spec_value)
+            if parsed is storage:
+                storage_value = sheet.values['storage_gb']
                 if storage_value:
                     benchmark = self.benchmarks.get(category_name, {}).get('storage', {})
                     if storage_value >= benchmark.get('excellent', 512):
-                        pros.append(f"Ample storage space: {spec.spec_value}")
+                        pros.append(f"Ample storage space: {spec_value}")
                     elif storage_value >= benchmark.get('good', 256):
-                        pros.append(f"Sufficient storage: {spec.spec_value}")
+                        pros.append(f"Sufficient storage: {spec_value}")
             
             # Battery analysis
-            if 'battery' in key_lower:
-                battery_value = self._extract_number(spec.spec_value)
-                if battery_value:
-                    if category_name == 'smartphone' and battery_value >= 4500:
-                        pros.append(f"Long-lasting battery: {spec.spec_value}")
-                    elif category_name == 'laptop' and battery_value >= 10:
-                        pros.append(f"Extended battery life: {spec.spec_value}")
+            if parsed is battery:
+                if category_name == 'smartphone' and (sheet.values['battery_mah'] or 0) >= 4500:
+                    pros.append(f"Long-lasting battery: {spec_value}")
+                elif category_name == 'laptop' and (sheet.values['battery_hours'] or 0) >= 10:
+                    pros.append(f"Extended battery life: {spec_value}")
             
             # Display analysis
-            if 'display' in key_lower or 'screen' in key_lower:
-                if any(keyword in value_lower for keyword in ['oled', 'amoled', '4k', 'retina', '120hz', '144hz']):
-                    pros.append(f"Premium display: {spec.spec_value}")
+            if 'display' in keys or 'screen' in keys:
+                if 'premium_display' in values or (sheet.values['refresh_rate_hz'] or 0) >= PREMIUM_REFRESH_RATE_HZ:
+                    pros.append(f"Premium display: {spec_value}")
             
             # Camera analysis (for smartphones)
-            if category_name == 'smartphone' and ('camera' in key_lower):
-                camera_mp = self._extract_number(spec.spec_value)
+            if category_name == 'smartphone' and ('camera' in keys):
+                camera_mp = sheet.values['camera_mp']
                 if camera_mp and camera_mp >= 48:
-                    pros.append(f"High-quality camera: {spec.spec_value}")
+                    pros.append(f"High-quality camera: {spec_value}")
             
             # Processor analysis
-            if 'processor' in key_lower or 'cpu' in key_lower:
-                if any(keyword in value_lower for keyword in ['i7', 'i9', 'ryzen 7', 'ryzen 9', 'm1', 'm2', 'm3', 'snapdragon 8']):
-                    pros.append(f"Powerful processor: {spec.spec_value}")
+            if 'processor' in keys or 'cpu' in keys:
+                if 'premium_processor' in values:
+                    pros.append(f"Powerful processor: {spec_value}")
             
             # Graphics analysis
-            if 'graphics' in key_lower or 'gpu' in key_lower:
-                if any(keyword in value_lower for keyword in ['rtx', 'dedicated', 'nvidia', 'radeon']):
-                    pros.append(f"Dedicated graphics: {spec.spec_value}")
+            if 'graphics' in keys or 'gpu' in keys:
+                if 'dedicated_graphics' in values:
+                    pros.append(f"Dedicated graphics: {spec_value}")
             
             # Connectivity features
-            if '5g' in value_lower:
+            if '5g' in values:
                 pros.append("5G connectivity support")
-            if 'wifi 6' in value_lower or 'wi-fi 6' in value_lower:
+            if 'wifi_6' in values:
                 pros.append("Latest WiFi 6 standard")
         
-        # Usage type specific pros
-        usage_type = user_preferences.get('usage_type', '').lower()
-        if usage_type == 'gaming':
-            has_good_graphics = any('graphics' in s.spec_key.lower() for s in product.specifications)
-            has_good_ram = any('ram' in s.spec_key.lower() and self._extract_number(s.spec_value, 0) >= 16 
-                              for s in product.specifications)
-            if has_good_graphics and has_good_ram:
-                pros.append("Optimized for gaming performance")
-        
-        # If no pros found, add generic one
-        if not pros:
-            pros.append("Solid specifications for everyday use")
-        
-        return pros[:6]  # Limit to top 6 pros
+        return pros
+    
+    def _gaming_ready(self, sheet: SpecSheet) -> bool:
+        """Whether the product lists graphics and 16GB+ RAM"""
+        has_good_graphics = any('graphics' in p.key_hits for p in sheet.specs)
+        has_good_ram = (sheet.values['ram_gb'] or 0) >= 16
+        return has_good_graphics and has_good_ram
     
-    def extract_cons(self, product: Product, user_preferences: Dict[str, Any]) -> List[str]:
+    def extract_cons(self, product: Product, user_preferences: Dict[str, Any],
+                     sheet: SpecSheet = None) -> List[str]:
         """
         Extract product weaknesses relative to category standards
         
         Args:
             product: Product to analyze
             user_preferences: User preferences for context-aware analysis
+            sheet: Already parsed specifications of the product
         
         Returns:
             List of product weaknesses/limitations
         """
+        sheet = sheet or self.spec_sheet(product)
+        return self._compose_cons(float(product.price), self._spec_cons(sheet), user_preferences)
+    
+    def _compose_cons(self, price: float, spec_cons: List[Tuple[str, bool]],
+                      user_preferences: Dict[str, Any]) -> List[str]:
+        """Preference-based cons ahead of the specification cons that apply"""
         cons = []
-        category_name = product.category.name.lower()
-        specs = {spec.spec_key: spec.spec_value for spec in product.specifications}
         
         # Price-based cons
         budget = user_preferences.get('budget')
         if budget:
             try:
                 budget_float = float(budget)
-                price_float = float(product.price)
+                price_float = float(price)
                 
                 if price_float > budget_float:
                     cons.append(f"Over budget by ${price_float - budget_float:.2f}")
@@ -250,61 +521,70 @@ class ComparisonService:
             except (ValueError, TypeError):
                 pass
         
+        # Specification-based cons, some only matter for gaming
+        gaming = (user_preferences.get('usage_type') or '').lower() == 'gaming'
+        cons.extend(text for text, gaming_only in spec_cons if gaming or not gaming_only)
+        
+        # If no cons found, note that positively
+        if not cons:
+            cons.append("No significant drawbacks identified")
+        
+        return cons[:6]  # Limit to top 6 cons
+    
+    def _spec_cons(self, sheet: SpecSheet) -> List[Tuple[str, bool]]:
+        """Weaknesses found in the specifications, flagged when they only matter for gaming"""
+        cons = []
+        category_name = sheet.category
+        
         # Check for missing important features
-        has_ram = any('ram' in s.spec_key.lower() for s in product.specifications)
-        has_storage = any('storage' in s.spec_key.lower() or 'ssd' in s.spec_key.lower() 
-                         for s in product.specifications)
-        has_battery = any('battery' in s.spec_key.lower() for s in product.specifications)
+        has_ram = any('ram' in p.key_hits for p in sheet.specs)
+        has_storage = any('storage' in p.key_hits or 'ssd' in p.key_hits for p in sheet.specs)
+        has_battery = any('battery' in p.key_hits for p in sheet.specs)
         
         if not has_ram:
-            cons.append("RAM specifications not disclosed")
+            cons.append(("RAM specifications not disclosed", False))
         if not has_storage:
-            cons.append("Storage information not available")
+            cons.append(("Storage information not available", False))
         if not has_battery:
-            cons.append("Battery details not specified")
+            cons.append(("Battery details not specified", False))
         
-        # Specification-based cons
-        for spec in product.specifications:
-            key_lower = spec.spec_key.lower()
-            value_lower = spec.spec_value.lower()
+        ram, storage, battery = (sheet.find(keywords) for keywords in (RAM_KEYWORDS, STORAGE_KEYWORDS, BATTERY_KEYWORDS))
+        for parsed in sheet.specs:
+            keys = parsed.key_hits
+            spec_value = parsed.spec.spec_value
             
             # Low RAM
-            if 'ram' in key_lower or 'memory' in key_lower:
-                ram_value = self._extract_number(spec.spec_value)
+            if parsed is ram:
+                ram_value = sheet.values['ram_gb']
                 if ram_value:
                     benchmark = self.benchmarks.get(category_name, {}).get('ram', {})
                     if ram_value < benchmark.get('minimum', 4):
-                        cons.append(f"Limited RAM: {spec.spec_value} may struggle with multitasking")
+                        cons.append((f"Limited RAM: {spec_value} may struggle with multitasking", False))
             
             # Low storage
-            if 'storage' in key_lower or 'ssd' in key_lower:
-                storage_value = self._extract_number(spec.spec_value)
+            if parsed is storage:
+                storage_value = sheet.values['storage_gb']
                 if storage_value:
                     benchmark = self.benchmarks.get(category_name, {}).get('storage', {})
                     if storage_value < benchmark.get('minimum', 128):
-                        cons.append(f"Limited storage: {spec.spec_value} may require external storage")
+                        cons.append((f"Limited storage: {spec_value} may require external storage", False))
             
             # Small battery (for smartphones)
-            if category_name == 'smartphone' and 'battery' in key_lower:
-                battery_value = self._extract_number(spec.spec_value)
+            if category_name == 'smartphone' and parsed is battery:
+                battery_value = sheet.values['battery_mah']
                 if battery_value and battery_value < 3500:
-                    cons.append(f"Smaller battery: {spec.spec_value} may require frequent charging")
+                    cons.append((f"Smaller battery: {spec_value} may require frequent charging", False))
             
             # Integrated graphics only (for gaming laptops)
-            if 'graphics' in key_lower or 'gpu' in key_lower:
-                if 'integrated' in value_lower and user_preferences.get('usage_type', '').lower() == 'gaming':
-                    cons.append("Integrated graphics not ideal for gaming")
+            if 'graphics' in keys or 'gpu' in keys:
+                if 'integrated_graphics' in parsed.value_hits:
+                    cons.append(("Integrated graphics not ideal for gaming", True))
         
         # Check for older connectivity
-        has_5g = any('5g' in s.spec_value.lower() for s in product.specifications)
-        if category_name == 'smartphone' and not has_5g:
-            cons.append("No 5G support (4G only)")
-        
-        # If no cons found, note that positively
-        if not cons:
-            cons.append("No significant drawbacks identified")
+        if category_name == 'smartphone' and not sheet.values['has_5g']:
+            cons.append(("No 5G support (4G only)", False))
         
-        return cons[:6]  # Limit to top 6 cons
+        return cons
     
     def get_comparative_advantages(self, product1: Product, product2: Product) -> Dict[str, Dict]:
         """
@@ -317,6 +597,26 @@ class ComparisonService:
         Returns:
             Dictionary mapping categories to winner and reason
         """
+        sheet1 = self.spec_sheet(product1)
+        sheet2 = self.spec_sheet(product2)
+        return self._pairwise_advantages(sheet1, sheet2,
+                                         self._dimension_specs(sheet1), self._dimension_specs(sheet2))
+    
+    def _dimension_specs(self, sheet: SpecSheet) -> Dict[str, Any]:
+        """The specification compared in each dimension, its profile value and the processor tier"""
+        dimensions = {name: sheet.find(keywords) for name, keywords, _ in NUMERIC_DIMENSIONS}
+        dimensions['values'] = {
+            name: next((sheet.values[attribute] for attribute in attributes if sheet.values[attribute] is not None), None)
+            for name, _, attributes in NUMERIC_DIMENSIONS
+        }
+        dimensions['Processor'] = sheet.find(PROCESSOR_KEYWORDS)
+        dimensions['processor_tier'] = sheet.values['processor_tier']
+        return dimensions
+    
+    def _pairwise_advantages(self, sheet1: SpecSheet, sheet2: SpecSheet,
+                             dimensions1: Dict[str, Any], dimensions2: Dict[str, Any]) -> Dict[str, Dict]:
+        """Winner and reason per dimension for one pair of analysed products"""
+        product1, product2 = sheet1.product, sheet2.product
         advantages = {}
         
         # Price comparison
@@ -339,38 +639,20 @@ class ComparisonService:
                 'reason': "Both products have the same price"
             }
         
-        # Get specifications dictionaries
-        specs1 = {spec.spec_key.lower(): spec.spec_value for spec in product1.specifications}
-        specs2 = {spec.spec_key.lower(): spec.spec_value for spec in product2.specifications}
-        
-        # Compare RAM
-        ram1 = self._find_spec_value(specs1, ['ram', 'memory'])
-        ram2 = self._find_spec_value(specs2, ['ram', 'memory'])
-        if ram1 or ram2:
-            winner, reason = self._compare_numeric_specs(ram1, ram2, product1.name, product2.name, "RAM")
-            advantages['RAM'] = {'winner': winner, 'reason': reason}
-        
-        # Compare Storage
-        storage1 = self._find_spec_value(specs1, ['storage', 'ssd'])
-        storage2 = self._find_spec_value(specs2, ['storage', 'ssd'])
-        if storage1 or storage2:
-            winner, reason = self._compare_numeric_specs(storage1, storage2, product1.name, product2.name, "Storage")
-            advantages['Storage'] = {'winner': winner, 'reason': reason}
-        
-        # Compare Battery
-        battery1 = self._find_spec_value(specs1, ['battery'])
-        battery2 = self._find_spec_value(specs2, ['battery'])
-        if battery1 or battery2:
-            winner, reason = self._compare_numeric_specs(battery1, battery2, product1.name, product2.name, "Battery")
-            advantages['Battery'] = {'winner': winner, 'reason': reason}
+        # Compare RAM, Storage and Battery
+        for name, _, _ in NUMERIC_DIMENSIONS:
+            spec1, spec2 = dimensions1[name], dimensions2[name]
+            if spec1 or spec2:
+                winner, reason = self._compare_numeric_specs(
+                    spec1 and spec1.spec.spec_value, spec2 and spec2.spec.spec_value,
+                    dimensions1['values'][name], dimensions2['values'][name], product1.name, product2.name, name)
+                advantages[name] = {'winner': winner, 'reason': reason}
         
         # Compare Processor
-        proc1 = self._find_spec_value(specs1, ['processor', 'cpu'])
-        proc2 = self._find_spec_value(specs2, ['processor', 'cpu'])
-        if proc1 and proc2:
+        if dimensions1['Processor'] and dimensions2['Processor']:
             # Qualitative comparison based on known processor rankings
-            proc1_score = self._rate_processor(proc1)
-            proc2_score = self._rate_processor(proc2)
+            proc1_score = dimensions1['processor_tier']
+            proc2_score = dimensions2['processor_tier']
             
             if proc1_score > proc2_score:
                 advantages['Processor'] = {'winner': 1, 'reason': f"{product1.name} has a more powerful processor"}
@@ -388,123 +670,229 @@ class ComparisonService:
         
         return advantages
     
-    def calculate_overall_score(self, product: Product, user_preferences: Dict[str, Any]) -> float:
+    def _dimension_winners(self, sheets: List[SpecSheet], dimensions: List[Dict[str, Any]]) -> Dict[str, Dict]:
+        """
+        Leaders of every dimension across all compared products
+        
+        Returns:
+            Dictionary mapping dimensions to the winning product ids (empty on
+            a tie between all products) and a reason
+        """
+        products = [sheet.product for sheet in sheets]
+        winners = {}
+        
+        # Price: the cheapest product wins
+        prices = [float(product.price) for product in products]
+        cheapest = [product for product, price in zip(products, prices) if price == min(prices)]
+        if len(cheapest) == len(products):
+            winners['Price'] = {'winners': [], 'reason': "All products have the same price"}
+        else:
+            winners['Price'] = {
+                'winners': [product.id for product in cheapest],
+                'reason': f"{_join_names(cheapest)} {'is' if len(cheapest) == 1 else 'are'} the cheapest at ${min(prices):.2f}"
+            }
+        
+        # RAM, Storage and Battery: the largest listed value wins
+        for name, _, _ in NUMERIC_DIMENSIONS:
+            listed = [(product, dims[name], dims['values'][name] or 0) for product, dims in zip(products, dimensions)
+                      if dims[name] and dims[name].spec.spec_value]
+            if not listed:
+                continue
+            best = max(value for _, _, value in listed)
+            leaders = [(product, parsed) for product, parsed, value in listed if value == best]
+            if len(leaders) == len(products):
+                winners[name] = {'winners': [], 'reason': f"All have equal {name}: {leaders[0][1].spec.spec_value}"}
+            else:
+                winners[name] = {
+                    'winners': [product.id for product, _ in leaders],
+                    'reason': f"{_join_names([p for p, _ in leaders])} {'has' if len(leaders) == 1 else 'have'} "
+                              f"the most {name}: {leaders[0][1].spec.spec_value}"
+                }
+        
+        # Processor: the highest tier wins among products that list one
+        tiers = [(product, dims['processor_tier']) for product, dims in zip(products, dimensions)
+                 if dims['Processor']]
+        if len(tiers) >= 2:
+            best = max(tier for _, tier in tiers)
+            leaders = [product for product, tier in tiers if tier == best]
+            if len(leaders) == len(tiers):
+                winners['Processor'] = {'winners': [], 'reason': "Similar processor performance"}
+            else:
+                winners['Processor'] = {
+                    'winners': [product.id for product in leaders],
+                    'reason': f"{_join_names(leaders)} {'has' if len(leaders) == 1 else 'have'} the most powerful processor"
+                }
+        
+        # Brand reputation (if different brands)
+        brand_names = list(dict.fromkeys(product.brand.name for product in products))
+        if len(brand_names) > 1:
+            winners['Brand'] = {
+                'winners': [],
+                'reason': f"Different brands: {' vs '.join(brand_names)} - personal preference"
+            }
+        
+        return winners
+    
+    def _generate_group_winner_reason(self, entries: List[Dict], dimension_winners: Dict, winner) -> str:
+        """Explain the overall winner of an N-way comparison"""
+        if winner is None:
+            return "The top products are tied on overall score. Your final choice may come down to personal preference or brand loyalty."
+        
+        name = next(entry['name'] for entry in entries if entry['id'] == winner)
+        led = [dimension for dimension, data in dimension_winners.items() if winner in data['winners']]
+        if led:
+            return f"{name} is the recommended choice with the best overall score, leading in {', '.join(led)}."
+        return f"{name} has the best overall balance of features, performance, and price."
+    
+    def calculate_overall_score(self, product: Product, user_preferences: Dict[str, Any],
+                                sheet: SpecSheet = None) -> float:
         """
         Assign weighted score for recommendation (0-100)
         
+        Product-only parts come from the score features stored on the
+        product's spec profile and are combined with the preference weights.
+        
         Args:
             product: Product to score
             user_preferences: User preferences for weighted scoring
+            sheet: Already parsed specifications of the product
         
         Returns:
             Overall score from 0 to 100
         """
+        features = self.product_score_features(product, sheet)
+        return self._score_from_features(product.price, product.brand.name, features, user_preferences)
+    
+    def _score_from_features(self, price, brand_name: str, features: Dict[str, float],
+                             user_preferences: Dict[str, Any]) -> float:
+        """Overall score of a product from its price, brand and score features"""
         score = 50.0  # Base score
-        category_name = product.category.name.lower()
         
         # Budget alignment (weight: 25%)
-        budget = user_preferences.get('budget')
-        if budget:
-            try:
-                budget_float = float(budget)
-                price_float = float(product.price)
-                
-                if price_float <= budget_float:
-                    # Within budget: higher score for better value
-                    budget_ratio = price_float / budget_float
-                    score += 25 * (1 - abs(budget_ratio - 0.8))  # Optimal at 80% of budget
-                else:
-                    # Over budget: penalty
-                    score -= 15
-            except (ValueError, TypeError):
-                pass
+        score += self._budget_points(price, user_preferences)
         
-        # Specification quality (weight: 40%)
-        spec_score = 0
-        for spec in product.specifications:
-            key_lower = spec.spec_key.lower()
-            
-            # RAM scoring
-            if 'ram' in key_lower:
-                ram_value = self._extract_number(spec.spec_value)
-                if ram_value:
-                    benchmark = self.benchmarks.get(category_name, {}).get('ram', {})
-                    if ram_value >= benchmark.get('excellent', 16):
-                        spec_score += 10
-                    elif ram_value >= benchmark.get('good', 8):
-                        spec_score += 6
-                    else:
-                        spec_score += 2
-            
-            # Storage scoring
-            if 'storage' in key_lower or 'ssd' in key_lower:
-                storage_value = self._extract_number(spec.spec_value)
-                if storage_value:
-                    benchmark = self.benchmarks.get(category_name, {}).get('storage', {})
-                    if storage_value >= benchmark.get('excellent', 512):
-                        spec_score += 10
-                    elif storage_value >= benchmark.get('good', 256):
-                        spec_score += 6
-                    else:
-                        spec_score += 2
-            
-            # Premium features
-            value_lower = spec.spec_value.lower()
-            if any(keyword in value_lower for keyword in ['oled', 'amoled', '5g', 'wifi 6', 'rtx', 'm1', 'm2']):
-                spec_score += 5
+        weights = self.preference_weights(user_preferences)
         
-        score += min(40, spec_score)  # Cap at 40 points
+        # Specification quality (weight: 40%)
+        score += features['spec_points']
         
         # Brand preference (weight: 10%)
         preferred_brand = user_preferences.get('preferred_brand')
-        if preferred_brand and product.brand.name.lower() == preferred_brand.lower():
+        if preferred_brand and brand_name.lower() == preferred_brand.lower():
             score += 10
         
         # Usage type alignment (weight: 15%)
-        usage_type = user_preferences.get('usage_type', '').lower()
-        if usage_type == 'gaming':
-            has_good_graphics = any('dedicated' in s.spec_value.lower() or 'nvidia' in s.spec_value.lower() 
-                                   for s in product.specifications if 'graphics' in s.spec_key.lower())
-            if has_good_graphics:
-                score += 15
-        elif usage_type in ['business', 'professional']:
-            has_good_ram = any(self._extract_number(s.spec_value, 0) >= 16 
-                              for s in product.specifications if 'ram' in s.spec_key.lower())
-            if has_good_ram:
-                score += 15
+        score += sum(weight * features[name] for name, weight in zip(SCORE_FEATURES[1:], weights[1:]))
         
         # Normalize to 0-100 range
         return max(0, min(100, score))
     
+    def score_features(self, category_name: str, specifications: List,
+                       values: Dict[str, Any] = None) -> Dict[str, float]:
+        """
+        Compute the product-only parts of calculate_overall_score
+        
+        Args:
+            category_name: Lower-cased category name used to pick benchmarks
+            specifications: The product's specifications
+            values: Their typed spec profile values, parsed from them if not given
+        
+        Returns:
+            Dictionary keyed by SCORE_FEATURES
+        """
+        if values is None:
+            values = parse_spec_profile((spec.spec_key, spec.spec_value) for spec in specifications)
+        return self._score_parsed(category_name, [self._parse_spec(spec) for spec in specifications], values)
+    
+    def _score_parsed(self, category_name: str, specs: List[ParsedSpec], values: Dict[str, Any]) -> Dict[str, float]:
+        """score_features over already matched specifications and their profile values"""
+        spec_score = 0
+        
+        # RAM scoring
+        ram_value = values['ram_gb']
+        if ram_value:
+            benchmark = self.benchmarks.get(category_name, {}).get('ram', {})
+            if ram_value >= benchmark.get('excellent', 16):
+                spec_score += 10
+            elif ram_value >= benchmark.get('good', 8):
+                spec_score += 6
+            else:
+                spec_score += 2
+        
+        # Storage scoring
+        storage_value = values['storage_gb']
+        if storage_value:
+            benchmark = self.benchmarks.get(category_name, {}).get('storage', {})
+            if storage_value >= benchmark.get('excellent', 512):
+                spec_score += 10
+            elif storage_value >= benchmark.get('good', 256):
+                spec_score += 6
+            else:
+                spec_score += 2
+        
+        # Premium features
+        spec_score += 5 * sum(1 for parsed in specs if 'premium_feature' in parsed.value_hits)
+        
+        # Dedicated graphics count for gaming, 16GB+ RAM for professional use
+        gaming_graphics = any('gaming_graphics' in p.value_hits for p in specs if 'graphics' in p.key_hits)
+        high_ram = (ram_value or 0) >= 16
+        
+        return {
+            'spec_points': min(40, spec_score),  # Cap at 40 points
+            'gaming_graphics': 1.0 if gaming_graphics else 0.0,
+            'high_ram': 1.0 if high_ram else 0.0
+        }
+    
+    def product_score_features(self, product: Product, sheet: SpecSheet = None) -> Dict[str, float]:
+        """Score features stored for a product, computed on the fly if it has none"""
+        profile = getattr(product, 'spec_profile', None)
+        if profile is not None and profile.spec_points is not None:
+            return {name: float(getattr(profile, name)) for name in SCORE_FEATURES}
+        if sheet is not None:
+            return self._score_parsed(sheet.category, sheet.specs, sheet.values)
+        return self.score_features(product.category.name.lower(), product.specifications, self.spec_values(product))
+    
+    def preference_weights(self, user_preferences: Dict[str, Any]) -> Tuple[float, ...]:
+        """Weights applied to the SCORE_FEATURES of every product for these preferences"""
+        usage_type = (user_preferences.get('usage_type') or '').lower()
+        return (
+            1.0,
+            USAGE_BONUS if usage_type == 'gaming' else 0.0,
+            USAGE_BONUS if usage_type in ['business', 'professional'] else 0.0
+        )
+    
     # Helper methods
     
-    def _extract_number(self, text: str, default: float = None) -> float:
-        """Extract first number from text string"""
-        import re
-        numbers = re.findall(r'\d+\.?\d*', text)
-        if numbers:
+    def _budget_points(self, price, user_preferences: Dict[str, Any]) -> float:
+        """Points for how well a price fits the user's budget"""
+        budget = user_preferences.get('budget')
+        if budget:
             try:
-                return float(numbers[0])
-            except ValueError:
+                budget_float = float(budget)
+                price_float = float(price)
+                
+                if price_float <= budget_float:
+                    # Within budget: higher score for better value
+                    budget_ratio = price_float / budget_float
+                    return 25 * (1 - abs(budget_ratio - 0.8))  # Optimal at 80% of budget
+                else:
+                    # Over budget: penalty
+                    return -15
+            except (ValueError, TypeError):
                 pass
-        return default
-    
-    def _find_spec_value(self, specs_dict: Dict, keywords: List[str]) -> str:
-        """Find specification value by keyword match"""
-        for key, value in specs_dict.items():
-            if any(keyword in key for keyword in keywords):
-                return value
-        return None
+        return 0
     
     def _compare_numeric_specs(
         self, 
         value1: str, 
         value2: str, 
+        number1: Optional[float], 
+        number2: Optional[float], 
         name1: str, 
         name2: str, 
         spec_name: str
     ) -> Tuple[int, str]:
-        """Compare two numeric specifications and return winner"""
+        """Compare two specifications by their spec profile values and return winner"""
         if not value1 and not value2:
             return 0, f"Neither product lists {spec_name}"
         if not value1:
@@ -512,8 +900,8 @@ class ComparisonService:
         if not value2:
             return 1, f"{name1} lists {spec_name}: {value1}"
         
-        num1 = self._extract_number(value1, 0)
-        num2 = self._extract_number(value2, 0)
+        num1 = number1 or 0
+        num2 = number2 or 0
         
         if num1 > num2:
             return 1, f"{name1} has more {spec_name}: {value1} vs {value2}"
@@ -522,60 +910,22 @@ class ComparisonService:
         else:
             return 0, f"Both have equal {spec_name}: {value1}"
     
-    def _rate_processor(self, processor_name: str) -> int:
-        """Rate processor performance based on model name"""
-        processor_lower = processor_name.lower()
-        
-        # Intel ratings
-        if 'i9' in processor_lower or 'ultra 9' in processor_lower:
-            return 9
-        if 'i7' in processor_lower or 'ultra 7' in processor_lower:
-            return 7
-        if 'i5' in processor_lower or 'ultra 5' in processor_lower:
-            return 5
-        if 'i3' in processor_lower:
-            return 3
-        
-        # AMD ratings
-        if 'ryzen 9' in processor_lower:
-            return 9
-        if 'ryzen 7' in processor_lower:
-            return 7
-        if 'ryzen 5' in processor_lower:
-            return 5
-        
-        # Apple ratings
-        if 'm3' in processor_lower:
-            return 9
-        if 'm2' in processor_lower:
-            return 8
-        if 'm1' in processor_lower:
-            return 7
-        
-        # Qualcomm Snapdragon (mobile)
-        if 'snapdragon 8' in processor_lower or 'snapdragon 888' in processor_lower:
-            return 8
-        if 'snapdragon 7' in processor_lower:
-            return 6
-        
-        return 5  # Default middle rating
-    
     def _generate_winner_reason(
         self, 
-        product1: Product, 
-        product2: Product, 
+        product1: Dict, 
+        product2: Dict, 
         score1: float, 
         score2: float, 
         comparative_advantages: Dict
     ) -> str:
-        """Generate explanation for why one product is recommended over the other"""
+        """Generate explanation for why one product entry is recommended over the other"""
         score_diff = abs(score1 - score2)
         
         if score_diff < 5:
             return "Both products are very closely matched. Your final choice may come down to personal preference or brand loyalty."
         
         winner_product = product1 if score1 > score2 else product2
-        winner_name = winner_product.name
+        winner_name = winner_product['name']
         
         # Count advantages
         advantages_count = sum(1 for adv in comparative_advantages.values() 
@@ -583,9 +933,9 @@ class ComparisonService:
         
         if advantages_count >= 3:
             return f"{winner_name} is the recommended choice, winning in {advantages_count} key categories including performance, features, and value."
-        elif score1 > score2 and float(product1.price) < float(product2.price):
+        elif score1 > score2 and product1['price'] < product2['price']:
             return f"{winner_name} offers better value for money with comparable or superior features at a lower price point."
-        elif score2 > score1 and float(product2.price) < float(product1.price):
+        elif score2 > score1 and product2['price'] < product1['price']:
             return f"{winner_name} provides excellent value with strong performance at a more competitive price."
         else:
             return f"{winner_name} edges ahead with a better overall balance of features, performance, and price."
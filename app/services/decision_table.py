@@ -0,0 +1,139 @@
+"""
+Decision Table
+Fired rules precomputed per category, usage type and budget interval
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+from app.models.product import Category
+from app.services.rule_network import RuleNetwork, CompiledRule, get_rule_network, normalize_fact
+from app.utils.versioning import RULES, versioned_snapshot
+
+# Facts the table is indexed on; requests testing anything else fall back to the engine
+AXES = ('category', 'category_id', 'usage_type', 'budget')
+
+# Upper bound on rows, including rows filled in lazily for unseen answers
+MAX_ROWS = 4096
+
+
+class DecisionTable:
+    """
+    Fired rules as a step function of the budget
+
+    Rules only compare the budget against a finite set of thresholds, so the
+    budget axis splits into open intervals between thresholds and the
+    thresholds themselves, within which the fired rules never change. For
+    every (category, usage type) row the fired rules are materialized once per
+    interval; a lookup is a dictionary access plus a binary search.
+
+    Rows are precomputed for every category and every usage type the rules
+    mention; other combinations are computed on first use.
+    """
+
+    def __init__(self, network: RuleNetwork, categories: Iterable[Tuple[int, str]] = ()):
+        self.network = network
+        self.boundaries = network.thresholds('budget')
+        self.rows = {}  # (category_id, category fact, usage fact) -> fired rules per interval
+        self._lock = threading.Lock()
+
+        # Requests supplying any other tested fact cannot be answered here
+        self.other_keys = set(network.alpha_index) - set(AXES)
+
+        if self.boundaries is None:
+            return
+        for category_id, name in categories:
+            for usage_type in self._usage_types():
+                self._row(category_id, name.lower(), usage_type)
+
+    @classmethod
+    def load(cls, network: RuleNetwork) -> 'DecisionTable':
+        """Build the table for every category in the database"""
+        categories = [(category.id, category.name) for category in Category.query.order_by(Category.id)]
+        return cls(network, categories)
+
+    def lookup(self, facts: Dict[str, Any]) -> Optional[List[CompiledRule]]:
+        """
+        Fired rules for a questionnaire, or None if it must go through the engine
+
+        Returns:
+            Fired rules sorted by priority (highest first), as InferenceEngine.infer
+        """
+        if self.boundaries is None:
+            return None
+        if any(facts.get(key) is not None for key in self.other_keys):
+            return None
+
+        category_id = facts.get('category_id')
+        if category_id is not None and type(category_id) is not int:
+            return None
+
+        budget = normalize_fact(facts.get('budget'))
+        if budget is None or budget.number is None or math.isnan(budget.number):
+            return None
+
+        row = self._row(category_id, facts.get('category'), facts.get('usage_type'))
+        if row is None:
+            return None
+        return list(row[self._interval(budget.number)])
+
+    def _interval(self, budget: float) -> int:
+        """Index of the interval a budget falls in: even for open intervals, odd for thresholds"""
+        position = bisect_left(self.boundaries, budget)
+        if position < len(self.boundaries) and self.boundaries[position] == budget:
+            return 2 * position + 1
+        return 2 * position
+
+    def _probes(self) -> List[float]:
+        """One representative budget per interval"""
+        boundaries = self.boundaries
+        if not boundaries:
+            return [0.0]
+
+        probes = [boundaries[0] - 1]
+        for position, threshold in enumerate(boundaries):
+            probes.append(threshold)
+            if position + 1 < len(boundaries):
+                probes.append((threshold + boundaries[position + 1]) / 2)
+        probes.append(boundaries[-1] + 1)
+        return probes
+
+    def _usage_types(self) -> List[str]:
+        """Usage types the rules test for equality or membership"""
+        values = set()
+        for node in self.network.alpha_index.get('usage_type', ()):
+            predicate = node.predicate
+            if predicate.operator == 'equals':
+                values.add(predicate.operand)
+            elif predicate.operator == 'in':
+                values.update(predicate.operand)
+        return sorted(values)
+
+    def _row(self, category_id, category, usage_type):
+        """Fired rules per budget interval for one row, computing it if needed"""
+        key = (category_id, normalize_fact(category), normalize_fact(usage_type))
+        row = self.rows.get(key)
+        if row is not None:
+            return row
+
+        with self._lock:
+            row = self.rows.get(key)
+            if row is None:
+                if len(self.rows) >= MAX_ROWS:
+                    return None
+                facts = {'category': category, 'category_id': category_id, 'usage_type': usage_type}
+                row = tuple(
+                    tuple(sorted(self.network.run(dict(facts, budget=probe), category_id=category_id),
+                                 key=lambda r: r.priority, reverse=True))
+                    for probe in self._probes()
+                )
+                self.rows[key] = row
+        return row
+
+
+_decision_table = versioned_snapshot(RULES, lambda: DecisionTable.load(get_rule_network()))
+
+
+def get_decision_table() -> DecisionTable:
+    """Return the process-wide decision table, rebuilt when rules change"""
+    return _decision_table()
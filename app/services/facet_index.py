@@ -0,0 +1,208 @@
+"""
+Facet Index
+Bitset per facet value over active products for filter combinations and live counts
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set
+import numpy as np
+from app import db
+from app.models.product import Product, Brand, Category, SpecProfile
+from app.utils.versioning import CATALOG, versioned_snapshot
+
+# Price bands as (lower bound inclusive, upper bound exclusive, value)
+PRICE_BANDS = (
+    (None, 300, 'under-300'),
+    (300, 600, '300-600'),
+    (600, 1000, '600-1000'),
+    (1000, 1500, '1000-1500'),
+    (1500, None, '1500-plus'),
+)
+
+PRICE_BAND_ORDER = {value: position for position, (_, _, value) in enumerate(PRICE_BANDS)}
+
+FACETS = ('category', 'brand', 'price', 'ram', 'storage', '5g')
+
+
+def price_band(price: float) -> str:
+    """Price band value of a price"""
+    for low, high, value in PRICE_BANDS:
+        if (low is None or price >= low) and (high is None or price < high):
+            return value
+
+
+def format_size(size_gb: float) -> str:
+    """Facet value of a RAM or storage size: GB without a trailing .0"""
+    return f'{size_gb:g}'
+
+
+class FacetRow(NamedTuple):
+    """Facet attributes of one active product"""
+    id: int
+    category_id: int
+    brand_id: int
+    price: float
+    ram_gb: Optional[float]
+    storage_gb: Optional[float]
+    has_5g: bool
+
+
+def facet_values(row: FacetRow) -> Dict[str, Any]:
+    """The value of every facet a product has; unknown sizes have none"""
+    values = {
+        'category': row.category_id,
+        'brand': row.brand_id,
+        'price': price_band(row.price),
+        '5g': 'yes' if row.has_5g else 'no'
+    }
+    if row.ram_gb is not None:
+        values['ram'] = format_size(row.ram_gb)
+    if row.storage_gb is not None:
+        values['storage'] = format_size(row.storage_gb)
+    return values
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def to_bitset(positions: Iterable[int], size: int) -> int:
+    """Python int with the bits at the given positions set"""
+    bits = np.zeros(size, dtype=bool)
+    bits[list(positions)] = True
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+class FacetIndex:
+    """
+    Active products as bit positions, with one bitset per facet value
+
+    Bit i stands for the i-th active product in id order. Values of one
+    facet are OR-ed, facets are AND-ed, and counts are popcounts, so a
+    filter and its counts never touch the database. Category and brand
+    values are ids; the names clients send are resolved through
+    case-insensitive lookup tables.
+    """
+
+    def __init__(self, rows: List[FacetRow], categories: Mapping[int, str] = None,
+                 brands: Mapping[int, str] = None):
+        self.ids = np.array([row.id for row in rows], dtype=np.int64)
+        self.all = (1 << len(rows)) - 1
+        self.names = {'category': dict(categories or {}), 'brand': dict(brands or {})}
+        self._name_ids = {facet: {name.casefold(): id for id, name in names.items()}
+                          for facet, names in self.names.items()}
+
+        positions = defaultdict(lambda: defaultdict(list))
+        for position, row in enumerate(rows):
+            for facet, value in facet_values(row).items():
+                positions[facet][value].append(position)
+        self.bitsets: Dict[str, Dict[Any, int]] = {
+            facet: {value: to_bitset(value_positions, len(rows)) for value, value_positions in values.items()}
+            for facet, values in positions.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls) -> 'FacetIndex':
+        """Build from active products and their parsed spec profiles in one query"""
+        rows = (db.session.query(Product.id, Product.category_id, Product.brand_id, Product.price,
+                                 SpecProfile.ram_gb, SpecProfile.storage_gb, SpecProfile.has_5g)
+                .outerjoin(SpecProfile, SpecProfile.product_id == Product.id)
+                .filter(Product.is_active == True)
+                .order_by(Product.id).all())
+        return cls(
+            [FacetRow(id, category_id, brand_id, float(price), ram_gb, storage_gb, bool(has_5g))
+             for id, category_id, brand_id, price, ram_gb, storage_gb, has_5g in rows],
+            dict(db.session.query(Category.id, Category.name).all()),
+            dict(db.session.query(Brand.id, Brand.name).all())
+        )
+
+    def name_id(self, facet: str, name: str) -> Optional[int]:
+        """Id of a category or brand by case-insensitive name"""
+        return self._name_ids[facet].get(name.casefold())
+
+    def parse_filters(self, args: Mapping[str, Iterable[str]]) -> Dict[str, Set[Any]]:
+        """
+        Filters from request values, e.g. {'brand': ['Samsung', 'Dell'], 'ram': ['8']}
+
+        Category and brand names are resolved to ids; names that match
+        nothing select nothing.
+        """
+        filters = {}
+        for facet in FACETS:
+            values = [value for value in args.get(facet, ()) if value]
+            if not values:
+                continue
+            if facet in self.names:
+                filters[facet] = {self.name_id(facet, value) for value in values} - {None}
+            elif facet in ('ram', 'storage'):
+                filters[facet] = {format_size(float(value)) for value in values if _is_number(value)}
+            else:
+                filters[facet] = {value.lower() for value in values}
+        return filters
+
+    def bitset(self, facet: str, values: Iterable[Any]) -> int:
+        """Products having any of the values"""
+        bitsets = self.bitsets.get(facet, {})
+        result = 0
+        for value in values:
+            result |= bitsets.get(value, 0)
+        return result
+
+    def select(self, filters: Mapping[str, Iterable[Any]], exclude: str = None) -> int:
+        """Products passing every facet's filter, optionally ignoring one facet"""
+        result = self.all
+        for facet, values in filters.items():
+            if facet != exclude:
+                result &= self.bitset(facet, values)
+        return result
+
+    def counts(self, filters: Mapping[str, Iterable[Any]]) -> Dict[str, Dict[Any, int]]:
+        """
+        Matches per value of every facet
+
+        Each facet is counted under the other facets' filters, so the counts
+        say how many products choosing that value would give.
+        """
+        counts = {}
+        for facet in FACETS:
+            base = self.select(filters, exclude=facet)
+            counts[facet] = {value: (bitset & base).bit_count()
+                             for value, bitset in self.bitsets.get(facet, {}).items()}
+        return counts
+
+    def ids_of(self, bitset: int) -> np.ndarray:
+        """Product ids of the set bits, in id order"""
+        if not bitset:
+            return self.ids[:0]
+        raw = np.frombuffer(bitset.to_bytes((len(self.ids) + 7) // 8, 'little'), dtype=np.uint8)
+        return self.ids[np.flatnonzero(np.unpackbits(raw, bitorder='little')[:len(self.ids)])]
+
+    def sort_key(self, facet: str, value: Any):
+        """Order of facet values: names alphabetically, bands and sizes ascending, yes before no"""
+        if facet in self.names:
+            return self.label(facet, value).lower()
+        if facet == 'price':
+            return PRICE_BAND_ORDER[value]
+        if facet in ('ram', 'storage'):
+            return float(value)
+        return value != 'yes'
+
+    def label(self, facet: str, value: Any) -> str:
+        """Display name of a facet value"""
+        if facet in self.names:
+            return self.names[facet].get(value, str(value))
+        return value
+
+
+_facet_index = versioned_snapshot(CATALOG, FacetIndex.load)
+
+
+def get_facet_index() -> FacetIndex:
+    """Return the process-wide facet index, rebuilt when the catalog changes"""
+    return _facet_index()
@@ -1,13 +1,17 @@
-from app.models.rule import Rule, RuleCondition
-from app.models.product import Product, Category, Brand
+from app.services.rule_network import RuleNetwork, evaluate_condition, get_rule_network
+from app.services.vectorized_matcher import VectorizedRuleMatcher
+
+# Number of inputs matched per vectorized chunk in infer_many
+BATCH_CHUNK_SIZE = 1024
 
 
 class InferenceEngine:
     """Forward chaining inference engine for expert system"""
     
-    def __init__(self):
+    def __init__(self, network=None):
         self.working_memory = {}
         self.matched_rules = []
+        self.network = network
     
     def add_fact(self, key, value):
         """Add user input to working memory"""
@@ -15,58 +19,11 @@ class InferenceEngine:
     
     def evaluate_condition(self, condition, facts):
         """Evaluate a single rule condition against facts"""
-        key = condition.condition_key
-        operator = condition.operator
-        expected = condition.condition_value
-        actual = facts.get(key)
-        
-        if actual is None:
-            return False
-        
-        try:
-            # Map operator names to symbols for comparison
-            if operator == 'equals' or operator == '==':
-                return str(actual).lower() == str(expected).lower()
-            elif operator == 'not_equals' or operator == '!=':
-                return str(actual).lower() != str(expected).lower()
-            elif operator == 'less_than' or operator == '<':
-                return float(actual) < float(expected)
-            elif operator == 'greater_than' or operator == '>':
-                return float(actual) > float(expected)
-            elif operator == 'less_equal' or operator == '<=':
-                return float(actual) <= float(expected)
-            elif operator == 'greater_equal' or operator == '>=':
-                return float(actual) >= float(expected)
-            elif operator == 'in':
-                return str(actual).lower() in [v.strip().lower() for v in expected.split(',')]
-            elif operator == 'contains':
-                return expected.lower() in str(actual).lower()
-        except (ValueError, TypeError):
-            return False
-        
-        return False
+        return evaluate_condition(condition, facts)
     
     def match_rules(self, rules, facts):
         """Match all rules against current facts"""
-        matched = []
-        
-        for rule in rules:
-            if not rule.is_active:
-                continue
-            
-            # Convert to list to get count and iterate
-            conditions_list = list(rule.conditions)
-            all_conditions_met = True
-            for condition in conditions_list:
-                if not self.evaluate_condition(condition, facts):
-                    all_conditions_met = False
-                    break
-            
-            if all_conditions_met:
-                matched.append(rule)
-        
-        # Sort by priority (highest first)
-        return sorted(matched, key=lambda r: r.priority, reverse=True)
+        return RuleNetwork.from_rules(rules).match(facts)
     
     def infer(self, user_inputs):
         """Run inference engine with user inputs"""
@@ -78,19 +35,40 @@ class InferenceEngine:
         for key, value in user_inputs.items():
             self.add_fact(key, value)
         
-        # Get all active rules, filtered by category if specified
-        query = Rule.query.filter_by(is_active=True)
+        # Use the shared rule-set snapshot unless a network was supplied;
+        # matching itself never touches the database
+        network = self.network if self.network is not None else get_rule_network()
         
-        # If user specified a category, only get rules for that category
-        if 'category_id' in user_inputs and user_inputs['category_id']:
-            query = query.filter(
-                (Rule.category_id == user_inputs['category_id']) | 
-                (Rule.category_id == None)  # Include generic rules with no category
-            )
+        # Forward-chain: fired rules may assert derived facts into working
+        # memory, which can in turn fire further rules. If user specified a
+        # category, only rules for that category (and generic rules) take part
+        fired = network.run(
+            self.working_memory,
+            category_id=user_inputs.get('category_id')
+        )
         
-        rules = query.all()
-        
-        # Match rules against facts
-        self.matched_rules = self.match_rules(rules, self.working_memory)
+        # Sort by priority (highest first)
+        self.matched_rules = sorted(fired, key=lambda r: r.priority, reverse=True)
         
         return self.matched_rules
+    
+    def infer_many(self, user_inputs_iter, chunk_size=BATCH_CHUNK_SIZE):
+        """
+        Run inference for many user inputs against one rule-set snapshot
+        
+        Inputs are matched in chunks by the vectorized NumPy backend, which
+        gives the same fired rules as infer().
+        
+        Yields the matched rules for each input, in input order
+        """
+        network = self.network if self.network is not None else get_rule_network()
+        matcher = VectorizedRuleMatcher(network)
+        
+        chunk = []
+        for user_inputs in user_inputs_iter:
+            chunk.append(user_inputs)
+            if len(chunk) == chunk_size:
+                yield from matcher.match_many(chunk)
+                chunk = []
+        if chunk:
+            yield from matcher.match_many(chunk)
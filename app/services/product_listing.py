@@ -0,0 +1,104 @@
+"""
+Product Listing
+Filtered product listings read in keyset pages of bounded size
+"""
+import json
+from typing import Iterator, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from app.models.product import Product, Brand, Category, SpecProfile
+from app import db
+
+# Page sizes of /api/products
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Products loaded per query while streaming a listing
+STREAM_BATCH_SIZE = 200
+
+
+def listing_query(category: str = None, brand: str = None,
+                  min_ram: float = None, min_storage: float = None):
+    """
+    Active products matching the listing filters
+    
+    Names match case-insensitively, like the catalog snapshot's listings.
+    Unknown category or brand names are ignored rather than matching nothing.
+    
+    Args:
+        category: Category name
+        brand: Brand name
+        min_ram: Minimum RAM in GB
+        min_storage: Minimum storage in GB
+    """
+    query = Product.query.filter_by(is_active=True)
+    
+    if category:
+        cat = Category.query.filter(func.lower(Category.name) == category.lower()).first()
+        if cat:
+            query = query.filter_by(category_id=cat.id)
+    
+    if brand:
+        br = Brand.query.filter(func.lower(Brand.name) == brand.lower()).first()
+        if br:
+            query = query.filter_by(brand_id=br.id)
+    
+    # Filter on specifications parsed at write time (sizes in GB)
+    if min_ram is not None or min_storage is not None:
+        query = query.join(SpecProfile, SpecProfile.product_id == Product.id)
+        if min_ram is not None:
+            query = query.filter(SpecProfile.ram_gb >= min_ram)
+        if min_storage is not None:
+            query = query.filter(SpecProfile.storage_gb >= min_storage)
+    
+    return query
+
+
+def fetch_page(query, after: Optional[int], limit: int) -> List[Product]:
+    """
+    Up to limit products with ids after the cursor, in id order
+    
+    Brand and category are joined and specifications loaded with one more
+    query, so serializing the page never lazy-loads.
+    
+    Args:
+        query: Listing query from listing_query
+        after: Id of the last product already returned, or None to start
+        limit: Maximum number of products
+    """
+    if after is not None:
+        query = query.filter(Product.id > after)
+    return query.options(
+        joinedload(Product.brand),
+        joinedload(Product.category),
+        selectinload(Product.specifications)
+    ).order_by(Product.id).limit(limit).all()
+
+
+def iter_products(query, after: Optional[int] = None, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Product]:
+    """
+    Every product of a listing, loaded one keyset page at a time
+    
+    Each page is detached from the session once consumed, so memory stays
+    bounded by the batch size rather than the size of the catalog.
+    """
+    while True:
+        page = fetch_page(query, after, batch_size)
+        for product in page:
+            yield product
+        for product in page:
+            db.session.expunge(product)
+        if len(page) < batch_size:
+            return
+        after = page[-1].id
+
+
+def serialize_product(product: Product) -> str:
+    """Compact JSON of a product, as jsonify writes it outside debug mode"""
+    return json.dumps(product.to_dict(), sort_keys=True, separators=(',', ':'))
+
+
+def iter_ndjson(query, after: Optional[int] = None) -> Iterator[str]:
+    """Newline-delimited JSON lines of a listing, serialized as they are loaded"""
+    for product in iter_products(query, after):
+        yield serialize_product(product) + '\n'
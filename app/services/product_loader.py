@@ -0,0 +1,37 @@
+"""
+Product Loader
+Loads compared and detailed products with everything their pages read in one query
+"""
+from typing import Iterable, List
+from sqlalchemy.orm import joinedload
+from app.models.product import Product
+
+
+def load_product_bundle(ids: Iterable[int], active_only: bool = False) -> List[Product]:
+    """
+    Products for the given ids, in request order
+    
+    Brand, category, spec profile and all specifications are joined into a
+    single SELECT, so rendering or comparing the products never lazy-loads.
+    Repeated ids are returned once; unknown (or, with active_only, inactive)
+    ids are skipped.
+    
+    Args:
+        ids: Product ids in the order the caller wants them back
+        active_only: Only return products that are active
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return []
+    
+    query = Product.query.options(
+        joinedload(Product.brand),
+        joinedload(Product.category),
+        joinedload(Product.spec_profile),
+        joinedload(Product.specifications)
+    ).filter(Product.id.in_(ids))
+    if active_only:
+        query = query.filter(Product.is_active == True)
+    
+    found = {product.id: product for product in query.all()}
+    return [found[product_id] for product_id in ids if product_id in found]
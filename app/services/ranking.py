@@ -0,0 +1,96 @@
+"""
+Candidate Ranking
+Vectorized scoring and top-k selection of recommendation candidates
+"""
+from typing import Dict, Any, NamedTuple
+import numpy as np
+from app.services.comparison_service import ComparisonService, SCORE_FEATURES
+
+
+class CandidateSet(NamedTuple):
+    """Column arrays for every candidate product of one query"""
+    ids: np.ndarray  # int64
+    prices: np.ndarray  # float64
+    brands: np.ndarray  # lower-cased brand names
+    features: np.ndarray  # float64, one column per SCORE_FEATURES entry
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, positions) -> 'CandidateSet':
+        """Candidates at the given positions, an index array or boolean mask"""
+        return CandidateSet(self.ids[positions], self.prices[positions], self.brands[positions],
+                            self.features[positions])
+
+
+def empty_candidates() -> CandidateSet:
+    """Candidate set with no products"""
+    return CandidateSet(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64),
+                        np.empty(0, dtype=object), np.empty((0, len(SCORE_FEATURES)), dtype=np.float64))
+
+
+def score_candidates(candidates: CandidateSet, user_preferences: Dict[str, Any],
+                     service: ComparisonService) -> np.ndarray:
+    """
+    ComparisonService.calculate_overall_score for every candidate at once
+
+    The terms are added in the same order as the scalar implementation, so
+    scores are identical, not just close.
+    """
+    prices = candidates.prices
+    scores = np.full(len(prices), 50.0)  # Base score
+
+    # Budget alignment (weight: 25%)
+    budget = user_preferences.get('budget')
+    if budget:
+        try:
+            budget_float = float(budget)
+        except (ValueError, TypeError):
+            budget_float = None
+        if budget_float is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                within = 25 * (1 - np.abs(prices / budget_float - 0.8))  # Optimal at 80% of budget
+            scores += np.where(prices <= budget_float, within, -15.0)
+
+    # Specification quality (weight: 40%)
+    weights = np.asarray(service.preference_weights(user_preferences), dtype=np.float64)
+    scores += candidates.features[:, 0] * weights[0]
+
+    # Brand preference (weight: 10%)
+    preferred_brand = user_preferences.get('preferred_brand')
+    if preferred_brand:
+        scores += np.where(candidates.brands == preferred_brand.lower(), 10.0, 0.0)
+
+    # Usage type alignment (weight: 15%)
+    scores += candidates.features[:, 1:] @ weights[1:]
+
+    # Normalize to 0-100 range
+    return np.clip(scores, 0, 100)
+
+
+def top_k(candidates: CandidateSet, scores: np.ndarray, k: int, mask: np.ndarray = None) -> np.ndarray:
+    """
+    Positions of the k best candidates, best first
+
+    Uses a partial sort to find the k-th best score, so only the candidates
+    at or above it are fully sorted. Ties are broken by price, then id.
+
+    Args:
+        candidates: Candidate columns
+        scores: Score per candidate
+        k: Number of candidates to return
+        mask: Optional boolean array of eligible candidates
+    """
+    positions = np.flatnonzero(mask) if mask is not None else np.arange(len(scores))
+    if k <= 0 or len(positions) == 0:
+        return positions[:0]
+
+    eligible = scores[positions]
+    if len(positions) > k:
+        kth = eligible[np.argpartition(eligible, len(eligible) - k)[len(eligible) - k]]
+        keep = eligible >= kth
+        positions = positions[keep]
+        eligible = eligible[keep]
+
+    order = np.lexsort((candidates.ids[positions], candidates.prices[positions], -eligible))
+    return positions[order[:k]]
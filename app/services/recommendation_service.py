@@ -2,23 +2,67 @@
 Recommendation Service
 High-level service for generating product recommendations using the inference engine
 """
+import itertools
+import math
+from bisect import bisect_left, bisect_right
+import numpy as np
+from app.services.comparison_service import ComparisonService, SCORE_FEATURES
+from app.services.decision_table import get_decision_table
+from app.services.facet_index import FacetIndex, get_facet_index
 from app.services.inference_engine import InferenceEngine
-from app.models.product import Product, Category
+from app.services.ranking import CandidateSet, empty_candidates, score_candidates, top_k
+from app.services.rule_network import get_rule_network, normalize_fact
+from app.models.product import Product, Category, Brand, SpecProfile
+from app.utils.cache import LRUCache
+from app.utils.spec_parser import SPEC_KEY_MATCHER
+from app.utils.versioning import RULES, CATALOG, current_version
 from app import db
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Iterator, NamedTuple
 from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, selectinload
+
+# Shared cache of recommendation stages (fired rules and candidates) keyed by normalized questionnaire
+RECOMMENDATION_CACHE_SIZE = 2048
+RECOMMENDATION_CACHE_TTL = 600  # seconds
+
+recommendation_cache = LRUCache(maxsize=RECOMMENDATION_CACHE_SIZE, ttl=RECOMMENDATION_CACHE_TTL)
+
+# Candidate columns of the whole catalog, keyed by catalog version; only the
+# current version is read, the previous one stays for in-flight requests
+CANDIDATE_CACHE_SIZE = 2
+
+candidate_cache = LRUCache(maxsize=CANDIDATE_CACHE_SIZE)
+
+# Products whose score features are computed from specifications per query
+FEATURE_CHUNK_SIZE = 500
+
+# Spec keys worth quoting as key features in the recommendation reasoning
+KEY_FEATURE_KEYWORDS = frozenset(['processor', 'ram', 'storage', 'display', 'camera', 'battery'])
+
+
+class RecommendationStage(NamedTuple):
+    """What a questionnaire's fired rules select, before the exact budget is applied"""
+    matched_rules: tuple
+    candidates: CandidateSet
 
 
 class RecommendationService:
     """Service for generating product recommendations"""
     
-    def __init__(self):
+    def __init__(self, cache: LRUCache = None):
         self.engine = InferenceEngine()
+        self.cache = cache
+        self.scorer = ComparisonService()
     
     def get_recommendations(self, user_input: Dict[str, Any], limit: int = 10) -> Dict[str, Any]:
         """
         Main entry point for getting recommendations
         
+        When the service was created with a cache, questionnaires that fire
+        the same rules share one cached stage: the fired rules and the
+        candidates they select. The exact budget is applied after the lookup,
+        when the stage's candidates are ranked.
+        
         Args:
             user_input: Dictionary of user preferences (budget, usage_type, etc.)
             limit: Maximum number of products to return
@@ -26,22 +70,150 @@ class RecommendationService:
         Returns:
             Dictionary with recommendations and metadata
         """
-        # Run inference engine
-        matched_rules = self.engine.infer(user_input)
+        if self.cache is None:
+            return self._recommend(user_input, limit)
+        
+        key = self._cache_key(user_input)
+        stage = self.cache.get(key)
+        if stage is None:
+            stage = self._match(user_input)
+            self.cache.set(key, stage)
+        
+        return self._finish(stage, user_input, limit)
+    
+    def _recommend(self, user_input: Dict[str, Any], limit: int) -> Dict[str, Any]:
+        """Run inference and fetch products for one questionnaire"""
+        return self._finish(self._match(user_input), user_input, limit)
+    
+    def _match(self, user_input: Dict[str, Any]) -> RecommendationStage:
+        """Fire the rules for a questionnaire and select their candidates"""
+        # Look the fired rules up in the decision table, running the
+        # inference engine only for questionnaires the table cannot answer
+        matched_rules = None
+        if self.engine.network is None:
+            matched_rules = get_decision_table().lookup(user_input)
+        if matched_rules is None:
+            matched_rules = self.engine.infer(user_input)
         
         if not matched_rules:
-            return {
-                'products': [],
-                'message': 'No matching products found. Try adjusting your criteria.',
-                'total_matches': 0,
-                'fired_rules': 0
-            }
+            return RecommendationStage((), empty_candidates())
+        
+        return RecommendationStage(tuple(matched_rules), self._select_candidates(matched_rules, user_input))
+    
+    def _finish(self, stage: RecommendationStage, user_input: Dict[str, Any], limit: int) -> Dict[str, Any]:
+        """Rank a stage's candidates under the exact budget and build the result"""
+        if not stage.matched_rules:
+            return self._no_matches()
+        
+        products = self._load_products(self._rank(stage.candidates, user_input, limit))
+        
+        return self._build_result(products, list(stage.matched_rules))
+    
+    def get_recommendations_batch(self, user_inputs: Iterable[Dict[str, Any]],
+                                  limit: int = 10) -> Iterator[Dict[str, Any]]:
+        """
+        Generate recommendations for many questionnaires at once
+        
+        The data versions, rule-set snapshot, catalog candidates and facet
+        index are resolved once for the whole batch. Inputs are grouped by
+        category, brand and budget band (the interval between the rules'
+        budget thresholds): each group's candidates are selected once and
+        narrowed to the prices its band can afford, and each recommended
+        product is loaded and serialized once per batch.
+        
+        Args:
+            user_inputs: Iterable of user preference dictionaries
+            limit: Maximum number of products per result
+        
+        Yields:
+            One result dictionary per input, in input order, shaped like
+            get_recommendations()
+        """
+        network = get_rule_network()
+        engine = InferenceEngine(network)
+        candidates = self._catalog_candidates()
+        facets = get_facet_index()
+        thresholds = network.thresholds('budget')
+        inputs, engine_inputs = itertools.tee(user_inputs)
+        
+        groups = {}
+        loaded = {}
+        summaries = {}
+        
+        for user_input, matched_rules in zip(inputs, engine.infer_many(engine_inputs)):
+            if not matched_rules:
+                yield self._no_matches()
+                continue
+            
+            category_ids = frozenset(self._get_category_ids(matched_rules, user_input))
+            brand_name = user_input.get('preferred_brand')
+            brand_id = facets.name_id('brand', brand_name) if brand_name else None
+            budget = self._get_budget(user_input)
+            band = bisect_right(thresholds, budget) if budget is not None and thresholds else None
+            
+            key = (category_ids, brand_id, band)
+            group = groups.get(key)
+            if group is None:
+                group = self._filter_candidates(candidates, category_ids, brand_id, facets)
+                if band is not None and band < len(thresholds):
+                    # Every budget in the band is below its upper threshold
+                    group = group.take(group.prices <= thresholds[band])
+                groups[key] = group
+            
+            products = self._load_products(self._rank(group, user_input, limit), loaded)
+            
+            yield self._build_result(products, matched_rules, summaries)
+    
+    def _cache_key(self, user_input: Dict[str, Any]) -> tuple:
+        """
+        Normalize a questionnaire into a cache key
         
-        # Get products based on recommendations
-        products = self._fetch_products(matched_rules, user_input, limit)
+        Facts are keyed by the normalized form the rules compare against, so
+        e.g. '500' and 500 share a key. The budget is keyed by the interval
+        between the rules' budget thresholds it falls in, since within one
+        interval the same rules fire. Data versions are part of the key:
+        admin writes to rules or products make older entries unreachable.
+        """
+        facts = []
+        for key, value in user_input.items():
+            if key == 'budget':
+                facts.append((key, self._budget_bucket(value)))
+            else:
+                facts.append((key, normalize_fact(value)))
+        
+        return (current_version(RULES), current_version(CATALOG),
+                tuple(sorted(facts, key=lambda fact: fact[0])))
+    
+    def _budget_bucket(self, budget):
+        """Map a budget onto the interval between rule budget thresholds it falls in"""
+        fact = normalize_fact(budget)
+        if fact is None or fact.number is None or math.isnan(fact.number):
+            return fact
         
+        # A rule testing the budget as text depends on its exact value
+        thresholds = get_rule_network().thresholds('budget')
+        if thresholds is None:
+            return fact
+        
+        # Thresholds themselves get their own bucket: '<=' and '<' differ there
+        position = bisect_left(thresholds, fact.number)
+        on_threshold = position < len(thresholds) and thresholds[position] == fact.number
+        return ('bucket', position, on_threshold)
+    
+    def _no_matches(self) -> Dict[str, Any]:
+        """Result returned when no rule fired"""
+        return {
+            'products': [],
+            'message': 'No matching products found. Try adjusting your criteria.',
+            'total_matches': 0,
+            'fired_rules': 0
+        }
+    
+    def _build_result(self, products: List[Product], matched_rules: List,
+                      summaries: Dict = None) -> Dict[str, Any]:
+        """Wrap fetched products and fired rules into a recommendation result"""
         # Add reasoning to products
-        products_with_reasoning = self._add_reasoning(products, matched_rules)
+        products_with_reasoning = self._add_reasoning(products, matched_rules, summaries)
         
         return {
             'products': products_with_reasoning,
@@ -50,20 +222,134 @@ class RecommendationService:
             'message': f'Found {len(products)} products matching your preferences'
         }
     
-    def _fetch_products(self, matched_rules: List, user_input: Dict, limit: int) -> List[Product]:
-        """Fetch products based on matched rules and user input"""
-        # Start with base query
-        query = Product.query.filter_by(is_active=True)
+    def _select_candidates(self, matched_rules: List, user_input: Dict) -> CandidateSet:
+        """Candidates in the fired rules' categories and the preferred brand"""
+        brand_id = None
+        if 'preferred_brand' in user_input and user_input['preferred_brand']:
+            brand_id = self._get_brand_id(user_input['preferred_brand'])
+        
+        return self._get_candidates(self._get_category_ids(matched_rules, user_input), brand_id)
+    
+    def _rank(self, candidates: CandidateSet, user_input: Dict, limit: int) -> List[int]:
+        """
+        Score every candidate within budget and return the ids of the top `limit`
+        
+        Scores are ComparisonService.calculate_overall_score computed over the
+        candidate columns at once; ties go to the cheaper product.
+        """
+        if len(candidates) == 0:
+            return []
         
         # Apply budget filter if provided
-        if 'budget' in user_input:
-            try:
-                budget = float(user_input['budget'])
-                query = query.filter(Product.price <= budget)
-            except (ValueError, TypeError):
-                pass
+        mask = None
+        budget = self._get_budget(user_input)
+        if budget is not None:
+            mask = candidates.prices <= budget
+        
+        preferences = {
+            'budget': user_input.get('budget'),
+            'usage_type': user_input.get('usage_type') or '',
+            'preferred_brand': user_input.get('preferred_brand')
+        }
+        scores = score_candidates(candidates, preferences, self.scorer)
+        
+        return candidates.ids[top_k(candidates, scores, limit, mask)].tolist()
+    
+    def _get_candidates(self, category_ids, brand_id) -> CandidateSet:
+        """
+        Candidate columns for a category/brand filter
+        
+        The columns of every active product are loaded once per catalog
+        version; a filter selects its rows with the facet bitsets instead of
+        running its own query.
+        """
+        return self._filter_candidates(self._catalog_candidates(), category_ids, brand_id)
+    
+    def _catalog_candidates(self) -> CandidateSet:
+        """Candidate columns of every active product at the current catalog version"""
+        version = current_version(CATALOG)
+        candidates = candidate_cache.get(version)
+        if candidates is None:
+            candidates = self._load_candidates()
+            candidate_cache.set(version, candidates)
+        return candidates
+    
+    def _filter_candidates(self, candidates: CandidateSet, category_ids, brand_id,
+                           facets: FacetIndex = None) -> CandidateSet:
+        """Rows of the candidates in the categories and brand (default facet index: the shared one)"""
+        filters = {}
+        if category_ids:
+            filters['category'] = category_ids
+        if brand_id:
+            filters['brand'] = [brand_id]
+        if not filters or len(candidates) == 0:
+            return candidates
+        
+        facets = facets or get_facet_index()
+        ids = facets.ids_of(facets.select(filters))
+        # Both are in id order; ids missing from either side (a concurrent catalog write) are dropped
+        positions = np.searchsorted(candidates.ids, ids)
+        positions = positions[positions < len(candidates)]
+        return candidates.take(positions[np.isin(candidates.ids[positions], ids)])
+    
+    def _load_candidates(self) -> CandidateSet:
+        """Load id, price, brand and score features of every active product in one query"""
+        rows = (db.session.query(Product.id, Product.price, Brand.name,
+                                 *(getattr(SpecProfile, name) for name in SCORE_FEATURES))
+                .join(Brand, Product.brand_id == Brand.id)
+                .outerjoin(SpecProfile, SpecProfile.product_id == Product.id)
+                .filter(Product.is_active == True)
+                .order_by(Product.id).all())
+        if not rows:
+            return empty_candidates()
+        
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        prices = np.array([float(row[1]) for row in rows], dtype=np.float64)
+        brands = np.array([row[2].lower() for row in rows], dtype=object)
+        features = np.array(
+            [[np.nan if value is None else value for value in row[3:]] for row in rows],
+            dtype=np.float64
+        ).reshape(len(rows), len(SCORE_FEATURES))
+        
+        # Products saved before score features existed are scored from their specifications
+        missing = np.flatnonzero(np.isnan(features[:, 0]))
+        for start in range(0, len(missing), FEATURE_CHUNK_SIZE):
+            chunk = missing[start:start + FEATURE_CHUNK_SIZE]
+            products = (Product.query
+                        .options(joinedload(Product.category), selectinload(Product.specifications))
+                        .filter(Product.id.in_(ids[chunk].tolist()))
+                        .all())
+            positions = {int(ids[position]): position for position in chunk}
+            for product in products:
+                values = self.scorer.score_features(product.category.name.lower(), product.specifications)
+                features[positions[product.id]] = [values[name] for name in SCORE_FEATURES]
         
-        # Apply category filter - STRICT enforcement of user's selected category
+        return CandidateSet(ids, prices, brands, features)
+    
+    def _load_products(self, ids: List[int], loaded: Dict = None) -> List[Product]:
+        """Load products by id in the given order, reusing already loaded ones"""
+        if loaded is None:
+            loaded = {}
+        
+        missing = [product_id for product_id in ids if product_id not in loaded]
+        if missing:
+            for product in self._candidate_query().filter(Product.id.in_(missing)).all():
+                loaded[product.id] = product
+        
+        return [loaded[product_id] for product_id in ids if product_id in loaded]
+    
+    def _candidate_query(self):
+        """Active products with everything the reasoning reads"""
+        # Brand and category are joined in; all specifications come back in
+        # one extra query, so reasoning never lazy-loads per product
+        return Product.query.filter_by(is_active=True).options(
+            joinedload(Product.brand),
+            joinedload(Product.category),
+            selectinload(Product.specifications)
+        )
+    
+    def _get_category_ids(self, matched_rules: List, user_input: Dict) -> set:
+        """Categories to recommend from - STRICT enforcement of user's selected category"""
         category_ids = set()
         
         # First priority: Use the explicit category_id from user input
@@ -76,26 +362,27 @@ class RecommendationService:
                 if rule.category_id:
                     category_ids.add(rule.category_id)
         
-        # Apply the category filter to the query
-        if category_ids:
-            query = query.filter(Product.category_id.in_(category_ids))
-        
-        # Apply brand filter if provided
-        if 'preferred_brand' in user_input and user_input['preferred_brand']:
-            brand_name = user_input['preferred_brand']
-            from app.models.product import Brand
-            brand = Brand.query.filter(db.func.lower(Brand.name) == brand_name.lower()).first()
-            if brand:
-                query = query.filter_by(brand_id=brand.id)
-        
-        # Order by price and limit
-        products = query.order_by(Product.price.asc()).limit(limit).all()
-        
-        return products
+        return category_ids
     
-    def _add_reasoning(self, products: List[Product], matched_rules: List) -> List[Dict]:
+    def _get_budget(self, user_input: Dict):
+        """Parse the budget from user input, or None if absent or invalid"""
+        if 'budget' in user_input:
+            try:
+                return float(user_input['budget'])
+            except (ValueError, TypeError):
+                pass
+        return None
+    
+    def _get_brand_id(self, brand_name: str):
+        """Look up a brand id by case-insensitive name"""
+        return get_facet_index().name_id('brand', brand_name)
+    
+    def _add_reasoning(self, products: List[Product], matched_rules: List,
+                       summaries: Dict = None) -> List[Dict]:
         """Add reasoning and confidence scores to product results"""
         results = []
+        if summaries is None:
+            summaries = {}
         
         for product in products:
             # Find matching rule for this product's category
@@ -108,6 +395,12 @@ class RecommendationService:
             # Calculate confidence based on priority
             confidence = min(100, 50 + (matching_rule.priority if matching_rule else 50))
             
+            # Product details only depend on the product, so build them once
+            summary = summaries.get(product.id)
+            if summary is None:
+                summary = self._summarize_product(product)
+                summaries[product.id] = summary
+            
             # Build detailed reasoning
             reasoning_points = []
             
@@ -121,7 +414,7 @@ class RecommendationService:
                 reasoning_points.append(f"Optimized for your {matching_rule.description.lower()}")
             
             # Highlight key features
-            key_features = self._extract_key_features(product)
+            key_features = summary['key_features']
             if key_features:
                 reasoning_points.append(f"Features: {key_features}")
             
@@ -131,15 +424,12 @@ class RecommendationService:
             product_dict = {
                 'id': product.id,
                 'name': product.name,
-                'brand': product.brand.name,
-                'category': product.category.name,
+                'brand': summary['brand'],
+                'category': summary['category'],
                 'price': float(product.price),
                 'description': product.description,
                 'image_url': product.image_url,
-                'specifications': [
-                    {'key': spec.spec_key, 'value': spec.spec_value}
-                    for spec in product.specifications
-                ],
+                'specifications': summary['specifications'],
                 'confidence': confidence,
                 'reasoning': full_reasoning,
                 'reasoning_points': reasoning_points,  # Detailed list for UI
@@ -153,6 +443,19 @@ class RecommendationService:
         
         return results
     
+    def _summarize_product(self, product: Product) -> Dict[str, Any]:
+        """Collect the preference-independent details shown for a product"""
+        specifications = list(product.specifications)
+        return {
+            'brand': product.brand.name,
+            'category': product.category.name,
+            'specifications': [
+                {'key': spec.spec_key, 'value': spec.spec_value}
+                for spec in specifications
+            ],
+            'key_features': self._extract_key_features(product, specifications)
+        }
+    
     def _get_budget_reasoning(self, price: float) -> str:
         """Generate reasoning text for budget match"""
         # This will be enhanced with actual user budget in the future
@@ -165,13 +468,15 @@ class RecommendationService:
         else:
             return "Premium pricing reflects high-end specifications"
     
-    def _extract_key_features(self, product: Product) -> str:
+    def _extract_key_features(self, product: Product, specifications: List = None) -> str:
         """Extract and format key product features"""
         features = []
+        if specifications is None:
+            specifications = product.specifications
         
         # Look for important specs
-        for spec in product.specifications[:3]:  # Top 3 specs
-            if any(keyword in spec.spec_key.lower() for keyword in ['processor', 'ram', 'storage', 'display', 'camera', 'battery']):
+        for spec in specifications[:3]:  # Top 3 specs
+            if not SPEC_KEY_MATCHER.match(spec.spec_key).isdisjoint(KEY_FEATURE_KEYWORDS):
                 features.append(f"{spec.spec_key}: {spec.spec_value}")
         
         return ", ".join(features) if features else ""
@@ -210,3 +515,4 @@ class RecommendationService:
             return 50
         
         return int((score / total_criteria) * 100)
+
@@ -0,0 +1,457 @@
+"""
+Rule Network
+Compiled in-memory rule network (Rete-style) used by the inference engine
+"""
+import heapq
+import math
+import operator
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Iterable, NamedTuple, Optional, Tuple
+from app.models.rule import Rule, RuleCondition, RuleAction
+from app.utils.versioning import RULES, versioned_snapshot
+
+
+class CompiledCondition(NamedTuple):
+    """Session-independent copy of a RuleCondition"""
+    condition_key: str
+    operator: str
+    condition_value: str
+
+
+class CompiledRule(NamedTuple):
+    """Session-independent copy of an active Rule and its conditions"""
+    id: int
+    name: str
+    description: Optional[str]
+    category_id: Optional[int]
+    priority: int
+    is_active: bool
+    conditions: Tuple[CompiledCondition, ...]
+    actions: Tuple[Tuple[str, str], ...] = ()  # (fact_key, fact_value) asserted on firing
+
+
+# Canonical operator names keyed by every accepted spelling
+OPERATOR_ALIASES = {
+    'equals': 'equals', '==': 'equals',
+    'not_equals': 'not_equals', '!=': 'not_equals',
+    'less_than': 'less_than', '<': 'less_than',
+    'greater_than': 'greater_than', '>': 'greater_than',
+    'less_equal': 'less_equal', '<=': 'less_equal',
+    'greater_equal': 'greater_equal', '>=': 'greater_equal',
+    'in': 'in',
+    'contains': 'contains'
+}
+
+NUMERIC_OPERATORS = {
+    'less_than': operator.lt,
+    'greater_than': operator.gt,
+    'less_equal': operator.le,
+    'greater_equal': operator.ge
+}
+
+
+# Upper bound on rule firings in one forward-chaining run
+MAX_FIRINGS = 1000
+
+
+class InvalidConditionError(ValueError):
+    """Raised when a rule condition cannot be compiled"""
+
+
+class FactValue(NamedTuple):
+    """A fact coerced once into the forms every operator compares against"""
+    text: str
+    number: Optional[float]
+
+
+def normalize_fact(value) -> Optional[FactValue]:
+    """Pre-compute the lower-cased text and numeric forms of a fact value"""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        number = None
+    return FactValue(str(value).lower(), number)
+
+
+class Predicate:
+    """Condition compiled into a typed operand and a pre-bound test callable"""
+    __slots__ = ('condition_key', 'operator', 'operand', 'test')
+
+    def __init__(self, condition_key: str, operator_name: str, operand, test):
+        self.condition_key = condition_key
+        self.operator = operator_name
+        self.operand = operand
+        self.test = test  # Callable[[FactValue], bool]
+
+    @property
+    def signature(self) -> Tuple:
+        """Identity used to share one alpha node between equivalent conditions"""
+        return (self.condition_key, self.operator, self.operand)
+
+
+def compile_condition(condition) -> Predicate:
+    """
+    Compile a condition into a Predicate
+
+    Operator aliases are normalized, numeric thresholds parsed to floats and
+    'in' lists stored as frozensets, so evaluation does no string coercion.
+
+    Raises:
+        InvalidConditionError: Unknown operator or non-numeric threshold
+    """
+    key = condition.condition_key
+    operator_name = OPERATOR_ALIASES.get(condition.operator)
+    expected = condition.condition_value
+
+    if operator_name is None:
+        raise InvalidConditionError(f"Unknown operator '{condition.operator}'")
+    if expected is None:
+        raise InvalidConditionError(f"Missing value for '{key}'")
+
+    if operator_name in NUMERIC_OPERATORS:
+        try:
+            threshold = float(expected)
+        except (ValueError, TypeError):
+            raise InvalidConditionError(f"'{expected}' is not a number")
+        if math.isnan(threshold):
+            raise InvalidConditionError(f"'{expected}' is not a number")
+        compare = NUMERIC_OPERATORS[operator_name]
+        return Predicate(key, operator_name, threshold,
+                         lambda fact: fact.number is not None and compare(fact.number, threshold))
+
+    if operator_name == 'in':
+        options = frozenset(v.strip().lower() for v in str(expected).split(','))
+        return Predicate(key, operator_name, options, lambda fact: fact.text in options)
+
+    text = str(expected).lower()
+    if operator_name == 'equals':
+        return Predicate(key, operator_name, text, lambda fact: fact.text == text)
+    if operator_name == 'not_equals':
+        return Predicate(key, operator_name, text, lambda fact: fact.text != text)
+    return Predicate(key, operator_name, text, lambda fact: text in fact.text)
+
+
+def evaluate_condition(condition, facts: Dict[str, Any]) -> bool:
+    """Evaluate a single rule condition against facts"""
+    fact = normalize_fact(facts.get(condition.condition_key))
+    if fact is None:
+        return False
+
+    try:
+        predicate = compile_condition(condition)
+    except InvalidConditionError:
+        return False
+
+    return predicate.test(fact)
+
+
+class AlphaNode:
+    """Tests one distinct predicate and feeds every rule that shares it"""
+    __slots__ = ('predicate', 'test', 'successors')
+
+    def __init__(self, predicate: Predicate):
+        self.predicate = predicate
+        self.test = predicate.test
+        self.successors = []  # Indexes of rules in the network
+
+
+class KeyIndex:
+    """
+    Discrimination index over the alpha nodes of one condition_key
+
+    Equality and 'in' nodes are found with a hash lookup on the fact text and
+    numeric nodes with a binary search over their sorted thresholds, so only
+    nodes that are satisfied get visited. Operators that cannot be indexed
+    (not_equals, contains) are tested one by one.
+    """
+
+    def __init__(self, nodes: Iterable[AlphaNode]):
+        self.by_value = {}  # fact text -> [AlphaNode]
+        self.scanned = []
+        numeric = {name: [] for name in NUMERIC_OPERATORS}
+
+        for node in nodes:
+            predicate = node.predicate
+            if predicate.operator == 'equals':
+                self.by_value.setdefault(predicate.operand, []).append(node)
+            elif predicate.operator == 'in':
+                for option in predicate.operand:
+                    self.by_value.setdefault(option, []).append(node)
+            elif predicate.operator in numeric:
+                numeric[predicate.operator].append((predicate.operand, node))
+            else:
+                self.scanned.append(node)
+
+        # Parallel sorted threshold / node lists per numeric operator
+        self.thresholds = {}
+        self.threshold_nodes = {}
+        for name, entries in numeric.items():
+            entries.sort(key=lambda entry: entry[0])
+            self.thresholds[name] = [threshold for threshold, _ in entries]
+            self.threshold_nodes[name] = [node for _, node in entries]
+
+    def activated(self, fact: FactValue) -> List[AlphaNode]:
+        """Return the alpha nodes satisfied by a fact"""
+        nodes = list(self.by_value.get(fact.text, ()))
+
+        number = fact.number
+        if number is not None and not math.isnan(number):
+            thresholds = self.thresholds
+            threshold_nodes = self.threshold_nodes
+            # value < t and value <= t hold for a suffix of the sorted thresholds
+            nodes.extend(threshold_nodes['less_than'][bisect_right(thresholds['less_than'], number):])
+            nodes.extend(threshold_nodes['less_equal'][bisect_left(thresholds['less_equal'], number):])
+            # value > t and value >= t hold for a prefix
+            nodes.extend(threshold_nodes['greater_than'][:bisect_left(thresholds['greater_than'], number)])
+            nodes.extend(threshold_nodes['greater_equal'][:bisect_right(thresholds['greater_equal'], number)])
+
+        for node in self.scanned:
+            if node.test(fact):
+                nodes.append(node)
+
+        return nodes
+
+
+class RuleNetwork:
+    """
+    Alpha/beta network compiled from a set of rules
+
+    Alpha nodes are shared between rules that use an identical condition and
+    are indexed by condition_key, then by value or threshold, so a fact set
+    only visits the nodes it satisfies. The beta side counts satisfied alpha
+    nodes per rule; a rule fires once all of its distinct conditions are
+    satisfied, keeping matching cost close to the number of candidate rules.
+    """
+
+    def __init__(self, rules: Iterable[CompiledRule]):
+        self.rules = []
+        self.invalid_rules = []  # (rule, error) pairs that can never fire
+        self.alpha_index = {}  # condition_key -> [AlphaNode]
+        self.required = []  # Number of distinct alpha nodes per rule
+        self.unconditional = []  # Rules without conditions always fire
+
+        nodes = {}
+        for rule in rules:
+            if not rule.is_active:
+                continue
+            try:
+                predicates = [compile_condition(c) for c in rule.conditions]
+            except InvalidConditionError as error:
+                self.invalid_rules.append((rule, error))
+                continue
+
+            index = len(self.rules)
+            self.rules.append(rule)
+            distinct = {p.signature: p for p in predicates}
+            self.required.append(len(distinct))
+            if not distinct:
+                self.unconditional.append(index)
+
+            for signature, predicate in distinct.items():
+                node = nodes.get(signature)
+                if node is None:
+                    node = AlphaNode(predicate)
+                    nodes[signature] = node
+                    self.alpha_index.setdefault(predicate.condition_key, []).append(node)
+                node.successors.append(index)
+
+        self.key_index = {key: KeyIndex(nodes) for key, nodes in self.alpha_index.items()}
+
+    @classmethod
+    def from_rules(cls, rules: Iterable[Rule]) -> 'RuleNetwork':
+        """Compile ORM rules, loading each rule's conditions and actions"""
+        return cls(compile_rule(rule, rule.conditions, rule.actions) for rule in rules)
+
+    @classmethod
+    def load(cls) -> 'RuleNetwork':
+        """Compile every active rule using a fixed number of queries"""
+        rules = Rule.query.filter_by(is_active=True).order_by(Rule.id).all()
+        conditions = (RuleCondition.query
+                      .join(Rule, RuleCondition.rule_id == Rule.id)
+                      .filter(Rule.is_active == True)
+                      .order_by(RuleCondition.id)
+                      .all())
+
+        actions = (RuleAction.query
+                   .join(Rule, RuleAction.rule_id == Rule.id)
+                   .filter(Rule.is_active == True)
+                   .order_by(RuleAction.id)
+                   .all())
+
+        conditions_by_rule = {}
+        for condition in conditions:
+            conditions_by_rule.setdefault(condition.rule_id, []).append(condition)
+        actions_by_rule = {}
+        for action in actions:
+            actions_by_rule.setdefault(action.rule_id, []).append(action)
+
+        return cls(
+            compile_rule(rule, conditions_by_rule.get(rule.id, []), actions_by_rule.get(rule.id, []))
+            for rule in rules
+        )
+
+    def __len__(self):
+        return len(self.rules)
+
+    def thresholds(self, key: str) -> Optional[List[float]]:
+        """
+        Sorted distinct numeric thresholds tested on a fact key
+
+        Matching for the key can only change when a value crosses one of these
+        thresholds. Returns None when the key is also tested by a text operator,
+        whose outcome depends on the exact value.
+        """
+        key_index = self.key_index.get(key)
+        if key_index is None:
+            return []
+        if key_index.by_value or key_index.scanned:
+            return None
+        return sorted({t for thresholds in key_index.thresholds.values() for t in thresholds})
+
+    def match(self, facts: Dict[str, Any], category_id=None) -> List[CompiledRule]:
+        """
+        Match the network against a fact set without touching the database
+
+        Args:
+            facts: Working memory to match
+            category_id: Optional category; only rules for it or generic rules are returned
+
+        Returns:
+            Fired rules sorted by priority (highest first)
+        """
+        satisfied = {}
+        fired = list(self.unconditional)
+
+        for key, value in facts.items():
+            key_index = self.key_index.get(key)
+            if key_index is None:
+                continue
+            fact = normalize_fact(value)
+            if fact is None:
+                continue
+            for node in key_index.activated(fact):
+                for index in node.successors:
+                    count = satisfied.get(index, 0) + 1
+                    satisfied[index] = count
+                    if count == self.required[index]:
+                        fired.append(index)
+
+        fired.sort()
+        matched = [self.rules[index] for index in fired]
+        if category_id:
+            matched = [rule for rule in matched if rule.category_id in (category_id, None)]
+
+        # Sort by priority (highest first)
+        return sorted(matched, key=lambda r: r.priority, reverse=True)
+
+    def run(self, facts: Dict[str, Any], category_id=None,
+            max_firings: int = MAX_FIRINGS) -> List[CompiledRule]:
+        """
+        Forward-chain over the network until no rule is left to fire
+
+        Rules whose conditions hold are placed on an agenda ordered by
+        priority. Firing a rule asserts its actions into ``facts`` as derived
+        facts; only alpha nodes on the changed keys are re-tested and only
+        their successor rules have their counts adjusted. Refraction lets each
+        rule fire at most once, and ``max_firings`` bounds the loop.
+
+        Args:
+            facts: Working memory; updated in place with derived facts
+            category_id: Optional category; only rules for it or generic rules take part
+            max_firings: Upper bound on the number of rules fired
+
+        Returns:
+            Fired rules in firing order
+        """
+        required = self.required
+        rules = self.rules
+        eligible = [not category_id or rule.category_id in (category_id, None) for rule in rules]
+
+        satisfied = [0] * len(rules)
+        active = {}  # condition_key -> activated alpha nodes
+        agenda = []
+        fired = []
+        refracted = set()
+
+        def activate(index):
+            if eligible[index] and index not in refracted:
+                heapq.heappush(agenda, (-rules[index].priority, index))
+
+        def assert_fact(key, value):
+            key_index = self.key_index.get(key)
+            if key_index is None:
+                return
+            fact = normalize_fact(value)
+            previous = active.get(key, ())
+            current = key_index.activated(fact) if fact is not None else []
+            active[key] = current
+
+            current_ids = {id(node) for node in current}
+            previous_ids = {id(node) for node in previous}
+            for node in previous:
+                if id(node) not in current_ids:
+                    for index in node.successors:
+                        satisfied[index] -= 1
+            for node in current:
+                if id(node) not in previous_ids:
+                    for index in node.successors:
+                        satisfied[index] += 1
+                        if satisfied[index] == required[index]:
+                            activate(index)
+
+        for index in self.unconditional:
+            activate(index)
+        for key, value in facts.items():
+            assert_fact(key, value)
+
+        while agenda and len(fired) < max_firings:
+            _, index = heapq.heappop(agenda)
+            # Skip stale entries: already fired, or retracted by a later fact
+            if index in refracted or satisfied[index] != required[index]:
+                continue
+
+            refracted.add(index)
+            rule = rules[index]
+            fired.append(rule)
+
+            for key, value in rule.actions:
+                if key in facts and str(facts[key]) == value:
+                    continue
+                facts[key] = value
+                assert_fact(key, value)
+
+        return fired
+
+
+def compile_rule(rule: Rule, conditions: Iterable[RuleCondition],
+                 actions: Iterable[RuleAction] = ()) -> CompiledRule:
+    """Copy a Rule, its conditions and its actions into an immutable CompiledRule"""
+    return CompiledRule(
+        id=rule.id,
+        name=rule.name,
+        description=rule.description,
+        category_id=rule.category_id,
+        priority=rule.priority,
+        is_active=rule.is_active,
+        conditions=tuple(
+            CompiledCondition(c.condition_key, c.operator, c.condition_value)
+            for c in conditions
+        ),
+        actions=tuple((a.fact_key, a.fact_value) for a in actions)
+    )
+
+
+_rule_network = versioned_snapshot(RULES, RuleNetwork.load)
+
+
+def get_rule_network() -> RuleNetwork:
+    """
+    Return the process-wide rule network
+
+    The network is only reloaded when the rule-set version has been bumped
+    since it was built, and in-flight requests keep matching against the
+    consistent rule set they started with.
+    """
+    return _rule_network()
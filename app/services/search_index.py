@@ -0,0 +1,320 @@
+"""
+Search Index
+In-memory inverted index over the catalog with BM25 ranking and typo-tolerant matching
+"""
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Set
+from sqlalchemy.orm import joinedload, selectinload
+from app.models.product import Product
+from app.utils.versioning import CATALOG, current_version
+
+# Field weights: a term in the name counts three times one in the description
+FIELD_WEIGHTS = {'name': 3.0, 'brand': 2.0, 'category': 1.0, 'specs': 1.0, 'description': 1.0}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Discounts of terms matched by prefix or with one typo instead of exactly
+PREFIX_WEIGHT = 0.8
+TYPO_WEIGHT = 0.6
+MIN_PREFIX_LENGTH = 2
+MIN_TYPO_LENGTH = 4
+MAX_EXPANSIONS = 50
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:\.[0-9]+)?')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word and number tokens of a text, accents folded"""
+    if not text:
+        return []
+    folded = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(char for char in folded if not unicodedata.combining(char))
+    return TOKEN_PATTERN.findall(folded)
+
+
+def deletions(term: str) -> Set[str]:
+    """Every string one character shorter than the term"""
+    return {term[:position] + term[position + 1:] for position in range(len(term))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Whether one insertion, deletion, substitution or adjacent swap turns a into b"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    prefix = 0
+    while prefix < len(a) and a[prefix] == b[prefix]:
+        prefix += 1
+    if len(a) == len(b):
+        return a[prefix + 1:] == b[prefix + 1:] or \
+            (a[prefix + 2:] == b[prefix + 2:] and a[prefix:prefix + 2] == b[prefix:prefix + 2][::-1])
+    return a[prefix:] == b[prefix + 1:]
+
+
+class SearchDocument(NamedTuple):
+    """What the index keeps about one product besides its postings"""
+    category_id: int
+    brand_id: int
+    is_active: bool
+    length: float  # weighted number of tokens
+    terms: frozenset
+
+
+class SearchResult(NamedTuple):
+    """Ranked matches of a query and their facet counts"""
+    total: int
+    hits: List[tuple]  # (product_id, score), best first
+    facets: Dict[str, Dict[int, int]]  # 'category'/'brand' -> id -> count
+
+
+def product_fields(product: Product) -> Dict[str, str]:
+    """Text of each indexed field of a product"""
+    return {
+        'name': product.name,
+        'brand': product.brand.name if product.brand else '',
+        'category': product.category.name if product.category else '',
+        'specs': ' '.join(spec.spec_value for spec in product.specifications),
+        'description': product.description or ''
+    }
+
+
+class SearchIndex:
+    """
+    Inverted index of every product, active or not
+    
+    Postings hold the field-weighted frequency of a term per product, and a
+    sorted vocabulary plus a single-deletion table let query terms also
+    match by prefix and with one typo. The index is built from the database
+    the first time it is searched at a catalog version it has not seen, and
+    kept current by the admin write paths through index_product,
+    remove_product and index_brand, which avoid the rebuild.
+    """
+    
+    def __init__(self):
+        self.version = None
+        self._lock = threading.RLock()
+        self._reset()
+    
+    def _reset(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._documents: Dict[int, SearchDocument] = {}
+        self._vocabulary: List[str] = []  # sorted, for prefix lookups
+        self._deletions: Dict[str, Set[str]] = defaultdict(set)  # term minus one character -> terms
+        self._total_length = 0.0
+    
+    def __len__(self):
+        return len(self._documents)
+    
+    def rebuild(self, products: Iterable[Product] = None, version: int = None):
+        """Replace the index with the given products (default: every product in the database)"""
+        if version is None:
+            version = current_version(CATALOG)
+        if products is None:
+            products = Product.query.options(
+                joinedload(Product.brand),
+                joinedload(Product.category),
+                selectinload(Product.specifications)
+            ).all()
+        
+        with self._lock:
+            self._reset()
+            for product in products:
+                self._add(product)
+            self.version = version
+    
+    def ensure_current(self):
+        """Rebuild unless the index already reflects the current catalog version"""
+        if self.version != current_version(CATALOG):
+            with self._lock:
+                if self.version != current_version(CATALOG):
+                    self.rebuild()
+    
+    def index_product(self, product: Product, version: int):
+        """
+        Add or re-index one product after a catalog write
+        
+        Args:
+            product: The product as committed
+            version: Catalog version returned by the write's bump_version
+        """
+        self._apply(version, lambda: self._reindex([product]))
+    
+    def remove_product(self, product_id: int, version: int):
+        """Drop a deleted product after a catalog write"""
+        self._apply(version, lambda: self._remove(product_id))
+    
+    def index_brand(self, brand, version: int):
+        """Re-index the products of a renamed brand"""
+        self._apply(version, lambda: self._reindex(brand.products))
+    
+    def skip(self, version: int):
+        """Record a catalog write that changes no indexed text, such as adding a brand"""
+        self._apply(version, lambda: None)
+    
+    def _apply(self, version: int, update):
+        # Incremental updates are only safe on top of the version just before
+        # this write; otherwise the next search rebuilds from the database
+        with self._lock:
+            if self.version is not None and self.version == version - 1:
+                update()
+                self.version = version
+    
+    def _reindex(self, products: Iterable[Product]):
+        for product in products:
+            self._remove(product.id)
+            self._add(product)
+    
+    def _add(self, product: Product):
+        frequencies = Counter()
+        length = 0.0
+        for field, text in product_fields(product).items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                frequencies[token] += weight
+                length += weight
+        
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+                for deleted in deletions(term):
+                    self._deletions[deleted].add(term)
+            postings[product.id] = frequency
+        
+        self._documents[product.id] = SearchDocument(product.category_id, product.brand_id, bool(product.is_active),
+                                                     length, frozenset(frequencies))
+        self._total_length += length
+    
+    def _remove(self, product_id: int):
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return
+        self._total_length -= document.length
+        for term in document.terms:
+            postings = self._postings[term]
+            del postings[product_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+                for deleted in deletions(term):
+                    self._deletions[deleted].discard(term)
+                    if not self._deletions[deleted]:
+                        del self._deletions[deleted]
+    
+    def expand(self, token: str) -> Dict[str, float]:
+        """
+        Indexed terms a query token matches, with the weight of each match
+        
+        Exact matches weigh 1, longer terms the token is a prefix of weigh
+        PREFIX_WEIGHT and, when the token itself is not indexed, terms one
+        typo away weigh TYPO_WEIGHT.
+        """
+        matches = {token: 1.0} if token in self._postings else {}
+        if len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[start:start + MAX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_WEIGHT)
+        
+        if token not in self._postings and len(token) >= MIN_TYPO_LENGTH:
+            candidates = set(self._deletions.get(token, ()))
+            for deleted in deletions(token):
+                candidates.update(self._deletions.get(deleted, ()))
+                if deleted in self._postings:
+                    candidates.add(deleted)
+            for term in candidates:
+                if term not in matches and within_one_edit(token, term):
+                    matches[term] = TYPO_WEIGHT
+        return matches
+    
+    def search(self, query: str, category_id: int = None, brand_id: int = None,
+               active_only: bool = True, any_fallback: bool = True) -> SearchResult:
+        """
+        Rank products by BM25 over the query's tokens
+        
+        Products matching every token are returned; if none do and
+        any_fallback is set, those matching any. Facet counts cover the matches with the other facet's
+        filter applied, so each facet lists the choices still open.
+        
+        Args:
+            query: Free text
+            category_id: Only count hits in this category
+            brand_id: Only count hits of this brand
+            active_only: Leave out inactive products
+            any_fallback: Fall back to products matching any token
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            scores = self._score(tokens, active_only, any_fallback)
+            facets = {'category': Counter(), 'brand': Counter()}
+            hits = []
+            for product_id, score in scores.items():
+                document = self._documents[product_id]
+                in_category = category_id is None or document.category_id == category_id
+                in_brand = brand_id is None or document.brand_id == brand_id
+                if in_brand:
+                    facets['category'][document.category_id] += 1
+                if in_category:
+                    facets['brand'][document.brand_id] += 1
+                if in_category and in_brand:
+                    hits.append((product_id, score))
+        
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return SearchResult(len(hits), hits, {name: dict(counts) for name, counts in facets.items()})
+    
+    def _score(self, tokens: List[str], active_only: bool, any_fallback: bool = True) -> Dict[int, float]:
+        if not tokens or not self._documents:
+            return {}
+        
+        count = len(self._documents)
+        average_length = self._total_length / count or 1.0
+        per_token = []
+        for token in tokens:
+            token_scores = {}
+            for term, weight in self.expand(token).items():
+                postings = self._postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for product_id, frequency in postings.items():
+                    document = self._documents[product_id]
+                    if active_only and not document.is_active:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * document.length / average_length)
+                    score = weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    # A token counts once per product, through its best matching term
+                    if score > token_scores.get(product_id, 0.0):
+                        token_scores[product_id] = score
+            per_token.append(token_scores)
+        
+        matched_all = set.intersection(*(set(token_scores) for token_scores in per_token))
+        if not matched_all and not any_fallback:
+            return {}
+        totals = defaultdict(float)
+        for token_scores in per_token:
+            for product_id, score in token_scores.items():
+                if not matched_all or product_id in matched_all:
+                    totals[product_id] += score
+        return totals
+
+
+search_index = SearchIndex()
+
+
+def search_product_ids(query: str, active_only: bool = True) -> List[int]:
+    """Ids of the products matching every token of a query, best first; none for a query without tokens"""
+    if not tokenize(query):
+        return []
+    search_index.ensure_current()
+    result = search_index.search(query, active_only=active_only, any_fallback=False)
+    return [product_id for product_id, _ in result.hits]
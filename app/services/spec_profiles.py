@@ -0,0 +1,44 @@
+"""
+Spec Profiles
+Typed specification values and score features kept next to a product's raw specifications
+"""
+from datetime import datetime
+from typing import Iterable
+from app import db
+from app.models.product import Product, Category, Specification, SpecProfile
+from app.services.comparison_service import ComparisonService
+from app.utils.processor_catalog import ProcessorCatalog
+from app.utils.spec_parser import parse_spec_profile
+
+
+def refresh_spec_profile(product: Product, specifications: Iterable[Specification] = None,
+                         catalog: ProcessorCatalog = None) -> SpecProfile:
+    """
+    Re-parse a product's specifications into its typed spec profile
+
+    Must be called whenever specifications are written so scoring and
+    filtering never have to parse the raw text.
+
+    Args:
+        product: Product whose profile is rewritten
+        specifications: The product's specifications, if not yet in the relationship
+        catalog: Processor catalog resolved once for a batch (default: the shared one)
+    """
+    if specifications is None:
+        specifications = product.specifications
+    specifications = list(specifications)
+
+    if product.spec_profile is None:
+        product.spec_profile = SpecProfile()
+    values = parse_spec_profile(((spec.spec_key, spec.spec_value) for spec in specifications), catalog)
+
+    # Product-only parts of the comparison score
+    category = db.session.get(Category, product.category_id) if product.category_id else None
+    if category is not None:
+        values.update(ComparisonService().score_features(category.name.lower(), specifications, dict(values)))
+
+    for name, value in values.items():
+        setattr(product.spec_profile, name, value)
+    # Stamp every rewrite, even when no parsed value changed, for comparison caches
+    product.spec_profile.updated_at = datetime.utcnow()
+    return product.spec_profile
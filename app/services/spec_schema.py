@@ -0,0 +1,131 @@
+"""
+Spec Schema
+Canonical per-category specification rows and products materialized against them
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app import db
+from app.models.product import Product, Specification
+from app.utils.versioning import CATALOG, versioned_snapshot
+
+# Canonical rows in display order, with the spec keys (lower-cased) merged into each
+CANONICAL_SPECS = (
+    ('Processor', ('processor', 'cpu', 'chipset', 'soc')),
+    ('RAM', ('ram', 'memory')),
+    ('Storage', ('storage', 'ssd', 'internal storage', 'rom')),
+    ('Graphics', ('graphics', 'gpu')),
+    ('Display', ('display', 'screen')),
+    ('Camera', ('camera', 'main camera', 'rear camera')),
+    ('Front Camera', ('front camera', 'selfie camera')),
+    ('Battery', ('battery', 'battery life')),
+    ('OS', ('os', 'operating system')),
+    ('Weight', ('weight',)),
+)
+
+SYNONYMS = {synonym: label for label, synonyms in CANONICAL_SPECS for synonym in synonyms}
+CANONICAL_ORDER = {label: position for position, (label, _) in enumerate(CANONICAL_SPECS)}
+
+
+def canonical_key(spec_key: str) -> str:
+    """Row label of a spec key: its canonical name, or the key itself"""
+    key = ' '.join(spec_key.split())
+    return SYNONYMS.get(key.lower(), key)
+
+
+def order_keys(labels: Iterable[str]) -> Tuple[str, ...]:
+    """Canonical rows in their fixed order, then other keys alphabetically"""
+    return tuple(sorted(set(labels), key=lambda label: (CANONICAL_ORDER.get(label, len(CANONICAL_ORDER)), label)))
+
+
+def align(specifications: Iterable[Tuple[str, str]], index: Dict[str, int]) -> Tuple[Optional[str], ...]:
+    """
+    One dense row of values aligned to a schema's columns
+    
+    When several keys merge into one row, the first listed value is kept.
+    """
+    row = [None] * len(index)
+    for spec_key, spec_value in specifications:
+        column = index[canonical_key(spec_key)]
+        if row[column] is None:
+            row[column] = spec_value
+    return tuple(row)
+
+
+class SpecSchema:
+    """Ordered spec rows of one category with every product's values aligned to them"""
+    
+    def __init__(self, category_id: int, specifications: Dict[int, List[Tuple[str, str]]]):
+        """
+        Args:
+            category_id: Category of the products
+            specifications: (spec_key, spec_value) pairs per product id, in spec order
+        """
+        self.category_id = category_id
+        self.keys = order_keys(canonical_key(key) for pairs in specifications.values() for key, _ in pairs)
+        self.index = {label: column for column, label in enumerate(self.keys)}
+        self.rows = {product_id: align(pairs, self.index) for product_id, pairs in specifications.items()}
+    
+    def covers(self, product: Product) -> bool:
+        """Whether a product's materialized row is in this schema"""
+        return product.id in self.rows
+
+
+class SpecTable(NamedTuple):
+    """Comparison table: row labels and one value per compared product"""
+    keys: Tuple[str, ...]
+    values: List[Tuple[Optional[str], ...]]  # per key, one value per product in order
+    
+    def rows(self) -> List[dict]:
+        """Rows for templates, flagging keys whose values differ"""
+        return [{'key': key, 'values': values, 'differs': len(set(values)) > 1}
+                for key, values in zip(self.keys, self.values)]
+
+
+def comparison_table(products: List[Product], schemas: Dict[int, SpecSchema] = None) -> SpecTable:
+    """
+    Aligned specification table of the given products, in their order
+    
+    Products of one category whose rows are materialized are served by
+    slicing the prebuilt rows down to the columns any of them fills. Other
+    products (mixed categories, or written since the schemas were built)
+    are aligned on the fly against the union of their row labels.
+    """
+    if schemas is None:
+        schemas = get_spec_schemas()
+    
+    schema = schemas.get(products[0].category_id) if products else None
+    if schema is not None and all(product.category_id == schema.category_id and schema.covers(product)
+                                  for product in products):
+        rows = [schema.rows[product.id] for product in products]
+        columns = [column for column in range(len(schema.keys)) if any(row[column] is not None for row in rows)]
+        return SpecTable(tuple(schema.keys[column] for column in columns),
+                         [tuple(row[column] for row in rows) for column in columns])
+    
+    pairs = [[(spec.spec_key, spec.spec_value) for spec in product.specifications] for product in products]
+    keys = order_keys(canonical_key(key) for product_pairs in pairs for key, _ in product_pairs)
+    index = {label: column for column, label in enumerate(keys)}
+    rows = [align(product_pairs, index) for product_pairs in pairs]
+    return SpecTable(keys, [tuple(row[column] for row in rows) for column in range(len(keys))])
+
+
+def load_spec_schemas() -> Dict[int, SpecSchema]:
+    """Build the schema of every category from the active products' specifications in one query"""
+    by_category = defaultdict(lambda: defaultdict(list))
+    query = db.session.query(Product.category_id, Product.id, Specification.spec_key, Specification.spec_value) \
+        .outerjoin(Specification, Specification.product_id == Product.id) \
+        .filter(Product.is_active == True) \
+        .order_by(Product.id, Specification.id)
+    for category_id, product_id, spec_key, spec_value in query:
+        product_specs = by_category[category_id][product_id]
+        if spec_key is not None:
+            product_specs.append((spec_key, spec_value))
+    return {category_id: SpecSchema(category_id, specifications)
+            for category_id, specifications in by_category.items()}
+
+
+_spec_schemas = versioned_snapshot(CATALOG, load_spec_schemas)
+
+
+def get_spec_schemas() -> Dict[int, SpecSchema]:
+    """Return the process-wide spec schemas, rebuilt when the catalog changes"""
+    return _spec_schemas()
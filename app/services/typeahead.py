@@ -0,0 +1,159 @@
+"""
+Typeahead
+Autocomplete over brands, product names and spec tokens from a compressed prefix trie
+"""
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models.product import Brand, Product
+from app.services.search_index import tokenize
+from app.utils.versioning import CATALOG, versioned_snapshot
+
+# Suggestions kept per trie node and per kind; also the most a lookup returns
+TOP_K = 10
+
+# Spec tokens suggested once this many active products mention them
+MIN_SPEC_TOKEN_PRODUCTS = 2
+
+KINDS = ('brand', 'product', 'spec')
+
+
+class Suggestion(NamedTuple):
+    """One completion; weight is how many active products it stands for"""
+    text: str
+    kind: str
+    weight: int
+    id: Optional[int] = None
+
+    def to_dict(self):
+        return {'text': self.text, 'kind': self.kind, 'id': self.id}
+
+
+def normalize(text: str) -> str:
+    """Key form of a text: its search tokens separated by single spaces"""
+    return ' '.join(tokenize(text))
+
+
+class TrieNode:
+    """Radix trie node: edges keyed by the first character of their label"""
+    __slots__ = ('edges', 'terminal', 'top')
+
+    def __init__(self):
+        self.edges: Dict[str, Tuple[str, 'TrieNode']] = {}
+        self.terminal: List[int] = []  # suggestions whose key ends here, until finalized
+        self.top: Dict[Optional[str], Tuple[int, ...]] = {}  # kind (None: any) -> best suggestions below
+
+
+class TypeaheadTrie:
+    """
+    Compressed prefix trie with the best completions precomputed at every node
+
+    Each suggestion is inserted under its normalized text and under every
+    suffix starting at a word, so "gal" completes "Samsung Galaxy S23".
+    After insertion every node stores its TOP_K heaviest distinct
+    suggestions overall and per kind, so a lookup is a walk down the
+    prefix's characters followed by returning a stored tuple.
+    """
+
+    def __init__(self, suggestions: Iterable[Suggestion]):
+        self.suggestions = list(suggestions)
+        self.root = TrieNode()
+        for index, suggestion in enumerate(self.suggestions):
+            words = normalize(suggestion.text).split(' ')
+            for start in range(len(words)):
+                key = ' '.join(words[start:])
+                if key:
+                    self._insert(key, index)
+        # Heaviest first, then alphabetical
+        self._rank = {index: rank for rank, index in enumerate(sorted(
+            range(len(self.suggestions)),
+            key=lambda index: (-self.suggestions[index].weight, self.suggestions[index].text.lower())))}
+        self._finalize(self.root)
+
+    def _insert(self, key: str, index: int):
+        node = self.root
+        while key:
+            edge = node.edges.get(key[0])
+            if edge is None:
+                child = TrieNode()
+                node.edges[key[0]] = (key, child)
+                node, key = child, ''
+                break
+            label, child = edge
+            common = 0
+            while common < len(label) and common < len(key) and label[common] == key[common]:
+                common += 1
+            if common < len(label):
+                # Split the edge where the new key leaves it
+                middle = TrieNode()
+                middle.edges[label[common]] = (label[common:], child)
+                node.edges[key[0]] = (label[:common], middle)
+                child = middle
+            node, key = child, key[common:]
+        node.terminal.append(index)
+
+    def _finalize(self, node: TrieNode):
+        children = [child for _, child in node.edges.values()]
+        for child in children:
+            self._finalize(child)
+
+        # The best of a subtree are among its own suggestions and its children's best
+        for kind in (None,) + KINDS:
+            candidates = {index for index in node.terminal if kind is None or self.suggestions[index].kind == kind}
+            for child in children:
+                candidates.update(child.top.get(kind, ()))
+            if candidates:
+                node.top[kind] = tuple(heapq.nsmallest(TOP_K, candidates, key=self._rank.__getitem__))
+        node.terminal = []
+
+    def complete(self, prefix: str, kind: str = None, limit: int = TOP_K) -> List[Suggestion]:
+        """Heaviest suggestions with a word sequence starting with the prefix"""
+        key = normalize(prefix)
+        if not key:
+            return []
+        node = self.root
+        while key:
+            edge = node.edges.get(key[0])
+            if edge is None:
+                return []
+            label, child = edge
+            if len(key) <= len(label):
+                if not label.startswith(key):
+                    return []
+                node, key = child, ''
+            elif key.startswith(label):
+                node, key = child, key[len(label):]
+            else:
+                return []
+        return [self.suggestions[index] for index in node.top.get(kind, ())[:limit]]
+
+
+def load_suggestions() -> List[Suggestion]:
+    """Brands, active products and common spec tokens, weighted by how many active products they cover"""
+    active_counts = dict(db.session.query(Product.brand_id, func.count(Product.id))
+                         .filter(Product.is_active == True)
+                         .group_by(Product.brand_id).all())
+    suggestions = [Suggestion(brand.name, 'brand', active_counts.get(brand.id, 0), brand.id)
+                   for brand in Brand.query.all()]
+
+    spec_tokens = Counter()
+    products = Product.query.options(selectinload(Product.specifications)).filter_by(is_active=True).all()
+    for product in products:
+        suggestions.append(Suggestion(product.name, 'product', 1, product.id))
+        spec_tokens.update({token for spec in product.specifications for token in tokenize(spec.spec_value)
+                            if len(token) > 1 and not token.replace('.', '').isdigit()})
+
+    suggestions.extend(Suggestion(token, 'spec', count) for token, count in spec_tokens.items()
+                       if count >= MIN_SPEC_TOKEN_PRODUCTS)
+    return suggestions
+
+
+_typeahead = versioned_snapshot(CATALOG, lambda: TypeaheadTrie(load_suggestions()))
+
+
+def get_typeahead() -> TypeaheadTrie:
+    """Return the process-wide typeahead trie, rebuilt and swapped in when the catalog changes"""
+    return _typeahead()
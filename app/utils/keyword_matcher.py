@@ -0,0 +1,57 @@
+"""
+Keyword matcher
+Finds every keyword of several labelled groups in one pass over a text
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive substring matcher compiled into a single regex
+    
+    A lookahead alternation of all keywords, longest first, finds the longest
+    keyword starting at every position of the text in one scan. Shorter
+    keywords that are prefixes of it are added from a precomputed table, so
+    the result equals testing every keyword with ``in`` separately.
+    """
+    
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        """
+        Args:
+            groups: Label to keywords; a keyword may belong to several labels
+        """
+        self.labels = list(groups)
+        keyword_labels: Dict[str, set] = {}
+        for label, keywords in groups.items():
+            for keyword in keywords:
+                keyword_labels.setdefault(keyword.lower(), set()).add(label)
+        
+        keywords = sorted(keyword_labels, key=len, reverse=True)
+        self._hits = {
+            keyword: frozenset(label for other in keywords if keyword.startswith(other)
+                               for label in keyword_labels[other])
+            for keyword in keywords
+        }
+        self._pattern = None
+        if keywords:
+            self._pattern = re.compile('(?=(' + '|'.join(re.escape(keyword) for keyword in keywords) + '))')
+    
+    @classmethod
+    def from_keywords(cls, keywords: Iterable[str]) -> 'KeywordMatcher':
+        """Matcher whose labels are the keywords themselves"""
+        return cls({keyword: [keyword] for keyword in keywords})
+    
+    def match(self, text: str) -> FrozenSet[str]:
+        """Labels of every keyword found in the text"""
+        if self._pattern is None or not text:
+            return frozenset()
+        hits = set()
+        for match in self._pattern.finditer(text.lower()):
+            hits |= self._hits[match.group(1)]
+        return frozenset(hits)
+    
+    def first(self, text: str) -> Optional[str]:
+        """First label, in group order, with a keyword found in the text"""
+        hits = self.match(text)
+        return next((label for label in self.labels if label in hits), None)
@@ -0,0 +1,163 @@
+"""
+Processor catalog
+Benchmark tiers for CPU and SoC names, loaded from a data file
+"""
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+from app.utils.cache import LRUCache
+from app import db
+from app.utils.versioning import CATALOG, PROCESSORS, bump_version, current_version
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'processors.json')
+
+# Distinct processor strings remembered per catalog
+TIER_CACHE_SIZE = 1024
+
+# Hyphens and dashes that product data uses interchangeably
+DASHES = re.compile('[‐-―−]')
+TRADEMARKS = re.compile('[™®©]')
+NON_WORD = re.compile(r'[^a-z0-9+\- ]+')
+
+
+class ProcessorFamily(NamedTuple):
+    """A processor family matched by pattern against normalized names"""
+    name: str
+    pattern: Pattern
+    tier: int
+
+
+class ProcessorCatalog:
+    """
+    Processor tiers from exact models, then families in file order
+    
+    Names are normalized before lookup; a name listing alternatives
+    ("Exynos 2400 / Snapdragon 8 Gen 3") gets the best tier among them.
+    Unknown processors get the catalog's default tier. Results are memoized
+    per distinct input string.
+    """
+    
+    def __init__(self, models: Dict[str, int], families: List[ProcessorFamily], default_tier: int = 5,
+                 vendors: List[str] = (), suffixes: List[str] = ()):
+        self.default_tier = default_tier
+        self.families = families
+        self.vendors = frozenset(vendors)
+        self.suffixes = frozenset(suffixes)
+        self.models = {self.normalize(name): tier for name, tier in models.items()}
+        self.cache = LRUCache(maxsize=TIER_CACHE_SIZE)
+    
+    @classmethod
+    def load(cls, path: str = None) -> 'ProcessorCatalog':
+        """Read a catalog data file"""
+        with open(path or DEFAULT_CATALOG_PATH, encoding='utf-8') as catalog_file:
+            data = json.load(catalog_file)
+        families = [ProcessorFamily(family['name'], re.compile(family['pattern']), int(family['tier']))
+                    for family in data.get('families', [])]
+        return cls(data.get('models', {}), families, int(data.get('default_tier', 5)),
+                   data.get('vendors', []), data.get('suffixes', []))
+    
+    def normalize(self, name: str) -> str:
+        """Lower-case a processor name and drop vendor names and filler words"""
+        text = unicodedata.normalize('NFKC', TRADEMARKS.sub('', name or '')).lower()
+        text = NON_WORD.sub(' ', DASHES.sub('-', text))
+        words = [word for word in text.split() if word not in self.vendors and word not in self.suffixes]
+        return ' '.join(words)
+    
+    def tier(self, name: str) -> int:
+        """Benchmark tier of a processor name, memoized per distinct string"""
+        tier = self.cache.get(name)
+        if tier is None:
+            tier, _ = self.match(name)
+            self.cache.set(name, tier)
+        return tier
+    
+    def match(self, name: str) -> Tuple[int, Optional[str]]:
+        """
+        Tier and matched model or family name, without the cache
+        
+        Returns:
+            (tier, match name); the name is None when the default tier is used
+        """
+        best = None
+        for alternative in name.split('/'):
+            found = self._match_one(self.normalize(alternative))
+            if found and (best is None or found[0] > best[0]):
+                best = found
+        return best or (self.default_tier, None)
+    
+    def _match_one(self, normalized: str) -> Optional[Tuple[int, str]]:
+        if not normalized:
+            return None
+        if normalized in self.models:
+            return self.models[normalized], normalized
+        for family in self.families:
+            if family.pattern.search(normalized):
+                return family.tier, family.name
+        return None
+
+
+_catalog: Optional[ProcessorCatalog] = None
+_catalog_version = None
+_lock = threading.Lock()
+
+
+def get_processor_catalog() -> ProcessorCatalog:
+    """
+    The shared catalog, loaded from the data file on first use
+
+    A reload in any worker bumps the processors version, so the other
+    workers re-read the data file on their next lookup.
+    """
+    version = current_version(PROCESSORS)
+    catalog = _catalog
+    if catalog is None or _catalog_version != version:
+        with _lock:
+            if _catalog is None or _catalog_version != version:
+                _swap(ProcessorCatalog.load(), version)
+            catalog = _catalog
+    return catalog
+
+
+def reload_processor_catalog(path: str = None) -> ProcessorCatalog:
+    """
+    Re-read the catalog data file and swap it in for every later lookup
+    
+    The old catalog's memoized tiers go with it. The processor tiers stored
+    on spec profiles are re-derived in the same transaction, and the catalog
+    version is bumped too, for caches of derived product data.
+    """
+    catalog = ProcessorCatalog.load(path)
+    version = bump_version(PROCESSORS)
+    bump_version(CATALOG)
+    refresh_processor_tiers(catalog)
+    db.session.commit()
+    with _lock:
+        _swap(catalog, version)
+    return catalog
+
+
+def refresh_processor_tiers(catalog: ProcessorCatalog) -> int:
+    """Re-rate the processor of every stored spec profile with a catalog; returns the profiles updated"""
+    # Imported here: the models import the spec parser, which imports this module
+    from sqlalchemy.orm import selectinload
+    from app.models.product import Product
+    from app.utils.spec_parser import PROCESSOR_KEYWORDS, find_spec_value
+    
+    products = Product.query.filter(Product.spec_profile.has()).options(
+        selectinload(Product.specifications),
+        selectinload(Product.spec_profile)
+    ).all()
+    for product in products:
+        specs = {spec.spec_key.lower(): spec.spec_value for spec in product.specifications}
+        processor = find_spec_value(specs, PROCESSOR_KEYWORDS)
+        product.spec_profile.processor_tier = catalog.tier(processor) if processor else None
+    return len(products)
+
+
+def _swap(catalog: ProcessorCatalog, version: int):
+    global _catalog, _catalog_version
+    _catalog = catalog
+    _catalog_version = version
@@ -0,0 +1,149 @@
+"""
+Specification parser
+Turns free-text specification values into typed numeric attributes
+"""
+import re
+from typing import Dict, Any, Iterable, Optional, Tuple
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.processor_catalog import ProcessorCatalog, get_processor_catalog
+
+NUMBER_PATTERN = re.compile(r'\d+\.?\d*')
+MEGAPIXEL_PATTERN = re.compile(r'(\d+\.?\d*)\s*mp')
+HERTZ_PATTERN = re.compile(r'(\d+\.?\d*)\s*hz')
+
+# Spec key keywords for each typed attribute
+RAM_KEYWORDS = ['ram', 'memory']
+STORAGE_KEYWORDS = ['storage', 'ssd']
+BATTERY_KEYWORDS = ['battery']
+CAMERA_KEYWORDS = ['camera']
+PROCESSOR_KEYWORDS = ['processor', 'cpu']
+
+# Spec key keywords tested by comparison and recommendation reasoning
+SPEC_KEY_MATCHER = KeywordMatcher.from_keywords([
+    'ram', 'memory', 'storage', 'ssd', 'battery', 'display', 'screen',
+    'camera', 'processor', 'cpu', 'graphics', 'gpu'
+])
+
+# Spec value features, including the premium features that earn pros and score points
+SPEC_VALUE_MATCHER = KeywordMatcher({
+    'premium_display': ['oled', 'amoled', '4k', 'retina', '120hz', '144hz'],
+    'premium_processor': ['i7', 'i9', 'ryzen 7', 'ryzen 9', 'm1', 'm2', 'm3', 'snapdragon 8'],
+    'dedicated_graphics': ['rtx', 'dedicated', 'nvidia', 'radeon'],
+    'gaming_graphics': ['dedicated', 'nvidia'],
+    'integrated_graphics': ['integrated'],
+    'premium_feature': ['oled', 'amoled', '5g', 'wifi 6', 'rtx', 'm1', 'm2'],
+    '5g': ['5g'],
+    'wifi_6': ['wifi 6', 'wi-fi 6']
+})
+
+# Product detail sections, matched against spec keys in this order
+SPEC_SECTIONS = {
+    'Performance': ['Processor', 'RAM', 'Graphics', 'Storage', 'SSD'],
+    'Display': ['Display', 'Screen', 'Resolution'],
+    'Camera': ['Camera', 'Front Camera', 'Video'],
+    'Battery & Power': ['Battery', 'Charging', 'Power'],
+    'System': ['OS', 'Operating System'],
+    'Physical': ['Weight', 'Dimensions', 'Build']
+}
+SPEC_SECTION_MATCHER = KeywordMatcher(SPEC_SECTIONS)
+
+# Batteries listed without a unit are read as mAh from this capacity up, else as hours
+MAH_THRESHOLD = 500
+
+
+def parse_number(text: str, default: float = None) -> Optional[float]:
+    """Extract the first number from a text value"""
+    match = NUMBER_PATTERN.search(text or '')
+    if match:
+        return float(match.group())
+    return default
+
+
+def parse_capacity_gb(text: str) -> Optional[float]:
+    """Parse a memory or storage size into gigabytes"""
+    number = parse_number(text)
+    if number is None:
+        return None
+    text_lower = text.lower()
+    if 'tb' in text_lower:
+        return number * 1024
+    if 'mb' in text_lower and 'gb' not in text_lower:
+        return number / 1024
+    return number
+
+
+def rate_processor(processor_name: str, catalog: ProcessorCatalog = None) -> int:
+    """Rate processor performance from the processor catalog (default: the shared one)"""
+    return (catalog or get_processor_catalog()).tier(processor_name)
+
+
+def find_spec_value(specs: Dict[str, str], keywords: Iterable[str]) -> Optional[str]:
+    """Find the first value whose lower-cased key contains one of the keywords"""
+    for key, value in specs.items():
+        if any(keyword in key for keyword in keywords):
+            return value
+    return None
+
+
+def parse_spec_profile(specifications: Iterable[Tuple[str, str]], catalog: ProcessorCatalog = None) -> Dict[str, Any]:
+    """
+    Parse (spec_key, spec_value) pairs into typed product attributes
+
+    Batches pass the processor catalog they resolved once, so each product
+    does not look up the catalog version again.
+
+    Returns:
+        Dictionary with ram_gb, storage_gb, battery_mah, battery_hours,
+        camera_mp, refresh_rate_hz, has_5g and processor_tier; attributes the
+        specifications do not mention are None
+    """
+    specs = {}
+    for key, value in specifications:
+        specs[key.lower()] = value
+    values_lower = [value.lower() for value in specs.values()]
+
+    profile = {
+        'ram_gb': None,
+        'storage_gb': None,
+        'battery_mah': None,
+        'battery_hours': None,
+        'camera_mp': None,
+        'refresh_rate_hz': None,
+        'has_5g': any('5g' in value for value in values_lower),
+        'processor_tier': None
+    }
+
+    ram = find_spec_value(specs, RAM_KEYWORDS)
+    if ram:
+        profile['ram_gb'] = parse_capacity_gb(ram)
+
+    storage = find_spec_value(specs, STORAGE_KEYWORDS)
+    if storage:
+        profile['storage_gb'] = parse_capacity_gb(storage)
+
+    battery = find_spec_value(specs, BATTERY_KEYWORDS)
+    if battery:
+        capacity = parse_number(battery)
+        battery_lower = battery.lower()
+        if capacity is not None:
+            if 'mah' in battery_lower:
+                profile['battery_mah'] = capacity
+            elif 'hour' in battery_lower or 'hr' in battery_lower or capacity < MAH_THRESHOLD:
+                profile['battery_hours'] = capacity
+            else:
+                profile['battery_mah'] = capacity
+
+    camera = find_spec_value(specs, CAMERA_KEYWORDS)
+    if camera:
+        megapixels = [float(mp) for mp in MEGAPIXEL_PATTERN.findall(camera.lower())]
+        profile['camera_mp'] = max(megapixels) if megapixels else parse_number(camera)
+
+    rates = [float(hz) for value in values_lower for hz in HERTZ_PATTERN.findall(value)]
+    if rates:
+        profile['refresh_rate_hz'] = max(rates)
+
+    processor = find_spec_value(specs, PROCESSOR_KEYWORDS)
+    if processor:
+        profile['processor_tier'] = rate_processor(processor, catalog)
+
+    return profile
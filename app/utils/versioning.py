@@ -0,0 +1,149 @@
+"""
+Data version counters
+Counters in the data_versions table, bumped by write paths so every worker's in-memory caches know when to reload
+"""
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, NamedTuple, Tuple, TypeVar
+from flask import g, has_request_context
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.data_version import DataVersion, initial_version
+
+# Names of the versioned data sets
+RULES = 'rules'
+CATALOG = 'catalog'
+PROCESSORS = 'processors'
+
+DATA_SETS = (RULES, CATALOG, PROCESSORS)
+
+T = TypeVar('T')
+
+_lock = threading.Lock()
+_subscribers = {}
+
+
+def _load_versions() -> Dict[str, Tuple[int, datetime]]:
+    rows = db.session.execute(select(DataVersion.name, DataVersion.version, DataVersion.changed_at))
+    return {name: (version, changed_at) for name, version, changed_at in rows}
+
+
+def _versions() -> Dict[str, Tuple[int, datetime]]:
+    # Read once per request so a request sees one consistent set of versions;
+    # outside requests (CLI commands, background threads) every call reads
+    if not has_request_context():
+        return _load_versions()
+    versions = g.get('data_versions')
+    if versions is None:
+        versions = g.data_versions = _load_versions()
+    return versions
+
+
+def _forget_versions():
+    if has_request_context():
+        g.pop('data_versions', None)
+
+
+def init_app(app):
+    """Re-read versions at the start of every request"""
+    app.before_request(_forget_versions)
+
+
+def current_version(name: str) -> int:
+    """Return the current version of a data set"""
+    return _versions().get(name, (0, None))[0]
+
+
+def version_changed_at(name: str) -> datetime:
+    """Return when a data set last changed, in UTC"""
+    changed_at = _versions().get(name, (0, None))[1]
+    return changed_at or datetime.utcnow()
+
+
+def bump_version(name: str) -> int:
+    """
+    Mark a data set as changed in the current transaction and return its new version
+
+    Call before committing the write, so the data and its version change
+    together. Subscribers are notified once the transaction commits.
+    """
+    session = db.session
+    now = datetime.utcnow()
+    result = session.execute(update(DataVersion).where(DataVersion.name == name)
+                             .values(version=DataVersion.version + 1, changed_at=now))
+    if result.rowcount == 0:
+        session.add(DataVersion(name=name, version=initial_version(), changed_at=now))
+        session.flush()
+    version = session.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar_one()
+
+    session.info.setdefault('bumped_versions', {})[name] = version
+    _forget_versions()
+    return version
+
+
+class VersionedSnapshot(NamedTuple):
+    """A value tagged with the data-set version it was built from"""
+    version: int
+    value: Any
+
+
+def versioned_snapshot(name: str, build: Callable[[], T]) -> Callable[[], T]:
+    """
+    Return a getter of a process-wide value, rebuilt when a data set changes
+
+    build() only runs when the data set's version has moved since the last
+    build. A new snapshot replaces the old one with a single reference
+    swap, so in-flight requests keep the value they started with.
+    """
+    snapshot = None
+    lock = threading.Lock()
+
+    def get() -> T:
+        nonlocal snapshot
+        version = current_version(name)
+        current = snapshot
+        if current is not None and current.version == version:
+            return current.value
+
+        with lock:
+            current = snapshot
+            if current is None or current.version != version:
+                # Tag with the version read before building: a concurrent bump
+                # then simply triggers another rebuild on the next call
+                current = snapshot = VersionedSnapshot(version, build())
+        return current.value
+
+    return get
+
+
+def subscribe(name: str, callback) -> None:
+    """Call callback(version) after every committed bump of a data set in this process"""
+    with _lock:
+        _subscribers.setdefault(name, []).append(callback)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_subscribers(session):
+    bumped = session.info.pop('bumped_versions', None)
+    if not bumped:
+        return
+    for name, version in bumped.items():
+        with _lock:
+            callbacks = list(_subscribers.get(name, ()))
+        for callback in callbacks:
+            callback(version)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_bumps(session):
+    if session.info.pop('bumped_versions', None):
+        _forget_versions()
+
+
+@event.listens_for(DataVersion.__table__, 'after_create')
+def _seed_versions(table, connection, **kwargs):
+    now = datetime.utcnow()
+    connection.execute(table.insert(), [
+        {'name': name, 'version': initial_version(), 'changed_at': now} for name in DATA_SETS
+    ])
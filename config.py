@@ -34,6 +34,12 @@ class Config:
     # Pagination
     ITEMS_PER_PAGE = 20
     
+    # Seconds clients and CDNs may reuse catalog API responses before revalidating
+    API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', 60))
+    
+    # Rebuild the serialized catalog listings on a worker thread after each change
+    CATALOG_SNAPSHOT_BACKGROUND = True
+    
     # Admin
     ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@techadvisor.local')
 
@@ -49,6 +55,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    CATALOG_SNAPSHOT_BACKGROUND = False  # Worker threads would not see the in-memory database
 
 
 class ProductionConfig(Config):
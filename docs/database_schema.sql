@@ -69,6 +69,28 @@ CREATE TABLE IF NOT EXISTS specifications (
     INDEX idx_product_spec (product_id, spec_key)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Typed attributes parsed from specifications
+CREATE TABLE IF NOT EXISTS spec_profiles (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    product_id INT NOT NULL UNIQUE,
+    ram_gb DOUBLE NULL,
+    storage_gb DOUBLE NULL,
+    battery_mah DOUBLE NULL,
+    battery_hours DOUBLE NULL,
+    camera_mp DOUBLE NULL,
+    refresh_rate_hz DOUBLE NULL,
+    has_5g BOOLEAN NOT NULL DEFAULT FALSE,
+    processor_tier INT NULL,
+    spec_points DOUBLE NULL,
+    gaming_graphics DOUBLE NOT NULL DEFAULT 0,
+    high_ram DOUBLE NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP NOT NULL,
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+    INDEX idx_ram (ram_gb),
+    INDEX idx_storage (storage_gb),
+    INDEX idx_5g (has_5g)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Rules table
 CREATE TABLE IF NOT EXISTS rules (
     id INT PRIMARY KEY AUTO_INCREMENT,
@@ -97,6 +119,16 @@ CREATE TABLE IF NOT EXISTS rule_conditions (
     INDEX idx_type (condition_type)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Rule Actions table (derived facts asserted when a rule fires)
+CREATE TABLE IF NOT EXISTS rule_actions (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    rule_id INT NOT NULL,
+    fact_key VARCHAR(100) NOT NULL,
+    fact_value VARCHAR(255) NOT NULL,
+    FOREIGN KEY (rule_id) REFERENCES rules(id) ON DELETE CASCADE,
+    INDEX idx_rule (rule_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Audit Logs table
 CREATE TABLE IF NOT EXISTS audit_logs (
     id INT PRIMARY KEY AUTO_INCREMENT,
@@ -113,6 +145,13 @@ CREATE TABLE IF NOT EXISTS audit_logs (
     INDEX idx_created (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Change counters of cached data sets, shared by every worker
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL,
+    changed_at TIMESTAMP NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Insert default admin user (password: admin123)
 INSERT INTO users (username, email, password_hash, role) VALUES
 ('admin', 'admin@techadvisor.local', 'scrypt:32768:8:1$gFJc8sHEE6XFyySa$e1f0c8e8d8b0c1d8e8d8b0c1d8e8d8b0c1d8e8d8b0c1d8e8d8b0c1d8e8d8b0c1d8e8d8b0c1d8e8d8b0c1d8', 'admin')
@@ -0,0 +1,31 @@
+"""Add rule actions for derived facts
+
+Revision ID: 4c2d9e7a1f35
+Revises: 1bbcdce30bff
+Create Date: 2026-10-17 21:05:12.481903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c2d9e7a1f35'
+down_revision = '1bbcdce30bff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rule_actions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rule_id', sa.Integer(), nullable=False),
+    sa.Column('fact_key', sa.String(length=100), nullable=False),
+    sa.Column('fact_value', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['rule_id'], ['rules.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('rule_actions')
@@ -0,0 +1,52 @@
+"""Add spec profiles
+
+Revision ID: 7e1b3c5d9a42
+Revises: 4c2d9e7a1f35
+Create Date: 2026-10-17 22:14:37.529184
+
+Existing products get their profiles from `flask refresh-spec-profiles`,
+run after upgrading; the parser is app code that changes, so this
+migration only changes the schema.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e1b3c5d9a42'
+down_revision = '4c2d9e7a1f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('spec_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('ram_gb', sa.Float(), nullable=True),
+    sa.Column('storage_gb', sa.Float(), nullable=True),
+    sa.Column('battery_mah', sa.Float(), nullable=True),
+    sa.Column('battery_hours', sa.Float(), nullable=True),
+    sa.Column('camera_mp', sa.Float(), nullable=True),
+    sa.Column('refresh_rate_hz', sa.Float(), nullable=True),
+    sa.Column('has_5g', sa.Boolean(), nullable=False),
+    sa.Column('processor_tier', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id')
+    )
+    with op.batch_alter_table('spec_profiles', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_spec_profiles_ram_gb'), ['ram_gb'], unique=False)
+        batch_op.create_index(batch_op.f('ix_spec_profiles_storage_gb'), ['storage_gb'], unique=False)
+        batch_op.create_index(batch_op.f('ix_spec_profiles_has_5g'), ['has_5g'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('spec_profiles', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_spec_profiles_has_5g'))
+        batch_op.drop_index(batch_op.f('ix_spec_profiles_storage_gb'))
+        batch_op.drop_index(batch_op.f('ix_spec_profiles_ram_gb'))
+
+    op.drop_table('spec_profiles')
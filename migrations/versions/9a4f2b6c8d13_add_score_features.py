@@ -0,0 +1,33 @@
+"""Add precomputed score features to spec profiles
+
+Revision ID: 9a4f2b6c8d13
+Revises: 7e1b3c5d9a42
+Create Date: 2026-10-17 22:51:08.317642
+
+Scores of existing products are filled in by `flask refresh-spec-profiles`
+after upgrading; until then they are scored from their specifications.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4f2b6c8d13'
+down_revision = '7e1b3c5d9a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('spec_profiles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('spec_points', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('gaming_graphics', sa.Float(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('high_ram', sa.Float(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('spec_profiles', schema=None) as batch_op:
+        batch_op.drop_column('high_ram')
+        batch_op.drop_column('gaming_graphics')
+        batch_op.drop_column('spec_points')
@@ -0,0 +1,38 @@
+"""Add shared data version counters
+
+Revision ID: b5d8e1f3a7c2
+Revises: 9a4f2b6c8d13
+Create Date: 2026-10-18 09:12:44.602317
+
+"""
+from datetime import datetime
+import time
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d8e1f3a7c2'
+down_revision = '9a4f2b6c8d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_versions = op.create_table('data_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # Start from the clock so versions never repeat ones cached before the upgrade
+    now = datetime.utcnow()
+    op.bulk_insert(data_versions, [
+        {'name': name, 'version': time.time_ns() // 1000, 'changed_at': now}
+        for name in ('rules', 'catalog', 'processors')
+    ])
+
+
+def downgrade():
+    op.drop_table('data_versions')
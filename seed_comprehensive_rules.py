@@ -6,6 +6,7 @@ Covers: Gaming, Study, Work, Creative, Photography, General use
 from app import create_app, db
 from app.models.rule import Rule, RuleCondition
 from app.models.product import Category
+from app.utils.versioning import RULES, bump_version
 
 
 def clear_existing_rules():
@@ -442,6 +443,7 @@ def seed_enhanced_rules():
             print("  [OK] Creative Laptop - Entry Level")
             rules_created += 1
         
+        bump_version(RULES)
         db.session.commit()
         
         # Summary
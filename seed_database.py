@@ -6,6 +6,8 @@ from app import create_app, db
 from app.models.user import User
 from app.models.role import Role
 from app.models.product import Brand, Category, Product, Specification
+from app.services.spec_profiles import refresh_spec_profile
+from app.utils.versioning import CATALOG, bump_version
 from werkzeug.security import generate_password_hash
 import random
 
@@ -164,9 +166,12 @@ def seed_all():
                     db.session.flush() # Get ID
                     
                     # Add specs
+                    specs = []
                     for k, v in p_data['specs'].items():
                         spec = Specification(product_id=product.id, spec_key=k, spec_value=v)
                         db.session.add(spec)
+                        specs.append(spec)
+                    refresh_spec_profile(product, specs)
                         
                     print(f"   ✓ Product '{p_data['name']}' created")
                 else:
@@ -174,6 +179,7 @@ def seed_all():
             else:
                 print(f"   ℹ Product '{p_data['name']}' already exists")
         
+        bump_version(CATALOG)
         db.session.commit()
         print("\n✅ Database seeding completed successfully!")
         print("\nLogin Credentials:")
@@ -4,6 +4,8 @@ Run with: python seed_products.py
 """
 from app import create_app, db
 from app.models.product import Brand, Category, Product, Specification
+from app.services.spec_profiles import refresh_spec_profile
+from app.utils.versioning import CATALOG, bump_version
 from decimal import Decimal
 
 def seed_products():
@@ -1110,6 +1112,7 @@ def seed_products():
             db.session.flush()
             
             # Add specifications
+            specs = []
             for spec_key, spec_value in phone_data['specs'].items():
                 spec = Specification(
                     product_id=product.id,
@@ -1117,6 +1120,8 @@ def seed_products():
                     spec_value=spec_value
                 )
                 db.session.add(spec)
+                specs.append(spec)
+            refresh_spec_profile(product, specs)
             
             print(f"  ✓ Added: {phone_data['name']} - ${phone_data['price']}")
         
@@ -1148,6 +1153,7 @@ def seed_products():
             db.session.flush()
             
             # Add specifications
+            specs = []
             for spec_key, spec_value in laptop_data['specs'].items():
                 spec = Specification(
                     product_id=product.id,
@@ -1155,10 +1161,13 @@ def seed_products():
                     spec_value=spec_value
                 )
                 db.session.add(spec)
+                specs.append(spec)
+            refresh_spec_profile(product, specs)
             
             print(f"  ✓ Added: {laptop_data['name']} - ${laptop_data['price']}")
         
-        # Commit all changes
+        # Commit all changes, telling running workers to reload the catalog
+        bump_version(CATALOG)
         db.session.commit()
         
         # Display summary
@@ -5,6 +5,7 @@ Run with: python seed_rules.py
 from app import create_app, db
 from app.models.rule import Rule, RuleCondition
 from app.models.product import Category
+from app.utils.versioning import RULES, bump_version
 
 def seed_sample_rules():
     """Create sample rules for testing recommendations"""
@@ -191,6 +192,7 @@ def seed_sample_rules():
         else:
             print(f"  ℹ Rule exists: {rule5.name}")
         
+        bump_version(RULES)
         db.session.commit()
         
         total_rules = Rule.query.count()
@@ -2,10 +2,12 @@
 Test fixtures and configuration for pytest
 """
 import pytest
+from sqlalchemy import event
 from app import create_app, db
 from app.models.user import User
 from app.models.product import Product, Brand, Category, Specification
 from app.models.rule import Rule, RuleCondition
+from app.utils.versioning import RULES, CATALOG, bump_version
 
 
 @pytest.fixture(scope='session')
@@ -34,6 +36,14 @@ def db_session(app):
         db.session.rollback()
 
 
+@pytest.fixture(autouse=True)
+def invalidate_caches(app):
+    """Invalidate process-wide snapshots so each test sees its own data"""
+    bump_version(RULES)
+    bump_version(CATALOG)
+    db.session.commit()
+
+
 @pytest.fixture
 def sample_categories(db_session):
     """Create sample categories"""
@@ -196,8 +206,21 @@ def admin_user(db_session):
 def authenticated_client(client, admin_user):
     """Create authenticated client"""
     client.post('/auth/login', data={
-        'email': 'admin@test.com',
+        'username': 'admin',
         'password': 'admin123'
     }, follow_redirects=True)
     
     return client
+
+
+@pytest.fixture
+def count_queries(app):
+    """List collecting every SQL statement run while the test is active"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', record)
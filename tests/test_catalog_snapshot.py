@@ -0,0 +1,101 @@
+"""
+Tests for the catalog snapshot
+Pre-serialized listings match the database path and rebuild on catalog changes
+"""
+import contextvars
+import gzip
+import json
+import pytest
+from app import db
+from app.models.product import Specification
+from app.services import catalog_snapshot
+from app.services.catalog_snapshot import CatalogSnapshots, build_snapshot
+from app.services.product_listing import listing_query, fetch_page
+from app.utils.versioning import CATALOG, bump_version, current_version
+
+
+@pytest.mark.unit
+class TestCatalogSnapshot:
+    """Test cases for catalog snapshots"""
+    
+    def test_listings_match_queries(self, db_session, sample_products):
+        """Test that every filter's pages hold what the listing query returns"""
+        phone = sample_products['phone1']
+        db_session.add(Specification(product_id=phone.id, spec_key='RAM', spec_value='8GB'))
+        db_session.commit()
+        snapshot = build_snapshot(current_version(CATALOG))
+        
+        for category, brand in ((None, None), ('Smartphone', None), ('laptop', 'Dell'), ('Laptop', 'Samsung'),
+                                ('Tablet', None)):
+            expected = [product.to_dict() for product in fetch_page(listing_query(category, brand), None, 100)]
+            listing = snapshot.listing(category, brand)
+            
+            body, next_cursor = listing.page(None, 100)
+            assert json.loads(body) == expected
+            assert next_cursor is None
+            ndjson, encoding = listing.stream(None, ['gzip'])
+            assert encoding == 'gzip'
+            assert [json.loads(line) for line in gzip.decompress(ndjson).splitlines()] == expected
+    
+    def test_pages_after_cursor(self, sample_products):
+        """Test that pages are keyset slices with a cursor while more follow"""
+        ids = sorted(product.id for product in sample_products.values())
+        listing = build_snapshot(current_version(CATALOG)).listing()
+        
+        body, next_cursor = listing.page(ids[0], 2)
+        assert [product['id'] for product in json.loads(body)] == ids[1:3]
+        assert next_cursor == ids[2]
+        body, encoding = listing.stream(ids[1], ['gzip'])
+        assert encoding is None
+        assert [json.loads(line)['id'] for line in body.splitlines()] == ids[2:]
+    
+    def test_background_rebuild(self, app, sample_products, monkeypatch):
+        """Test that requests never build and fall back until a rebuild has finished"""
+        class InlineThread:
+            def __init__(self, target, **kwargs):
+                self.target = target
+            
+            def start(self):
+                self.target()
+        
+        monkeypatch.setattr(catalog_snapshot.threading, 'Thread', InlineThread)
+        snapshots = CatalogSnapshots()
+        assert snapshots.get() is None  # Not bound to an app, so nothing is scheduled
+        
+        snapshots.app = app
+        version = bump_version(CATALOG)
+        db.session.commit()
+        snapshots.schedule(version)
+        assert snapshots.get().version == current_version(CATALOG)
+        assert len(snapshots.get().listing('Laptop').ids) == 2
+    
+    def test_background_rebuild_catches_up(self, app, sample_products, monkeypatch):
+        """Test that a rebuild on a worker thread picks up a bump made while it was building"""
+        class ContextlessThread:
+            # Runs inline, but like a real thread without the test's app context
+            def __init__(self, target, **kwargs):
+                self.target = target
+            
+            def start(self):
+                contextvars.Context().run(self.target)
+        
+        builds = []
+        
+        def build_and_bump(version):
+            builds.append(version)
+            if len(builds) == 1:
+                bump_version(CATALOG)
+                db.session.commit()
+            return build_snapshot(version)
+        
+        monkeypatch.setattr(catalog_snapshot.threading, 'Thread', ContextlessThread)
+        monkeypatch.setattr(catalog_snapshot, 'build_snapshot', build_and_bump)
+        snapshots = CatalogSnapshots()
+        snapshots.app = app
+        
+        snapshots.schedule(current_version(CATALOG))
+        
+        app.preprocess_request()
+        assert len(builds) == 2
+        assert snapshots.get().version == current_version(CATALOG)
+        assert not snapshots._rebuilding
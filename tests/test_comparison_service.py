@@ -1,6 +1,7 @@
 
 import pytest
-from app.services.comparison_service import ComparisonService
+from app.services.comparison_service import ComparisonService, ComparisonCache
+from app.services.spec_profiles import refresh_spec_profile
 from app.models.product import Product, Brand, Category, Specification
 from decimal import Decimal
 
@@ -30,6 +31,7 @@ class MockProduct:
         self.category_id = 1
         self.image_url = "http://example.com/image.jpg"
         self.description = "Test Description"
+        self.updated_at = 1
         self.specifications = [MockSpec(k, v) for k, v in specs.items()]
 
 @pytest.fixture
@@ -136,3 +138,135 @@ def test_compare_two_products_flow(comparison_service, products):
     assert 'comparative_advantages' in result
     assert result['product1']['id'] == 1
     assert result['product2']['id'] == 2
+
+def test_stored_score_features_match_specs(comparison_service, db_session, sample_products):
+    laptop = sample_products['laptop1']
+    specs = [
+        Specification(product_id=laptop.id, spec_key='RAM', spec_value='16GB'),
+        Specification(product_id=laptop.id, spec_key='SSD', spec_value='512GB'),
+        Specification(product_id=laptop.id, spec_key='Graphics', spec_value='NVIDIA RTX 4050'),
+        Specification(product_id=laptop.id, spec_key='Display', spec_value='13.4 OLED')
+    ]
+    db_session.add_all(specs)
+    refresh_spec_profile(laptop, specs)
+    db_session.commit()
+    
+    category_name = laptop.category.name.lower()
+    assert comparison_service.product_score_features(laptop) == \
+        comparison_service.score_features(category_name, laptop.specifications)
+    
+    for prefs in ({}, {"budget": 1500, "usage_type": "gaming"}, {"budget": 1000, "usage_type": "business"},
+                  {"preferred_brand": "dell", "usage_type": "professional"}):
+        stored = comparison_service.calculate_overall_score(laptop, prefs)
+        laptop.spec_profile.spec_points = None  # Force scoring from the specifications
+        parsed = comparison_service.calculate_overall_score(laptop, prefs)
+        db_session.refresh(laptop.spec_profile)
+        assert stored == parsed
+
+def test_preference_weights(comparison_service):
+    assert comparison_service.preference_weights({}) == (1.0, 0.0, 0.0)
+    assert comparison_service.preference_weights({"usage_type": "Gaming"}) == (1.0, 15.0, 0.0)
+    assert comparison_service.preference_weights({"usage_type": "business"}) == (1.0, 0.0, 15.0)
+
+def test_compare_products_pairwise_matches_two_way(comparison_service, products):
+    p1, p2 = products
+    p3 = MockProduct(
+        id=3,
+        name="Mid Phone",
+        price=699.99,
+        brand="BrandA",
+        category="Smartphone",
+        specs={"Processor": "Snapdragon 8 Gen 1", "RAM": "12GB", "Storage": "512GB"}
+    )
+    user_prefs = {"budget": 800, "usage_type": "gaming"}
+    
+    result = comparison_service.compare_products([p1, p2, p3], user_prefs)
+    
+    assert [entry['id'] for entry in result['products']] == [1, 2, 3]
+    assert [pair['product_ids'] for pair in result['pairwise']] == [[1, 2], [1, 3], [2, 3]]
+    for pair, (first, second) in zip(result['pairwise'], [(p1, p2), (p1, p3), (p2, p3)]):
+        two_way = comparison_service.compare_two_products(first, second, user_prefs)
+        assert pair['advantages'] == two_way['comparative_advantages']
+        assert pair['winner'] == two_way['winner']
+        assert pair['winner_reason'] == two_way['winner_reason']
+
+def test_compare_products_dimension_winners(comparison_service, products):
+    p1, p2 = products
+    p3 = MockProduct(
+        id=3,
+        name="Mid Phone",
+        price=499.99,
+        brand="BrandA",
+        category="Smartphone",
+        specs={"Processor": "Snapdragon 8 Gen 1", "RAM": "12GB", "Storage": "512GB"}
+    )
+    
+    dimensions = comparison_service.compare_products([p1, p2, p3])['dimensions']
+    
+    assert dimensions['Price']['winners'] == [2, 3]
+    assert dimensions['RAM']['winners'] == [1, 3]
+    assert dimensions['Storage']['winners'] == [3]
+    assert dimensions['Battery']['winners'] == [1]
+    assert dimensions['Processor']['winners'] == [1, 3]
+
+def test_compare_products_limits(comparison_service, products):
+    p1, p2 = products
+    with pytest.raises(ValueError):
+        comparison_service.compare_products([p1])
+    with pytest.raises(ValueError):
+        comparison_service.compare_products([p1, p2, p1, p2, p1])
+
+def test_comparison_cache_splits_preference_parts(products):
+    p1, p2 = products
+    cache = ComparisonCache()
+    service = ComparisonService(cache=cache)
+    
+    first = service.compare_products([p1, p2], {"budget": 1000, "usage_type": "Gaming"})
+    # Same preferences in another form and order share every cached part
+    assert service.compare_products([p1, p2], {"budget": "1000", "usage_type": "gaming"}) == first
+    assert cache.stats()['analyses']['hits'] == 1
+    assert cache.stats()['assessments']['hits'] == 1
+    
+    # Other preferences reuse the preference-independent analysis only
+    service.compare_products([p2, p1], {"budget": 600})
+    assert cache.stats()['analyses']['hits'] == 2
+    assert cache.stats()['assessments']['misses'] == 2
+    
+    assert first == ComparisonService().compare_products([p1, p2], {"budget": 1000, "usage_type": "gaming"})
+
+def test_comparison_cache_invalidated_by_updates(products):
+    p1, p2 = products
+    cache = ComparisonCache()
+    service = ComparisonService(cache=cache)
+    
+    before = service.compare_products([p1, p2])
+    before['products'][0]['pros'].append("Changed by caller")
+    p1.updated_at = 2
+    p1.specifications[1].spec_value = "16GB"
+    after = service.compare_products([p1, p2])
+    
+    assert cache.stats()['analyses']['misses'] == 2
+    assert "Changed by caller" not in after['products'][0]['pros']
+    assert after['products'][0]['specifications']['RAM'] == "16GB"
+
+def test_scoring_reads_spec_profile_values(comparison_service, db_session, sample_products):
+    laptop1, laptop2 = sample_products['laptop1'], sample_products['laptop2']
+    for laptop, storage, processor in ((laptop1, '1TB SSD', 'Intel Core i5'), (laptop2, '512GB SSD', 'Intel Core i7')):
+        specs = [
+            Specification(product_id=laptop.id, spec_key='Storage', spec_value=storage),
+            Specification(product_id=laptop.id, spec_key='Processor', spec_value=processor)
+        ]
+        db_session.add_all(specs)
+        refresh_spec_profile(laptop, specs)
+    db_session.commit()
+    
+    # 1TB is compared as 1024GB, not as the first number in the text
+    assert "Ample storage space: 1TB SSD" in comparison_service.extract_pros(laptop1, {})
+    assert comparison_service.product_score_features(laptop1)['spec_points'] == 10
+    advantages = comparison_service.get_comparative_advantages(laptop1, laptop2)
+    assert advantages['Storage']['winner'] == 1
+    assert advantages['Processor']['winner'] == 2
+    
+    # Processor tiers come from the stored profile
+    laptop1.spec_profile.processor_tier = 10
+    assert comparison_service.get_comparative_advantages(laptop1, laptop2)['Processor']['winner'] == 1
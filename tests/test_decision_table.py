@@ -0,0 +1,115 @@
+"""
+Tests for the budget decision table
+Every table lookup must equal the InferenceEngine result
+"""
+import random
+from decimal import Decimal
+import pytest
+from app import db
+from app.models.rule import RuleCondition
+from app.services.decision_table import DecisionTable, get_decision_table
+from app.services.inference_engine import InferenceEngine
+from app.services.rule_network import RuleNetwork, CompiledRule, CompiledCondition
+from app.utils.versioning import RULES, bump_version
+
+
+USAGES = ['gaming', 'work', 'study', 'general', 'creative']
+NUMERIC = ['less_than', '<', 'greater_than', '>', 'less_equal', '<=', 'greater_equal', '>=']
+THRESHOLDS = [300, 500, 799.99, 1000, 1500]
+
+
+def random_rules(rng, count):
+    """Build random rules over category, usage type, budget and a derived segment"""
+    rules = []
+    for rule_id in range(1, count + 1):
+        conditions = []
+        for _ in range(rng.randint(0, 3)):
+            kind = rng.choice(['budget', 'budget', 'usage_type', 'category', 'segment'])
+            if kind == 'budget':
+                conditions.append(CompiledCondition('budget', rng.choice(NUMERIC), str(rng.choice(THRESHOLDS))))
+            elif kind == 'usage_type':
+                operator = rng.choice(['equals', 'in', 'not_equals', 'contains'])
+                value = ', '.join(rng.sample(USAGES, 2)) if operator == 'in' else rng.choice(USAGES)
+                conditions.append(CompiledCondition('usage_type', operator, value))
+            elif kind == 'category':
+                conditions.append(CompiledCondition('category', 'equals', rng.choice(['smartphone', 'laptop'])))
+            else:
+                conditions.append(CompiledCondition('segment', 'equals', rng.choice(['budget', 'premium'])))
+        actions = ()
+        if rng.random() < 0.2:
+            actions = (('segment', rng.choice(['budget', 'premium'])),)
+        rules.append(CompiledRule(rule_id, f'Rule {rule_id}', None, rng.choice([None, 1, 2]),
+                                  rng.randint(1, 100), True, tuple(conditions), actions))
+    return rules
+
+
+@pytest.mark.unit
+class TestDecisionTable:
+    """Parity between table lookups and the inference engine"""
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_parity_with_engine(self, seed):
+        """Test random rule sets and budgets on, between and beyond thresholds"""
+        rng = random.Random(seed)
+        network = RuleNetwork(random_rules(rng, 30))
+        table = DecisionTable(network, [(1, 'Smartphone'), (2, 'Laptop')])
+        engine = InferenceEngine(network)
+
+        budgets = THRESHOLDS + [0, 299.5, 800, 10000, -5, Decimal('799.99'), '500', '650.5']
+        for _ in range(300):
+            category_id, category = rng.choice([(1, 'smartphone'), (2, 'Laptop'), (None, None)])
+            facts = {
+                'category': category,
+                'category_id': category_id,
+                'budget': rng.choice(budgets + [rng.uniform(0, 2000)]),
+                'usage_type': rng.choice(USAGES + ['Gaming', 'other', None]),
+            }
+            matched = table.lookup(facts)
+            expected = engine.infer(facts)
+            assert matched is not None
+            assert [rule.id for rule in matched] == [rule.id for rule in expected], facts
+
+    def test_rows_precomputed_for_rule_usage_types(self):
+        """Test that rows exist for every category and usage type the rules mention"""
+        rules = [
+            CompiledRule(1, 'Gaming', None, 1, 50, True,
+                         (CompiledCondition('usage_type', 'in', 'gaming, creative'),
+                          CompiledCondition('budget', '>=', '500')))
+        ]
+        table = DecisionTable(RuleNetwork(rules), [(1, 'Smartphone'), (2, 'Laptop')])
+
+        assert len(table.rows) == 4
+        assert table.boundaries == [500.0]
+
+    def test_falls_back_to_engine(self):
+        """Test that questionnaires outside the table's axes are not answered"""
+        rules = [
+            CompiledRule(1, 'Brand', None, None, 50, True,
+                         (CompiledCondition('preferred_brand', 'equals', 'apple'),)),
+            CompiledRule(2, 'Budget', None, None, 50, True,
+                         (CompiledCondition('budget', '<', '500'),)),
+        ]
+        table = DecisionTable(RuleNetwork(rules))
+
+        assert table.lookup({'budget': 400, 'preferred_brand': 'apple'}) is None
+        assert table.lookup({'budget': 'cheap'}) is None
+        assert [rule.id for rule in table.lookup({'budget': 400, 'preferred_brand': None})] == [2]
+
+        text_budget = [CompiledRule(1, 'Exact', None, None, 50, True,
+                                    (CompiledCondition('budget', 'equals', '500'),))]
+        assert DecisionTable(RuleNetwork(text_budget)).lookup({'budget': 500}) is None
+
+    def test_rebuilt_when_rules_change(self, db_session, sample_categories, sample_rules):
+        """Test that the shared table picks up edited rules after a version bump"""
+        facts = {'category': 'smartphone', 'category_id': sample_categories['smartphone'].id,
+                 'budget': 450, 'usage_type': 'gaming'}
+
+        assert [rule.name for rule in get_decision_table().lookup(facts)] == ['Gaming Smartphone']
+
+        condition = RuleCondition.query.filter_by(rule_id=sample_rules['phone_gaming'].id,
+                                                  condition_key='budget').first()
+        condition.condition_value = '500'
+        db.session.commit()
+        bump_version(RULES)
+
+        assert get_decision_table().lookup(facts) == []
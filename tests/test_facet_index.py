@@ -0,0 +1,78 @@
+"""
+Tests for the facet index
+Bitset filters and counts against a brute-force scan
+"""
+import random
+import pytest
+from app.models.product import Specification
+from app.services.facet_index import FACETS, FacetIndex, FacetRow, facet_values, get_facet_index
+from app.services.spec_profiles import refresh_spec_profile
+from app.utils.versioning import CATALOG, bump_version
+
+
+@pytest.fixture
+def rows():
+    """Pseudo-random catalog rows, some without parsed sizes"""
+    generator = random.Random(7)
+    return [FacetRow(id, generator.choice([1, 2]), generator.choice([1, 2, 3]),
+                     generator.choice([199.0, 300.0, 599.99, 999.0, 1299.0, 2499.0]),
+                     generator.choice([None, 4.0, 8.0, 12.0, 16.0]),
+                     generator.choice([None, 128.0, 256.0, 512.0, 1024.0]),
+                     generator.random() < 0.5)
+            for id in range(1, 300, 3)]
+
+
+@pytest.mark.unit
+class TestFacetIndex:
+    """Test cases for FacetIndex"""
+    
+    def test_filters_and_counts_match_scan(self, rows):
+        """Test bitset ANDs and popcounts against checking every row"""
+        index = FacetIndex(rows)
+        
+        def passes(row, filters, exclude=None):
+            values = facet_values(row)
+            return all(values.get(facet) in chosen for facet, chosen in filters.items() if facet != exclude)
+        
+        for filters in ({}, {'brand': {1}}, {'brand': {1, 3}, 'ram': {'8', '16'}},
+                        {'price': {'under-300', '1500-plus'}, '5g': {'yes'}, 'storage': {'256'}},
+                        {'category': {2}, 'brand': {2}, 'ram': {'4'}, '5g': {'no'}}):
+            expected = [row.id for row in rows if passes(row, filters)]
+            assert index.ids_of(index.select(filters)).tolist() == expected
+            
+            counts = index.counts(filters)
+            for facet in FACETS:
+                scan = {}
+                for row in rows:
+                    value = facet_values(row).get(facet)
+                    if value is not None and passes(row, filters, exclude=facet):
+                        scan[value] = scan.get(value, 0) + 1
+                assert {value: count for value, count in counts[facet].items() if count} == scan
+    
+    def test_parse_filters(self, rows):
+        """Test that request values become facet values"""
+        index = FacetIndex(rows, {1: 'Smartphone', 2: 'Laptop'}, {1: 'Samsung', 2: 'Dell', 3: 'Apple'})
+        
+        filters = index.parse_filters({'brand': ['samsung', 'Nokia'], 'ram': ['8.0', 'lots'], '5g': ['Yes'],
+                                       'price': ['300-600'], 'category': []})
+        assert filters == {'brand': {1}, 'ram': {'8'}, '5g': {'yes'}, 'price': {'300-600'}}
+        assert index.parse_filters({'brand': ['Nokia']}) == {'brand': set()}
+        assert index.select({'brand': set()}) == 0
+        assert index.ids_of(0).tolist() == []
+    
+    def test_built_from_catalog(self, db_session, sample_products):
+        """Test that sizes and 5G come from the parsed specifications"""
+        phone = sample_products['phone2']
+        specs = [Specification(product_id=phone.id, spec_key='RAM', spec_value='8GB'),
+                 Specification(product_id=phone.id, spec_key='Network', spec_value='5G')]
+        db_session.add_all(specs)
+        refresh_spec_profile(phone, specs)
+        sample_products['laptop2'].is_active = False
+        db_session.commit()
+        bump_version(CATALOG)
+        
+        index = get_facet_index()
+        assert len(index) == 3
+        assert index.ids_of(index.select({'ram': {'8'}, '5g': {'yes'}})).tolist() == [phone.id]
+        assert index.counts({})['price'] == {'300-600': 1, '600-1000': 1, '1000-1500': 1}
+        assert index.name_id('brand', 'DELL') == sample_products['laptop1'].brand_id
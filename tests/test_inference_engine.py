@@ -2,8 +2,17 @@
 Unit tests for Inference Engine
 Tests the forward chaining logic and rule matching
 """
+import random
 import pytest
+from sqlalchemy import event
+from app import db
+from app.models.rule import Rule, RuleCondition, RuleAction
 from app.services.inference_engine import InferenceEngine
+from app.services.rule_network import (
+    RuleNetwork, CompiledRule, CompiledCondition, InvalidConditionError,
+    compile_condition, get_rule_network
+)
+from app.utils.versioning import RULES, bump_version
 
 
 @pytest.mark.unit
@@ -133,3 +142,194 @@ class TestInferenceEngine:
         if len(matched_rules) > 1:
             for i in range(len(matched_rules) - 1):
                 assert matched_rules[i].priority >= matched_rules[i+1].priority
+
+
+@pytest.mark.unit
+class TestRuleNetwork:
+    """Test cases for the compiled rule network"""
+    
+    def test_shared_alpha_nodes(self):
+        """Test that identical conditions share one alpha node"""
+        gaming = CompiledCondition('usage_type', 'equals', 'gaming')
+        rules = [
+            CompiledRule(1, 'A', None, None, 50, True, (gaming,)),
+            CompiledRule(2, 'B', None, None, 60, True, (gaming, CompiledCondition('budget', '>=', '500'))),
+        ]
+        network = RuleNetwork(rules)
+        
+        assert len(network.alpha_index['usage_type']) == 1
+        assert network.alpha_index['usage_type'][0].successors == [0, 1]
+        
+        matched = network.match({'usage_type': 'Gaming', 'budget': 800})
+        assert [rule.name for rule in matched] == ['B', 'A']
+        
+        matched = network.match({'usage_type': 'gaming', 'budget': 100})
+        assert [rule.name for rule in matched] == ['A']
+    
+    def test_compile_condition_parses_operands(self):
+        """Test that conditions are parsed once into typed operands"""
+        budget = compile_condition(CompiledCondition('budget', '>=', '400'))
+        usage = compile_condition(CompiledCondition('usage_type', 'in', 'Gaming, work'))
+        
+        assert budget.operator == 'greater_equal'
+        assert budget.operand == 400.0
+        assert usage.operand == frozenset({'gaming', 'work'})
+        assert compile_condition(CompiledCondition('usage_type', '==', 'Gaming')).signature == \
+            compile_condition(CompiledCondition('usage_type', 'equals', 'gaming')).signature
+    
+    def test_compile_condition_rejects_invalid_values(self):
+        """Test that invalid operators and thresholds fail at compile time"""
+        with pytest.raises(InvalidConditionError):
+            compile_condition(CompiledCondition('budget', 'in_range', '100-500'))
+        with pytest.raises(InvalidConditionError):
+            compile_condition(CompiledCondition('budget', 'less_than', 'cheap'))
+        
+        rules = [CompiledRule(1, 'Broken', None, None, 50, True, (CompiledCondition('budget', '<', 'cheap'),))]
+        network = RuleNetwork(rules)
+        assert network.rules == []
+        assert network.invalid_rules[0][0].name == 'Broken'
+    
+    def test_discrimination_index_matches_linear_scan(self):
+        """Test that indexed matching fires exactly the rules a linear scan would"""
+        rng = random.Random(42)
+        operators = ['equals', 'in', 'not_equals', 'contains', '<', '<=', '>', '>=']
+        usages = ['gaming', 'work', 'study', 'general', 'creative']
+        
+        rules = []
+        for rule_id in range(1, 301):
+            conditions = []
+            for _ in range(rng.randint(0, 3)):
+                op = rng.choice(operators)
+                if op in ('<', '<=', '>', '>='):
+                    conditions.append(CompiledCondition('budget', op, str(rng.randrange(100, 3000, 50))))
+                elif op == 'in':
+                    conditions.append(CompiledCondition('usage_type', op, ','.join(rng.sample(usages, 2))))
+                else:
+                    conditions.append(CompiledCondition('usage_type', op, rng.choice(usages)))
+            rules.append(CompiledRule(rule_id, f'Rule {rule_id}', None, None, rng.randint(1, 100), True, tuple(conditions)))
+        
+        network = RuleNetwork(rules)
+        engine = InferenceEngine()
+        
+        for _ in range(200):
+            facts = {'usage_type': rng.choice(usages), 'budget': rng.randrange(50, 3200, 25)}
+            expected = {rule.id for rule in rules
+                        if all(engine.evaluate_condition(c, facts) for c in rule.conditions)}
+            assert {rule.id for rule in network.match(facts)} == expected
+    
+    def test_unconditional_and_inactive_rules(self):
+        """Test rules without conditions always fire and inactive rules never do"""
+        rules = [
+            CompiledRule(1, 'Fallback', None, None, 10, True, ()),
+            CompiledRule(2, 'Disabled', None, None, 90, False, ()),
+        ]
+        network = RuleNetwork(rules)
+        
+        assert [rule.name for rule in network.match({})] == ['Fallback']
+    
+    def test_match_does_not_query_database(self, app, sample_rules, sample_categories):
+        """Test that a loaded network matches facts without any SQL"""
+        network = RuleNetwork.load()
+        smartphone_id = sample_categories['smartphone'].id
+        statements = []
+        
+        def count_statement(*args):
+            statements.append(args)
+        
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            matched = network.match(
+                {'usage_type': 'gaming', 'budget': 500},
+                category_id=smartphone_id
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+        
+        assert [rule.name for rule in matched] == ['Gaming Smartphone']
+        assert statements == []
+
+    def test_snapshot_reloads_only_on_version_change(self, app, sample_rules):
+        """Test that the shared network is rebuilt only after a version bump"""
+        network = get_rule_network()
+        assert get_rule_network() is network
+        assert len(network) == 2
+        
+        sample_rules['laptop_work'].is_active = False
+        db.session.commit()
+        assert get_rule_network() is network
+        
+        bump_version(RULES)
+        reloaded = get_rule_network()
+        assert reloaded is not network
+        assert [rule.name for rule in reloaded.rules] == ['Gaming Smartphone']
+
+
+@pytest.mark.unit
+class TestForwardChaining:
+    """Test cases for forward chaining with derived facts"""
+    
+    def test_derived_facts_fire_dependent_rules(self):
+        """Test that a fired rule's conclusion can fire another rule"""
+        rules = [
+            CompiledRule(1, 'Premium Buyer', None, None, 50, True,
+                         (CompiledCondition('budget', '>=', '1500'),),
+                         (('segment', 'premium'),)),
+            CompiledRule(2, 'Premium Gamer', None, None, 80, True,
+                         (CompiledCondition('segment', 'equals', 'premium'),
+                          CompiledCondition('usage_type', 'equals', 'gaming'))),
+        ]
+        facts = {'budget': 2000, 'usage_type': 'gaming'}
+        
+        fired = RuleNetwork(rules).run(facts)
+        
+        assert [rule.name for rule in fired] == ['Premium Buyer', 'Premium Gamer']
+        assert facts['segment'] == 'premium'
+    
+    def test_agenda_order_and_retraction(self):
+        """Test that higher priority fires first and can retract pending rules"""
+        rules = [
+            CompiledRule(1, 'Gaming', None, None, 10, True,
+                         (CompiledCondition('usage_type', 'equals', 'gaming'),)),
+            CompiledRule(2, 'Reclassify', None, None, 90, True,
+                         (CompiledCondition('budget', '<', '300'),),
+                         (('usage_type', 'general'),)),
+        ]
+        
+        fired = RuleNetwork(rules).run({'budget': 200, 'usage_type': 'gaming'})
+        
+        assert [rule.name for rule in fired] == ['Reclassify']
+    
+    def test_refraction_stops_cycles(self):
+        """Test that mutually triggering rules each fire at most once"""
+        rules = [
+            CompiledRule(1, 'Ping', None, None, 50, True,
+                         (CompiledCondition('state', 'equals', 'a'),), (('state', 'b'),)),
+            CompiledRule(2, 'Pong', None, None, 50, True,
+                         (CompiledCondition('state', 'equals', 'b'),), (('state', 'a'),)),
+        ]
+        
+        fired = RuleNetwork(rules).run({'state': 'a'})
+        
+        assert [rule.name for rule in fired] == ['Ping', 'Pong']
+        assert len(RuleNetwork(rules).run({'state': 'a'}, max_firings=1)) == 1
+    
+    def test_infer_chains_rule_actions(self, db_session, sample_rules, sample_categories):
+        """Test that actions stored in the database take part in inference"""
+        smartphone_id = sample_categories['smartphone'].id
+        db_session.add(RuleAction(rule_id=sample_rules['phone_gaming'].id,
+                                  fact_key='segment', fact_value='performance'))
+        follow_up = Rule(name='Performance Follow-up', category_id=smartphone_id,
+                         priority=90, is_active=True)
+        db_session.add(follow_up)
+        db_session.commit()
+        db_session.add(RuleCondition(rule_id=follow_up.id, condition_type='derived',
+                                     condition_key='segment', operator='equals',
+                                     condition_value='performance'))
+        db_session.commit()
+        bump_version(RULES)
+        
+        engine = InferenceEngine()
+        matched = engine.infer({'category_id': smartphone_id, 'usage_type': 'gaming', 'budget': 500})
+        
+        assert [rule.name for rule in matched] == ['Performance Follow-up', 'Gaming Smartphone']
+        assert engine.working_memory['segment'] == 'performance'
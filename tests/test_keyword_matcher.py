@@ -0,0 +1,46 @@
+"""
+Unit tests for the keyword matcher
+Every match must equal testing each keyword with a substring check
+"""
+import random
+import pytest
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.spec_parser import SPEC_SECTIONS, SPEC_SECTION_MATCHER
+
+
+@pytest.mark.unit
+class TestKeywordMatcher:
+    """Test cases for the compiled keyword matcher"""
+    
+    def test_overlapping_keywords(self):
+        """Test that keywords inside and overlapping longer ones are all found"""
+        matcher = KeywordMatcher({'ram': ['ram', 'ram speed'], 'am': ['am'], 'wifi': ['wifi 6', 'wi-fi 6']})
+        
+        assert matcher.match('RAM Speed') == {'ram', 'am'}
+        assert matcher.match('Wi-Fi 6E') == {'wifi'}
+        assert matcher.match('Bluetooth') == frozenset()
+        assert matcher.match('') == frozenset()
+    
+    def test_matches_substring_checks(self):
+        """Test random keyword groups against the nested any() scans they replace"""
+        rng = random.Random(0)
+        alphabet = 'ab 6-'
+        for _ in range(500):
+            groups = {f'group{i}': [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                                    for _ in range(3)] for i in range(4)}
+            matcher = KeywordMatcher(groups)
+            text = ''.join(rng.choice(alphabet + 'AB') for _ in range(rng.randint(0, 20)))
+            
+            expected = {label for label, keywords in groups.items()
+                        if any(keyword.lower() in text.lower() for keyword in keywords)}
+            assert matcher.match(text) == expected, (groups, text)
+    
+    def test_first_label_in_group_order(self):
+        """Test that product detail sections keep their first-match priority"""
+        assert SPEC_SECTION_MATCHER.first('Front Camera') == 'Camera'
+        assert SPEC_SECTION_MATCHER.first('Charging Power') == 'Battery & Power'
+        assert SPEC_SECTION_MATCHER.first('Colour') is None
+        for key in ['SSD Storage', 'Display Resolution', 'Battery Weight', 'OS Build']:
+            expected = next(section for section, keywords in SPEC_SECTIONS.items()
+                            if any(keyword.lower() in key.lower() for keyword in keywords))
+            assert SPEC_SECTION_MATCHER.first(key) == expected
@@ -3,8 +3,9 @@ Unit tests for Data Models
 Tests Product, Category, Brand, Rule, and RuleCondition models
 """
 import pytest
-from app.models.product import Product, Brand, Category
+from app.models.product import Product, Brand, Category, Specification, SpecProfile
 from app.models.rule import Rule, RuleCondition
+from app.services.spec_profiles import refresh_spec_profile
 
 
 @pytest.mark.unit
@@ -42,6 +43,39 @@ class TestProductModel:
         )
         
         assert product.price > 0
+    
+    def test_refresh_spec_profile(self, db_session, sample_products):
+        """Test that parsed spec values are stored and filterable"""
+        phone = sample_products['phone1']
+        specs = [
+            Specification(product_id=phone.id, spec_key='RAM', spec_value='8GB'),
+            Specification(product_id=phone.id, spec_key='Storage', spec_value='1TB'),
+            Specification(product_id=phone.id, spec_key='Network', spec_value='5G')
+        ]
+        db_session.add_all(specs)
+        refresh_spec_profile(phone, specs)
+        db_session.commit()
+        
+        assert phone.spec_profile.ram_gb == 8.0
+        assert phone.spec_profile.storage_gb == 1024.0
+        assert phone.spec_profile.has_5g is True
+        
+        matches = Product.query.join(SpecProfile).filter(SpecProfile.storage_gb >= 512).all()
+        assert matches == [phone]
+    
+    def test_refresh_spec_profiles_command(self, app, db_session, sample_products):
+        """Test that the CLI command backfills profiles of products written before them"""
+        laptop = sample_products['laptop1']
+        db_session.add(Specification(product_id=laptop.id, spec_key='RAM', spec_value='16GB'))
+        db_session.commit()
+        assert laptop.spec_profile is None
+        
+        result = app.test_cli_runner().invoke(args=['refresh-spec-profiles'])
+        
+        assert 'Refreshed spec profiles of 4 products' in result.output
+        assert laptop.spec_profile.ram_gb == 16.0
+        assert laptop.spec_profile.spec_points is not None
+        assert laptop.spec_profile.high_ram == 1
 
 
 @pytest.mark.unit
@@ -0,0 +1,116 @@
+"""
+Unit tests for the processor catalog
+Tests tier lookups, name normalization, memoization and reloading
+"""
+import contextvars
+import json
+import pytest
+from app.models.product import Specification
+from app.services.spec_profiles import refresh_spec_profile
+from app.utils.processor_catalog import ProcessorCatalog, get_processor_catalog, reload_processor_catalog
+from app.utils.versioning import CATALOG, current_version
+
+
+@pytest.fixture
+def catalog():
+    """Catalog read from the shipped data file"""
+    return ProcessorCatalog.load()
+
+
+@pytest.mark.unit
+class TestProcessorCatalog:
+    """Test cases for processor tiering"""
+    
+    def test_known_families_keep_tiers(self, catalog):
+        """Test that processors the old if-chain knew keep their tiers"""
+        assert catalog.tier('Intel Core i9-13900H') == 9
+        assert catalog.tier('Intel Core i7') == 7
+        assert catalog.tier('Core i5-1235U') == 5
+        assert catalog.tier('i3') == 3
+        assert catalog.tier('AMD Ryzen 7 5700U') == 7
+        assert catalog.tier('Apple M2') == 8
+        assert catalog.tier('M1') == 7
+        assert catalog.tier('Snapdragon 8 Gen 2') == 8
+        assert catalog.tier('Snapdragon 7s Gen 3') == 6
+    
+    def test_mobile_socs_ranked(self, catalog):
+        """Test that SoCs the if-chain defaulted to 5 are ranked"""
+        assert catalog.tier('MediaTek Dimensity 9300') > catalog.tier('MediaTek Dimensity 6100+')
+        assert catalog.tier('A17 Pro Chip') > catalog.tier('Unisoc T606')
+        assert catalog.tier('Apple M3 Pro') > catalog.tier('Apple M3')
+        assert catalog.match('Google Tensor G3') == (7, 'Tensor G3 / G4')
+    
+    def test_variants_keep_tier_with_suffix(self, catalog):
+        """Test that Pro / Max / Elite variants outrank their family when the name goes on"""
+        assert catalog.tier('Apple M3 Pro 12-core') == catalog.tier('Apple M3 Pro') == 10
+        assert catalog.tier('Apple M2 Max 38-core GPU') == 9
+        assert catalog.tier('Snapdragon 8 Elite for Galaxy') == 9
+        assert catalog.tier('Snapdragon X Elite X1E-78-100') == 8
+        assert catalog.tier('A18 Pro 6-core') == 9
+    
+    def test_normalization(self, catalog):
+        """Test vendor names, unicode dashes and alternatives"""
+        assert catalog.normalize('Intel® Core™ i3‑1315U Processor') == 'core i3-1315u'
+        assert catalog.tier('Intel Core i3‑1315U') == 3
+        assert catalog.tier('AMD Ryzen 5 / Intel Core i9-14900HX') == 9
+        assert catalog.match('Mystery Chip 3000') == (catalog.default_tier, None)
+    
+    def test_memoized_per_name(self, catalog):
+        """Test that repeated names are answered from the LRU"""
+        catalog.tier('Snapdragon 8 Elite')
+        catalog.tier('Snapdragon 8 Elite')
+        
+        assert catalog.cache.hits == 1
+        assert catalog.cache.misses == 1
+    
+    def test_reload_without_restart(self, tmp_path):
+        """Test that a reloaded data file is used by later lookups"""
+        path = tmp_path / 'processors.json'
+        path.write_text(json.dumps({
+            'default_tier': 4,
+            'models': {'Snapdragon 8 Gen 2': 10},
+            'families': [{'name': 'Snapdragon', 'pattern': 'snapdragon', 'tier': 6}]
+        }))
+        version = current_version(CATALOG)
+        
+        try:
+            reload_processor_catalog(str(path))
+            assert get_processor_catalog().tier('Snapdragon 8 Gen 2') == 10
+            assert get_processor_catalog().tier('Snapdragon 7') == 6
+            assert get_processor_catalog().tier('Intel Core i7') == 4
+            assert current_version(CATALOG) != version
+        finally:
+            reload_processor_catalog()
+        
+        assert get_processor_catalog().tier('Intel Core i7') == 7
+    
+    def test_reload_rerates_stored_profiles(self, tmp_path, db_session, sample_products):
+        """Test that stored processor tiers follow a reloaded catalog"""
+        phone = sample_products['phone1']
+        specs = [Specification(product_id=phone.id, spec_key='Processor', spec_value='Snapdragon 8 Gen 2')]
+        db_session.add_all(specs)
+        refresh_spec_profile(phone, specs)
+        db_session.commit()
+        assert phone.spec_profile.processor_tier == 8
+        
+        path = tmp_path / 'processors.json'
+        path.write_text(json.dumps({'families': [{'name': 'Snapdragon', 'pattern': 'snapdragon', 'tier': 6}]}))
+        try:
+            reload_processor_catalog(str(path))
+            assert phone.spec_profile.processor_tier == 6
+        finally:
+            reload_processor_catalog()
+        assert phone.spec_profile.processor_tier == 8
+    
+    def test_batch_resolves_catalog_once(self, app, db_session, sample_products, count_queries):
+        """Test that refreshing many profiles outside a request reads the processors version once"""
+        for product in sample_products.values():
+            db_session.add(Specification(product_id=product.id, spec_key='CPU', spec_value='Intel Core i7'))
+        db_session.commit()
+        del count_queries[:]
+        
+        # A fresh context, like the CLI's: no request caches the versions
+        result = contextvars.Context().run(app.test_cli_runner().invoke, args=['refresh-spec-profiles'])
+        
+        assert 'Refreshed spec profiles of 4 products' in result.output
+        assert len([statement for statement in count_queries if statement.startswith('SELECT data_versions.name')]) == 1
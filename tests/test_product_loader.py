@@ -0,0 +1,45 @@
+"""
+Tests for the product bundle loader
+Products come back in request order from a single query
+"""
+import pytest
+from app.models.product import Specification
+from app.services.product_loader import load_product_bundle
+from app.services.spec_profiles import refresh_spec_profile
+
+
+@pytest.mark.unit
+class TestProductLoader:
+    """Test cases for load_product_bundle"""
+    
+    def test_request_order_in_one_query(self, db_session, sample_products, count_queries):
+        """Test that everything a comparison reads is loaded by one SELECT"""
+        for product in sample_products.values():
+            db_session.add_all([
+                Specification(product_id=product.id, spec_key='RAM', spec_value='8GB'),
+                Specification(product_id=product.id, spec_key='Storage', spec_value='256GB')
+            ])
+            refresh_spec_profile(product)
+        db_session.commit()
+        db_session.expire_all()
+        ids = [sample_products['laptop1'].id, sample_products['phone2'].id, sample_products['phone1'].id]
+        
+        del count_queries[:]
+        products = load_product_bundle(ids + [ids[0]])
+        for product in products:
+            product.brand.name, product.category.name, product.spec_profile
+            assert [spec.spec_key for spec in product.specifications] == ['RAM', 'Storage']
+        
+        assert [product.id for product in products] == ids
+        assert len(count_queries) == 1
+    
+    def test_skips_unknown_and_inactive(self, db_session, sample_products):
+        """Test that missing ids are dropped and inactive ones only on request"""
+        phone = sample_products['phone1']
+        phone.is_active = False
+        db_session.commit()
+        ids = [phone.id, 99999, sample_products['laptop2'].id]
+        
+        assert [product.id for product in load_product_bundle(ids)] == [phone.id, sample_products['laptop2'].id]
+        assert [product.id for product in load_product_bundle(ids, active_only=True)] == [sample_products['laptop2'].id]
+        assert load_product_bundle([]) == []
@@ -0,0 +1,109 @@
+"""
+Tests for vectorized candidate ranking
+Vectorized scores must equal ComparisonService.calculate_overall_score
+"""
+import random
+from decimal import Decimal
+import numpy as np
+import pytest
+from app.models.product import Specification
+from app.services.comparison_service import ComparisonService, SCORE_FEATURES
+from app.services.ranking import CandidateSet, score_candidates, top_k
+from app.services.recommendation_service import RecommendationService
+from app.services.spec_profiles import refresh_spec_profile
+
+
+class Spec:
+    def __init__(self, key, value):
+        self.spec_key = key
+        self.spec_value = value
+
+
+class Named:
+    def __init__(self, name):
+        self.name = name
+
+
+class Candidate:
+    def __init__(self, product_id, price, brand, category, specs):
+        self.id = product_id
+        self.price = Decimal(price)
+        self.brand = Named(brand)
+        self.category = Named(category)
+        self.specifications = [Spec(k, v) for k, v in specs]
+
+
+SPEC_KEYS = ['RAM', 'Storage', 'SSD', 'Graphics', 'Display', 'Network']
+SPEC_VALUES = ['4GB', '8GB', '16GB', '32GB', '128GB', '512GB', '1TB', 'NVIDIA RTX 4060',
+               'Integrated', 'Dedicated 8GB', 'OLED', '5G', 'LCD']
+
+
+def random_candidates(rng, count):
+    """Build random products and their candidate columns"""
+    service = ComparisonService()
+    products = [
+        Candidate(product_id, f'{rng.randint(100, 3000)}.{rng.randint(0, 99):02d}',
+                  rng.choice(['Apple', 'Dell', 'Samsung']), rng.choice(['Laptop', 'Smartphone']),
+                  [(rng.choice(SPEC_KEYS), rng.choice(SPEC_VALUES)) for _ in range(rng.randint(0, 5))])
+        for product_id in range(1, count + 1)
+    ]
+    features = [service.score_features(p.category.name.lower(), p.specifications) for p in products]
+    candidates = CandidateSet(
+        np.array([p.id for p in products], dtype=np.int64),
+        np.array([float(p.price) for p in products], dtype=np.float64),
+        np.array([p.brand.name.lower() for p in products], dtype=object),
+        np.array([[f[name] for name in SCORE_FEATURES] for f in features], dtype=np.float64)
+    )
+    return products, candidates
+
+
+@pytest.mark.unit
+class TestRanking:
+    """Parity of vectorized scoring and top-k selection"""
+    
+    @pytest.mark.parametrize('seed', range(3))
+    def test_scores_match_scalar(self, seed):
+        """Test that every vectorized score equals the scalar score"""
+        rng = random.Random(seed)
+        service = ComparisonService()
+        products, candidates = random_candidates(rng, 200)
+        
+        for preferences in ({'usage_type': ''}, {'budget': 1000, 'usage_type': 'gaming'},
+                            {'budget': '750', 'usage_type': 'business', 'preferred_brand': 'Dell'},
+                            {'budget': 'cheap', 'usage_type': 'professional', 'preferred_brand': 'apple'}):
+            scores = score_candidates(candidates, preferences, service)
+            expected = [service.calculate_overall_score(p, preferences) for p in products]
+            assert scores.tolist() == expected
+    
+    @pytest.mark.parametrize('seed', range(3))
+    def test_top_k_matches_full_sort(self, seed):
+        """Test that partial selection equals sorting by score, price and id"""
+        rng = random.Random(seed)
+        _, candidates = random_candidates(rng, 500)
+        scores = np.array([rng.choice([10.0, 20.0, 30.0, 40.0]) for _ in range(500)])
+        mask = candidates.prices <= 2000
+        
+        for k in (0, 1, 9, 50, 1000):
+            eligible = [i for i in range(500) if mask[i]]
+            expected = sorted(eligible, key=lambda i: (-scores[i], candidates.prices[i], candidates.ids[i]))[:k]
+            assert top_k(candidates, scores, k, mask).tolist() == expected
+    
+    def test_best_product_beats_cheaper_ones(self, db_session, sample_products, sample_categories, sample_rules):
+        """Test that ranking looks past the cheapest products"""
+        flagship = sample_products['phone2']
+        specs = [
+            Specification(product_id=flagship.id, spec_key='RAM', spec_value='12GB'),
+            Specification(product_id=flagship.id, spec_key='Storage', spec_value='512GB'),
+            Specification(product_id=flagship.id, spec_key='Display', spec_value='AMOLED')
+        ]
+        db_session.add_all(specs)
+        refresh_spec_profile(flagship, specs)
+        db_session.commit()
+        
+        results = RecommendationService().get_recommendations({
+            'category_id': sample_categories['smartphone'].id,
+            'budget': 1000,
+            'usage_type': 'gaming'
+        }, limit=1)
+        
+        assert [p['name'] for p in results['products']] == ['Samsung Galaxy S23']
@@ -2,8 +2,13 @@
 Unit tests for Recommendation Service
 Tests the recommendation logic and explanation facility
 """
+import contextvars
+import time
 import pytest
+from app.models.product import Specification
 from app.services.recommendation_service import RecommendationService
+from app.utils.cache import LRUCache
+from app.utils.versioning import CATALOG, bump_version
 
 
 @pytest.mark.unit
@@ -162,3 +167,159 @@ class TestRecommendationService:
         
         features = service._extract_key_features(product)
         assert isinstance(features, str)
+    
+    def test_batch_matches_single_requests(self, sample_products, sample_categories, sample_rules):
+        """Test that batch recommendations equal one-by-one recommendations"""
+        service = RecommendationService()
+        
+        smartphone_id = sample_categories['smartphone'].id
+        laptop_id = sample_categories['laptop'].id
+        user_inputs = [
+            {'category_id': smartphone_id, 'budget': 1000, 'usage_type': 'gaming'},
+            {'category_id': smartphone_id, 'budget': 500, 'usage_type': 'gaming'},
+            {'category_id': smartphone_id, 'budget': 100, 'usage_type': 'gaming'},
+            {'category_id': laptop_id, 'budget': 2000, 'usage_type': 'work', 'preferred_brand': 'dell'},
+            {'category_id': laptop_id, 'budget': 2000, 'usage_type': 'gaming'},
+        ]
+        
+        batch = service.get_recommendations_batch(iter(user_inputs), limit=1)
+        
+        assert not isinstance(batch, list)
+        for user_input, result in zip(user_inputs, batch):
+            assert result == service.get_recommendations(user_input, limit=1)
+
+    def test_batch_query_count_independent_of_size(self, app, count_queries, sample_products,
+                                                   sample_categories, sample_rules):
+        """Test that a batch resolves its shared state once, outside any request"""
+        service = RecommendationService()
+        
+        smartphone_id = sample_categories['smartphone'].id
+        laptop_id = sample_categories['laptop'].id
+        user_inputs = [
+            {'category_id': smartphone_id, 'budget': 1000, 'usage_type': 'gaming', 'preferred_brand': 'Samsung'},
+            {'category_id': smartphone_id, 'budget': 500, 'usage_type': 'gaming'},
+            {'category_id': laptop_id, 'budget': 2000, 'usage_type': 'work', 'preferred_brand': 'dell'},
+        ]
+        
+        def run_batch(inputs):
+            with app.app_context():
+                return list(service.get_recommendations_batch(inputs, limit=2))
+        
+        def batch_count(inputs):
+            del count_queries[:]
+            results = contextvars.Context().run(run_batch, inputs)
+            return len(count_queries), results
+        
+        batch_count(user_inputs)  # Warm the rule-set snapshot and catalog caches
+        small_count, small = batch_count(user_inputs)
+        large_count, large = batch_count(user_inputs * 20)
+        
+        assert large == small * 20
+        assert large_count == small_count
+    
+    def test_query_count_independent_of_limit(self, db_session, count_queries, sample_products, sample_categories,
+                                              sample_rules):
+        """Test that fetching more products does not add per-product queries"""
+        service = RecommendationService()
+        
+        smartphone_id = sample_categories['smartphone'].id
+        for product in sample_products.values():
+            db_session.add(Specification(product_id=product.id, spec_key='RAM', spec_value='8GB'))
+            db_session.add(Specification(product_id=product.id, spec_key='Storage', spec_value='128GB'))
+        db_session.commit()
+        
+        user_input = {
+            'category_id': smartphone_id,
+            'budget': 2000,
+            'usage_type': 'gaming',
+            'preferred_brand': 'Samsung'
+        }
+        service.get_recommendations(user_input, limit=1)  # Warm the rule-set snapshot
+        
+        def recommend(limit):
+            db_session.expire_all()
+            del count_queries[:]
+            results = service.get_recommendations(user_input, limit=limit)
+            return len(count_queries), results
+        
+        single_count, single = recommend(1)
+        many_count, many = recommend(10)
+        
+        assert len(single['products']) == 1
+        assert len(many['products']) == 2
+        assert all(len(p['specifications']) == 2 for p in many['products'])
+        assert many_count == single_count
+
+
+@pytest.mark.unit
+class TestRecommendationCache:
+    """Test cases for the recommendation result cache"""
+    
+    def test_equivalent_questionnaires_share_entry(self, sample_products, sample_categories, sample_rules):
+        """Test that differently written but equivalent answers hit one cache entry"""
+        cache = LRUCache(maxsize=10)
+        service = RecommendationService(cache=cache)
+        user_input = {'category_id': sample_categories['smartphone'].id, 'usage_type': 'Gaming'}
+        
+        first = service.get_recommendations(dict(user_input, budget=500), limit=5)
+        second = service.get_recommendations(dict(user_input, budget='500.0', usage_type='gaming'), limit=5)
+        
+        assert first == second
+        assert cache.hits == 1
+        assert len(cache) == 1
+        assert second == RecommendationService().get_recommendations(dict(user_input, budget=500), limit=5)
+    
+    def test_budgets_share_entry_per_rule_interval(self, sample_products, sample_categories, sample_rules):
+        """Test that budgets between the same rule thresholds share an entry but keep exact results"""
+        cache = LRUCache(maxsize=10)
+        service = RecommendationService(cache=cache)
+        uncached = RecommendationService()
+        user_input = {'category_id': sample_categories['smartphone'].id, 'usage_type': 'gaming'}
+        
+        # 400 is the only rule threshold; 450 and 899.99 are product prices
+        for budget in (399, 400, 420, 450, 451, 899.99, 900):
+            result = service.get_recommendations(dict(user_input, budget=budget), limit=5)
+            assert result == uncached.get_recommendations(dict(user_input, budget=budget), limit=5)
+        
+        assert len(cache) == 3
+        assert cache.hits == 4
+    
+    def test_catalog_change_invalidates(self, db_session, sample_products, sample_categories, sample_rules):
+        """Test that bumping the catalog version makes cached results unreachable"""
+        cache = LRUCache(maxsize=10)
+        service = RecommendationService(cache=cache)
+        user_input = {'category_id': sample_categories['smartphone'].id, 'budget': 1000, 'usage_type': 'gaming'}
+        
+        before = service.get_recommendations(user_input, limit=5)
+        sample_products['phone1'].is_active = False
+        db_session.commit()
+        bump_version(CATALOG)
+        after = service.get_recommendations(user_input, limit=5)
+        
+        assert len(after['products']) == len(before['products']) - 1
+        assert cache.hits == 0
+    
+    def test_results_are_copies(self, sample_products, sample_categories, sample_rules):
+        """Test that mutating a returned result does not alter the cached one"""
+        service = RecommendationService(cache=LRUCache(maxsize=10))
+        user_input = {'category_id': sample_categories['smartphone'].id, 'budget': 1000, 'usage_type': 'gaming'}
+        
+        service.get_recommendations(user_input, limit=5)['products'].clear()
+        
+        assert service.get_recommendations(user_input, limit=5)['products']
+    
+    def test_lru_eviction_and_ttl(self, monkeypatch):
+        """Test that the cache evicts least recently used and expired entries"""
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 61)
+        assert cache.get('a') is None
+        assert cache.stats()['size'] == 1
@@ -2,7 +2,14 @@
 Integration tests for routes
 Tests user-facing and admin routes
 """
+import gzip
+import json
 import pytest
+from datetime import timezone
+from sqlalchemy import update
+from app import db
+from app.models.data_version import DataVersion
+from app.utils.versioning import CATALOG, bump_version, current_version
 
 
 @pytest.mark.integration
@@ -34,6 +41,199 @@ class TestUserRoutes:
         assert response.status_code == 200
         # Should show results
         assert b'recommendation' in response.data.lower() or b'product' in response.data.lower()
+    
+    def test_product_detail(self, client, sample_products):
+        """Test product detail page and unknown products"""
+        response = client.get(f"/product/{sample_products['phone1'].id}")
+        assert response.status_code == 200
+        assert b'Samsung Galaxy A54' in response.data
+        
+        assert client.get('/product/99999').status_code == 404
+    
+    def test_compare_merges_spec_synonyms(self, client, db_session, sample_products):
+        """Test that the comparison table puts RAM and Memory on one row"""
+        from app.models.product import Specification
+        phone1, phone2 = sample_products['phone1'], sample_products['phone2']
+        db_session.add_all([
+            Specification(product_id=phone1.id, spec_key='RAM', spec_value='8GB'),
+            Specification(product_id=phone2.id, spec_key='Memory', spec_value='12GB')
+        ])
+        db_session.commit()
+        
+        response = client.get(f'/compare?ids={phone1.id},{phone2.id}')
+        assert response.status_code == 200
+        assert b'<span>RAM</span>' in response.data
+        assert b'<span>Memory</span>' not in response.data
+        assert b'12GB' in response.data
+
+
+@pytest.mark.integration
+class TestApiRoutes:
+    """Test JSON API routes"""
+    
+    def test_compare_api(self, client, sample_products):
+        """Test N-way comparison keeps the requested order"""
+        ids = [sample_products['laptop2'].id, sample_products['phone1'].id, sample_products['phone2'].id]
+        response = client.get('/api/compare?ids=' + ','.join(str(product_id) for product_id in ids))
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [product['id'] for product in data['products']] == ids
+        assert len(data['pairwise']) == 3
+        assert data['dimensions']['Price']['winners'] == [sample_products['phone1'].id]
+    
+    def test_compare_api_validates_ids(self, client, sample_products):
+        """Test comparison rejects too few and unknown products"""
+        assert client.get(f"/api/compare?ids={sample_products['phone1'].id}").status_code == 400
+        assert client.get(f"/api/compare?ids={sample_products['phone1'].id},99999").status_code == 404
+    
+    def test_products_keyset_pages(self, client, sample_products):
+        """Test that following the Link header walks every product once"""
+        url, seen = '/api/products?limit=3', []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen.extend(product['id'] for product in response.get_json())
+            link = response.headers.get('Link')
+            url = link[1:link.index('>')] if link else None
+        
+        assert seen == sorted(product.id for product in sample_products.values())
+        assert client.get('/api/products?limit=0').status_code == 400
+        assert client.get('/api/products?cursor=abc').status_code == 400
+    
+    def test_products_ndjson_stream(self, client, sample_products):
+        """Test that the NDJSON mode streams one product per line after the cursor"""
+        first = min(product.id for product in sample_products.values())
+        response = client.get(f'/api/products?format=ndjson&cursor={first}&category=Laptop')
+        
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line)['name'] for line in lines] == ['Dell XPS 13', 'Dell Inspiron 15']
+        
+        response = client.get('/api/products', headers={'Accept': 'application/x-ndjson'})
+        assert len(response.get_data(as_text=True).splitlines()) == len(sample_products)
+    
+    def test_products_filter_names_ignore_case(self, client, sample_products, monkeypatch):
+        """Test that category and brand names match case-insensitively from the snapshot and the database"""
+        from app.services.catalog_snapshot import catalog_snapshots
+        
+        def names(url):
+            return [product['name'] for product in client.get(url).get_json()]
+        
+        for path in ('snapshot', 'database'):
+            if path == 'database':
+                monkeypatch.setattr(catalog_snapshots, 'get', lambda: None)
+            assert names('/api/products?category=laptop') == ['Dell XPS 13', 'Dell Inspiron 15'], path
+            assert names('/api/products?brand=DELL') == ['Dell XPS 13', 'Dell Inspiron 15'], path
+            assert len(names('/api/products?category=tablet')) == len(sample_products), path
+    
+    def test_products_precompressed_stream(self, client, sample_products):
+        """Test that whole NDJSON listings are sent precompressed when accepted"""
+        response = client.get('/api/products?format=ndjson&brand=Dell', headers={'Accept-Encoding': 'gzip'})
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        lines = gzip.decompress(response.data).splitlines()
+        assert [json.loads(line)['name'] for line in lines] == ['Dell XPS 13', 'Dell Inspiron 15']
+        
+        filtered = client.get('/api/products?min_ram=0', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in filtered.headers
+    
+    def test_catalog_conditional_get(self, client, sample_products, count_queries):
+        """Test that a matching If-None-Match gets a 304 after reading only the data versions"""
+        for url in ('/api/products?category=Laptop', f"/api/products/{sample_products['phone1'].id}",
+                    '/api/brands', '/api/categories'):
+            response = client.get(url)
+            etag = response.headers['ETag']
+            assert response.status_code == 200
+            assert 'max-age' in response.headers['Cache-Control']
+            assert 'Last-Modified' in response.headers
+            
+            del count_queries[:]
+            revalidated = client.get(url, headers={'If-None-Match': etag})
+            assert revalidated.status_code == 304
+            assert revalidated.headers['ETag'] == etag
+            assert len(count_queries) == 1 and 'data_versions' in count_queries[0]
+        
+        other = client.get('/api/products?category=Smartphone').headers['ETag']
+        assert other != client.get('/api/products?category=Laptop').headers['ETag']
+    
+    def test_catalog_etag_changes_with_catalog(self, client, sample_products):
+        """Test that a catalog write invalidates previously issued ETags"""
+        etag = client.get('/api/brands').headers['ETag']
+        bump_version(CATALOG)
+        
+        response = client.get('/api/brands', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    
+    def test_catalog_validators_come_from_shared_version(self, app, client, sample_products):
+        """Test that ETag and Last-Modified name the version every worker reads"""
+        response = client.get('/api/categories')
+        row = db.session.get(DataVersion, CATALOG)
+        
+        assert response.headers['ETag'].strip('"').startswith(f'{row.version}-')
+        assert response.last_modified == row.changed_at.replace(microsecond=0, tzinfo=timezone.utc)
+        
+        # A write committed by another worker only changes the shared row
+        db.session.execute(update(DataVersion).where(DataVersion.name == CATALOG)
+                           .values(version=DataVersion.version + 1))
+        db.session.commit()
+        revalidated = client.get('/api/categories', headers={'If-None-Match': response.headers['ETag']})
+        assert revalidated.status_code == 200
+    
+    def test_search(self, client, sample_products):
+        """Test ranked search results with category and brand facets"""
+        response = client.get('/api/search?q=samsng+galaxy&limit=1')
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        assert data['total'] == 2
+        assert len(data['results']) == 1
+        assert data['results'][0]['brand'] == 'Samsung'
+        assert data['facets']['brand'] == [{'id': sample_products['phone1'].brand_id, 'name': 'Samsung', 'count': 2}]
+        assert data['facets']['category'][0]['name'] == 'Smartphone'
+        
+        data = client.get('/api/search?q=dell&category=Smartphone').get_json()
+        assert data['total'] == 0
+        assert data['facets']['category'] == [{'id': sample_products['laptop1'].category_id, 'name': 'Laptop', 'count': 2}]
+        assert client.get('/api/search?q=').status_code == 400
+        
+        assert client.get('/api/search?q=dell&category=laptop&brand=DELL').get_json()['total'] == 2
+        assert client.get('/api/search?q=dell&brand=Delll').status_code == 400
+    
+    def test_suggest(self, client, sample_products):
+        """Test autocomplete of brands and product names"""
+        data = client.get('/api/suggest?q=de').get_json()
+        assert data['suggestions'][0] == {'text': 'Dell', 'kind': 'brand', 'id': sample_products['laptop1'].brand_id}
+        
+        data = client.get('/api/suggest?q=ga&kind=product&limit=1').get_json()
+        assert [suggestion['text'] for suggestion in data['suggestions']] == ['Samsung Galaxy A54']
+        assert client.get('/api/suggest?q=ga&kind=rule').status_code == 400
+    
+    def test_facets(self, client, sample_products):
+        """Test facet filtering with counts under the other facets' filters"""
+        data = client.get('/api/facets?brand=Samsung,Dell&price=300-600&limit=1').get_json()
+        
+        assert data['total'] == 2
+        assert [product['name'] for product in data['products']] == ['Samsung Galaxy A54']
+        assert data['next_cursor'] == sample_products['phone1'].id
+        assert data['facets']['brand'] == [
+            {'value': 'Dell', 'count': 1, 'id': sample_products['laptop1'].brand_id},
+            {'value': 'Samsung', 'count': 1, 'id': sample_products['phone1'].brand_id}
+        ]
+        assert [entry['value'] for entry in data['facets']['price']] == ['300-600', '600-1000', '1000-1500']
+        
+        data = client.get(f"/api/facets?brand=Samsung&brand=Dell&price=300-600&cursor={data['next_cursor']}").get_json()
+        assert [product['name'] for product in data['products']] == ['Dell Inspiron 15']
+    
+    def test_compare_analysis_group(self, client, sample_products):
+        """Test Pros & Cons analysis renders for more than 2 products"""
+        ids = ','.join(str(product.id) for product in sample_products.values())
+        response = client.get(f'/compare-analysis?ids={ids}')
+        
+        assert response.status_code == 200
+        assert b'Head-to-Head' in response.data
 
 
 @pytest.mark.integration
@@ -51,6 +251,42 @@ class TestAdminRoutes:
         response = client.get('/admin/rules')
         assert response.status_code == 302 or response.status_code == 401
     
+    def test_products_search(self, authenticated_client, sample_products):
+        """Test that the admin product search finds products by word prefix"""
+        response = authenticated_client.get('/admin/products?search=inspir')
+        assert response.status_code == 200
+        assert b'Dell Inspiron 15' in response.data
+        assert b'Dell XPS 13' not in response.data
+    
+    def test_products_search_matches_every_token(self, authenticated_client, sample_products):
+        """Test that the admin search neither lists everything nor falls back to any token"""
+        response = authenticated_client.get('/admin/products?search=inspiron+a54')
+        assert b'Dell Inspiron 15' not in response.data
+        assert b'Samsung Galaxy A54' not in response.data
+    
+    def test_products_search_without_tokens_matches_names(self, authenticated_client, db_session, sample_products):
+        """Test that a search without tokens falls back to a name match instead of listing nothing"""
+        sample_products['phone2'].name = 'Samsung Galaxy S23+'
+        db_session.commit()
+        
+        response = authenticated_client.get('/admin/products?search=%2B')
+        assert b'Samsung Galaxy S23+' in response.data
+        assert b'Dell Inspiron 15' not in response.data
+        
+        response = authenticated_client.get('/admin/products?search=--')
+        assert b'Samsung Galaxy S23+' not in response.data
+        assert b'Dell Inspiron 15' not in response.data
+    
+    def test_status_toggle_updates_search(self, authenticated_client, sample_products):
+        """Test that admin writes update the search index in place"""
+        from app.services.search_index import search_index
+        phone = sample_products['phone1']
+        assert authenticated_client.get('/api/search?q=a54').get_json()['total'] == 1
+        
+        authenticated_client.post(f'/admin/products/{phone.id}/toggle-status')
+        assert search_index.version == current_version(CATALOG)  # Updated in place, no rebuild pending
+        assert authenticated_client.get('/api/search?q=a54').get_json()['total'] == 0
+    
     def test_products_page_requires_auth(self, client):
         """Test that products page requires authentication"""
         response = client.get('/admin/products')
@@ -0,0 +1,108 @@
+"""
+Tests for the search index
+BM25 ranking, prefix and typo matching, facets and incremental updates
+"""
+import pytest
+from app.models.product import Specification
+from app.services.search_index import SearchIndex, tokenize, within_one_edit
+from app.utils.versioning import CATALOG, bump_version, current_version
+
+
+@pytest.fixture
+def index(db_session, sample_products):
+    """Index built from the sample products, with a few specifications"""
+    db_session.add_all([
+        Specification(product_id=sample_products['phone2'].id, spec_key='Processor', spec_value='Snapdragon 8 Gen 2'),
+        Specification(product_id=sample_products['laptop1'].id, spec_key='Display', spec_value='13.4 inch OLED')
+    ])
+    db_session.commit()
+    index = SearchIndex()
+    index.rebuild()
+    return index
+
+
+def ids(result):
+    return [product_id for product_id, _ in result.hits]
+
+
+@pytest.mark.unit
+class TestSearchIndex:
+    """Test cases for SearchIndex"""
+    
+    def test_tokenize(self):
+        """Test that tokens are lower-cased, accent-folded words and numbers"""
+        assert tokenize('Galaxy S23 Ultra, 6.8" Écran') == ['galaxy', 's23', 'ultra', '6.8', 'ecran']
+        assert tokenize(None) == []
+    
+    def test_within_one_edit(self):
+        """Test the single edit check, including adjacent swaps"""
+        assert within_one_edit('samsung', 'samsnug')
+        assert within_one_edit('galaxy', 'galxy')
+        assert within_one_edit('dell', 'dells')
+        assert within_one_edit('xps', 'xqs')
+        assert not within_one_edit('inspiron', 'inspirion2')
+        assert not within_one_edit('dell', 'ledl')
+    
+    def test_ranks_name_matches_first(self, index, sample_products):
+        """Test BM25 ranking, with every-token matches before partial ones"""
+        result = index.search('galaxy s23')
+        assert ids(result) == [sample_products['phone2'].id]
+        
+        result = index.search('samsung galaxy')
+        assert set(ids(result)) == {sample_products['phone1'].id, sample_products['phone2'].id}
+        
+        # No product has both tokens, so products with either are ranked
+        assert set(ids(index.search('xps inspiron'))) == {sample_products['laptop1'].id, sample_products['laptop2'].id}
+        assert ids(index.search('xps inspiron', any_fallback=False)) == []
+    
+    def test_prefix_and_typo_matching(self, index, sample_products):
+        """Test that partial words and single typos still match"""
+        assert ids(index.search('snapdr')) == [sample_products['phone2'].id]
+        assert set(ids(index.search('insp'))) == {sample_products['laptop2'].id}
+        assert set(ids(index.search('samsnug'))) == {sample_products['phone1'].id, sample_products['phone2'].id}
+        assert ids(index.search('zzzz')) == []
+    
+    def test_facets(self, index, sample_products, sample_categories, sample_brands):
+        """Test that each facet counts matches under the other facet's filter"""
+        laptop = sample_categories['laptop'].id
+        dell = sample_brands['dell'].id
+        
+        result = index.search('dell samsung')
+        assert result.facets['brand'] == {dell: 2, sample_brands['samsung'].id: 2}
+        
+        result = index.search('dell samsung', category_id=laptop)
+        assert result.total == 2
+        assert result.facets['category'] == {laptop: 2, sample_categories['smartphone'].id: 2}
+        assert result.facets['brand'] == {dell: 2}
+    
+    def test_incremental_updates_match_rebuild(self, db_session, index, sample_products, sample_brands):
+        """Test that write-path updates leave the index as a rebuild would"""
+        phone = sample_products['phone1']
+        phone.name = 'Samsung Galaxy Z Fold'
+        phone.is_active = False
+        brand = sample_brands['dell']
+        brand.name = 'Alienware'
+        db_session.commit()
+        
+        index.index_product(phone, bump_version(CATALOG))
+        index.index_brand(brand, bump_version(CATALOG))
+        index.remove_product(sample_products['laptop2'].id, bump_version(CATALOG))
+        assert index.version == current_version(CATALOG)
+        
+        rebuilt = SearchIndex()
+        rebuilt.rebuild(p for p in [phone, sample_products['phone2'], sample_products['laptop1']])
+        for query in ('fold', 'galaxy', 'alienware', 'dell', 'inspiron', 'oled'):
+            for active_only in (True, False):
+                assert index.search(query, active_only=active_only) == rebuilt.search(query, active_only=active_only)
+        assert ids(index.search('fold')) == []
+        assert ids(index.search('fold', active_only=False)) == [phone.id]
+    
+    def test_missed_write_forces_rebuild(self, index, sample_products):
+        """Test that an update after an unseen catalog write waits for the rebuild"""
+        bump_version(CATALOG)
+        index.remove_product(sample_products['phone1'].id, bump_version(CATALOG))
+        
+        assert index.version != current_version(CATALOG)
+        index.ensure_current()
+        assert index.version == current_version(CATALOG)
+        assert sample_products['phone1'].id in ids(index.search('a54'))
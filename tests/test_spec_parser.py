@@ -0,0 +1,72 @@
+"""
+Unit tests for the specification parser
+Tests typed attributes parsed from free-text specification values
+"""
+import pytest
+from app.utils.spec_parser import parse_number, parse_capacity_gb, parse_spec_profile
+
+
+@pytest.mark.unit
+class TestSpecParser:
+    """Test cases for specification parsing"""
+    
+    def test_parse_number(self):
+        """Test that the first number is extracted like the comparison service did"""
+        assert parse_number('12GB LPDDR5') == 12.0
+        assert parse_number('6.7 inch 120Hz') == 6.7
+        assert parse_number('Integrated') is None
+        assert parse_number('Integrated', 0) == 0
+    
+    def test_parse_capacity_units(self):
+        """Test that sizes are normalized to gigabytes"""
+        assert parse_capacity_gb('512GB SSD') == 512
+        assert parse_capacity_gb('1TB NVMe') == 1024
+        assert parse_capacity_gb('512MB') == 0.5
+        assert parse_capacity_gb('N/A') is None
+    
+    def test_phone_profile(self):
+        """Test a smartphone specification sheet"""
+        profile = parse_spec_profile([
+            ('Processor', 'Snapdragon 8 Gen 3'),
+            ('RAM', '12GB'),
+            ('Storage', '256GB'),
+            ('Battery', '5000 mAh'),
+            ('Camera', '200MP + 12MP + 10MP'),
+            ('Display', '6.8 QHD+ AMOLED 120Hz'),
+            ('Network', '5G')
+        ])
+        
+        assert profile == {
+            'ram_gb': 12.0,
+            'storage_gb': 256.0,
+            'battery_mah': 5000.0,
+            'battery_hours': None,
+            'camera_mp': 200.0,
+            'refresh_rate_hz': 120.0,
+            'has_5g': True,
+            'processor_tier': 8
+        }
+    
+    def test_laptop_profile(self):
+        """Test a laptop specification sheet with hours of battery life"""
+        profile = parse_spec_profile([
+            ('CPU', 'Intel Core i7'),
+            ('Memory', '16GB'),
+            ('SSD', '1TB'),
+            ('Battery', '13 hours')
+        ])
+        
+        assert profile['ram_gb'] == 16
+        assert profile['storage_gb'] == 1024
+        assert profile['battery_hours'] == 13
+        assert profile['battery_mah'] is None
+        assert profile['has_5g'] is False
+        assert profile['processor_tier'] == 7
+    
+    def test_empty_profile(self):
+        """Test that missing specifications leave attributes empty"""
+        profile = parse_spec_profile([])
+        
+        assert profile['ram_gb'] is None
+        assert profile['processor_tier'] is None
+        assert profile['has_5g'] is False
@@ -0,0 +1,77 @@
+"""
+Tests for the canonical spec schema
+Synonym keys share a row and comparison tables are sliced from aligned rows
+"""
+import pytest
+from app.models.product import Specification
+from app.services.spec_schema import canonical_key, comparison_table, get_spec_schemas
+from app.utils.versioning import CATALOG, bump_version
+
+
+@pytest.fixture
+def phone_specs(db_session, sample_products):
+    """Phones whose specs name the same things differently"""
+    phone1, phone2 = sample_products['phone1'], sample_products['phone2']
+    db_session.add_all([
+        Specification(product_id=phone1.id, spec_key='Battery', spec_value='5000mAh'),
+        Specification(product_id=phone1.id, spec_key='RAM', spec_value='8GB'),
+        Specification(product_id=phone1.id, spec_key='Colour', spec_value='Black'),
+        Specification(product_id=phone2.id, spec_key='Memory', spec_value='8GB'),
+        Specification(product_id=phone2.id, spec_key='CPU', spec_value='Snapdragon 8 Gen 2'),
+        Specification(product_id=phone2.id, spec_key='Battery', spec_value='3900mAh')
+    ])
+    db_session.commit()
+    bump_version(CATALOG)
+    return phone1, phone2
+
+
+@pytest.mark.unit
+class TestSpecSchema:
+    """Test cases for spec schemas and comparison tables"""
+    
+    def test_canonical_key(self):
+        """Test that synonyms map to one label and other keys are kept"""
+        assert canonical_key('Memory') == canonical_key(' ram ') == 'RAM'
+        assert canonical_key('Operating  System') == 'OS'
+        assert canonical_key('Colour') == 'Colour'
+    
+    def test_synonyms_share_a_row(self, phone_specs):
+        """Test that RAM and Memory are one row, in canonical order"""
+        phone1, phone2 = phone_specs
+        schema = get_spec_schemas()[phone1.category_id]
+        
+        assert schema.keys == ('Processor', 'RAM', 'Battery', 'Colour')
+        assert schema.rows[phone1.id] == (None, '8GB', '5000mAh', 'Black')
+        assert schema.rows[phone2.id] == ('Snapdragon 8 Gen 2', '8GB', '3900mAh', None)
+        
+        rows = comparison_table([phone2, phone1]).rows()
+        assert [(row['key'], row['values'], row['differs']) for row in rows] == [
+            ('Processor', ('Snapdragon 8 Gen 2', None), True),
+            ('RAM', ('8GB', '8GB'), False),
+            ('Battery', ('3900mAh', '5000mAh'), True),
+            ('Colour', (None, 'Black'), True)
+        ]
+    
+    def test_slices_to_filled_columns(self, phone_specs):
+        """Test that columns no compared product fills are dropped"""
+        phone1, _ = phone_specs
+        table = comparison_table([phone1, phone1])
+        
+        assert table.keys == ('RAM', 'Battery', 'Colour')
+        assert table.values[0] == ('8GB', '8GB')
+    
+    def test_mixed_categories_and_rebuild(self, db_session, phone_specs, sample_products):
+        """Test that mixed groups align on the fly and schemas follow catalog changes"""
+        phone1, _ = phone_specs
+        laptop = sample_products['laptop1']
+        assert get_spec_schemas()[laptop.category_id].keys == ()
+        db_session.add(Specification(product_id=laptop.id, spec_key='Memory', spec_value='16GB'))
+        db_session.commit()
+        
+        table = comparison_table([phone1, laptop])
+        assert table.keys == ('RAM', 'Battery', 'Colour')
+        assert table.values[0] == ('8GB', '16GB')
+        
+        assert get_spec_schemas()[laptop.category_id].rows[laptop.id] == ()
+        bump_version(CATALOG)
+        assert get_spec_schemas()[laptop.category_id].rows[laptop.id] == ('16GB',)
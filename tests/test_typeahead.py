@@ -0,0 +1,74 @@
+"""
+Tests for the typeahead trie
+Word-start prefix completion with popularity-ranked top-k per node
+"""
+import pytest
+from app.models.product import Specification
+from app.services.typeahead import Suggestion, TypeaheadTrie, get_typeahead
+from app.utils.versioning import CATALOG, bump_version
+
+
+def texts(suggestions):
+    return [suggestion.text for suggestion in suggestions]
+
+
+@pytest.mark.unit
+class TestTypeaheadTrie:
+    """Test cases for TypeaheadTrie"""
+    
+    def test_completes_any_word_by_weight(self):
+        """Test that prefixes of any word complete, heaviest first"""
+        trie = TypeaheadTrie([
+            Suggestion('Samsung', 'brand', 5, 1),
+            Suggestion('Samsung Galaxy S23', 'product', 1, 10),
+            Suggestion('Samsung Galaxy A54', 'product', 1, 11),
+            Suggestion('Sony', 'brand', 2, 2),
+            Suggestion('snapdragon', 'spec', 3)
+        ])
+        
+        assert texts(trie.complete('s')) == ['Samsung', 'snapdragon', 'Sony', 'Samsung Galaxy A54',
+                                             'Samsung Galaxy S23']
+        assert texts(trie.complete('gal')) == ['Samsung Galaxy A54', 'Samsung Galaxy S23']
+        assert texts(trie.complete('  GALAXY  s2')) == ['Samsung Galaxy S23']
+        assert texts(trie.complete('sam', kind='brand')) == ['Samsung']
+        assert texts(trie.complete('s', limit=2)) == ['Samsung', 'snapdragon']
+        assert trie.complete('galaxy z') == []
+        assert trie.complete('') == []
+    
+    def test_matches_brute_force(self):
+        """Test that stored top-k lists equal ranking every match by hand"""
+        words = ['pixel', 'pro', 'probook', 'precision', 'predator', 'phone', 'plus', 'power']
+        suggestions = [Suggestion(f'{a} {b}', kind, weight)
+                       for weight, (a, b, kind) in enumerate(
+                           (a, b, ('brand', 'product', 'spec')[(i + j) % 3])
+                           for i, a in enumerate(words) for j, b in enumerate(words))]
+        trie = TypeaheadTrie(suggestions)
+        
+        for prefix in ('p', 'pr', 'pro', 'prob', 'pre', 'ph', 'pixel p', 'power pl', 'x'):
+            for kind in (None, 'brand', 'spec'):
+                expected = sorted((s for s in suggestions if (kind is None or s.kind == kind) and
+                                   any(word.startswith(prefix) for word in
+                                       (' '.join(s.text.split()[i:]) for i in range(2)))),
+                                  key=lambda s: (-s.weight, s.text))[:10]
+                assert trie.complete(prefix, kind=kind) == expected
+    
+    def test_built_from_catalog(self, db_session, sample_products):
+        """Test that brands, active products and shared spec tokens are suggested"""
+        for product in sample_products.values():
+            db_session.add(Specification(product_id=product.id, spec_key='Display', spec_value='AMOLED 120Hz 2024'))
+        sample_products['phone1'].is_active = False
+        db_session.commit()
+        bump_version(CATALOG)
+        
+        trie = get_typeahead()
+        assert [(s.text, s.weight) for s in trie.complete('s', kind='brand')] == [('Samsung', 1)]
+        assert texts(trie.complete('galaxy')) == ['Samsung Galaxy S23']
+        assert texts(trie.complete('amo')) == ['amoled']
+        assert texts(trie.complete('120')) == ['120hz']
+        assert trie.complete('2024') == []  # Bare numbers are not suggested
+        
+        sample_products['phone1'].is_active = True
+        db_session.commit()
+        assert get_typeahead() is trie
+        bump_version(CATALOG)
+        assert texts(get_typeahead().complete('galaxy')) == ['Samsung Galaxy A54', 'Samsung Galaxy S23']
@@ -0,0 +1,104 @@
+"""
+Parity tests for the vectorized rule matcher
+Every batch result must equal the scalar InferenceEngine result
+"""
+import random
+from decimal import Decimal
+import pytest
+from app.services.inference_engine import InferenceEngine
+from app.services.rule_network import RuleNetwork, CompiledRule, CompiledCondition
+from app.services.vectorized_matcher import VectorizedRuleMatcher
+
+
+USAGES = ['gaming', 'work', 'study', 'general', 'creative']
+OPERATORS = ['equals', '==', 'not_equals', '!=', 'in', 'contains',
+             'less_than', '<', 'greater_than', '>', 'less_equal', '<=', 'greater_equal', '>=']
+
+
+def random_condition(rng):
+    """Build a random condition over the questionnaire facts"""
+    operator = rng.choice(OPERATORS)
+    if operator in ('less_than', '<', 'greater_than', '>', 'less_equal', '<=', 'greater_equal', '>='):
+        return CompiledCondition('budget', operator, str(rng.randrange(100, 3000, 50)))
+    if operator == 'in':
+        return CompiledCondition('usage_type', operator, ', '.join(rng.sample(USAGES, 2)))
+    if operator == 'contains':
+        return CompiledCondition('usage_type', operator, rng.choice(['gam', 'or', 'e']))
+    key = rng.choice(['usage_type', 'usage_type', 'preferred_brand', 'budget'])
+    value = {'usage_type': rng.choice(USAGES), 'preferred_brand': rng.choice(['Apple', 'Dell']),
+             'budget': str(rng.randrange(100, 3000, 50))}[key]
+    return CompiledCondition(key, operator, value)
+
+
+def random_rules(rng, count, with_actions=False):
+    """Build a random rule set, optionally with derived-fact actions"""
+    rules = []
+    for rule_id in range(1, count + 1):
+        conditions = tuple(random_condition(rng) for _ in range(rng.randint(0, 3)))
+        if with_actions and rng.random() < 0.3:
+            conditions += (CompiledCondition('segment', 'equals', rng.choice(['budget', 'premium'])),)
+        actions = ()
+        if with_actions and rng.random() < 0.2:
+            actions = ((rng.choice(['segment', 'usage_type']),
+                        rng.choice(['budget', 'premium', 'gaming'])),)
+        rules.append(CompiledRule(rule_id, f'Rule {rule_id}', None, rng.choice([None, 1, 2]),
+                                  rng.randint(1, 100), True, conditions, actions))
+    return rules
+
+
+def random_facts(rng):
+    """Build a random questionnaire, including missing and malformed values"""
+    facts = {
+        'category_id': rng.choice([None, 1, 2]),
+        'budget': rng.choice([rng.randrange(50, 3200, 25), Decimal('499.99'), '800', 'cheap', None]),
+        'usage_type': rng.choice(USAGES + ['Gaming', None]),
+    }
+    if rng.random() < 0.5:
+        facts['preferred_brand'] = rng.choice(['apple', 'Dell', ''])
+    return facts
+
+
+def assert_parity(rules, facts_list):
+    network = RuleNetwork(rules)
+    engine = InferenceEngine(network)
+    
+    batch = VectorizedRuleMatcher(network).match_many(facts_list)
+    
+    assert len(batch) == len(facts_list)
+    for facts, matched in zip(facts_list, batch):
+        expected = engine.infer(facts)
+        assert [rule.id for rule in matched] == [rule.id for rule in expected], facts
+
+
+@pytest.mark.unit
+class TestVectorizedRuleMatcher:
+    """Parity between the vectorized and scalar matchers"""
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_parity_without_actions(self, seed):
+        """Test random rule sets without derived facts"""
+        rng = random.Random(seed)
+        assert_parity(random_rules(rng, 200), [random_facts(rng) for _ in range(300)])
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_parity_with_forward_chaining(self, seed):
+        """Test random rule sets where fired rules assert derived facts"""
+        rng = random.Random(100 + seed)
+        assert_parity(random_rules(rng, 100, with_actions=True), [random_facts(rng) for _ in range(200)])
+    
+    def test_empty_inputs(self):
+        """Test empty batches and empty rule sets"""
+        assert VectorizedRuleMatcher(RuleNetwork([])).match_many([]) == []
+        assert VectorizedRuleMatcher(RuleNetwork([])).match_many([{'budget': 100}]) == [[]]
+    
+    def test_infer_many_uses_chunks(self):
+        """Test that infer_many yields one result per input across chunk boundaries"""
+        rng = random.Random(7)
+        network = RuleNetwork(random_rules(rng, 50))
+        facts_list = [random_facts(rng) for _ in range(25)]
+        
+        results = list(InferenceEngine(network).infer_many(iter(facts_list), chunk_size=10))
+        
+        engine = InferenceEngine(network)
+        assert [[r.id for r in matched] for matched in results] == \
+            [[r.id for r in engine.infer(facts)] for facts in facts_list]
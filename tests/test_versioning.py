@@ -0,0 +1,83 @@
+"""
+Unit tests for the shared data versions
+Tests that versions live in the database and subscribers only hear committed bumps
+"""
+import pytest
+from sqlalchemy import update
+from app import db
+from app.models.data_version import DataVersion
+from app.services.rule_network import get_rule_network
+from app.utils.versioning import RULES, CATALOG, bump_version, current_version, subscribe, versioned_snapshot, _subscribers
+
+
+@pytest.mark.unit
+class TestDataVersions:
+    """Test cases for data version counters"""
+
+    def test_bump_is_stored_in_database(self, app):
+        """Test that a bump is visible to any session reading the table"""
+        version = current_version(CATALOG)
+
+        assert bump_version(CATALOG) == version + 1
+        db.session.commit()
+
+        assert db.session.get(DataVersion, CATALOG).version == version + 1
+        assert current_version(CATALOG) == version + 1
+
+    def test_write_by_another_worker_reloads_cache(self, app, sample_rules):
+        """Test that a version changed outside this process rebuilds the cached network"""
+        network = get_rule_network()
+
+        # Another worker's commit: only the shared row changes
+        db.session.execute(update(DataVersion).where(DataVersion.name == RULES)
+                           .values(version=DataVersion.version + 1))
+        db.session.commit()
+        assert get_rule_network() is network
+
+        app.preprocess_request()  # The next request reads the versions again
+        assert get_rule_network() is not network
+
+    def test_subscribers_hear_committed_bumps_only(self, app):
+        """Test that subscribers run after commit and never for rolled back bumps"""
+        heard = []
+        subscribe(CATALOG, heard.append)
+        try:
+            bump_version(CATALOG)
+            db.session.rollback()
+            assert heard == []
+
+            version = bump_version(CATALOG)
+            assert heard == []
+            db.session.commit()
+            assert heard == [version]
+        finally:
+            _subscribers[CATALOG].remove(heard.append)
+
+    def test_version_read_once_per_request(self, app, count_queries):
+        """Test that a request reads the versions table once however often it asks"""
+        app.preprocess_request()
+        first = current_version(CATALOG)
+        db.session.execute(update(DataVersion).where(DataVersion.name == CATALOG)
+                           .values(version=DataVersion.version + 1))
+        del count_queries[:]
+
+        assert current_version(CATALOG) == first
+        assert current_version(RULES)
+        assert count_queries == []
+
+        app.preprocess_request()
+        assert current_version(CATALOG) == first + 1
+
+    def test_versioned_snapshot_rebuilds_on_bump_only(self, app):
+        """Test that a snapshot getter rebuilds only when its data set's version moves"""
+        builds = []
+        get = versioned_snapshot(CATALOG, lambda: builds.append(None) or len(builds))
+
+        assert get() == get() == 1
+        bump_version(RULES)
+        db.session.commit()
+        assert get() == 1
+
+        bump_version(CATALOG)
+        db.session.commit()
+        assert get() == 2